@@ -0,0 +1,386 @@
+"""Computer players.
+
+A player is any callable ``player(state, moves, dice, rng) -> token`` taking a
+``GameState`` with the player to move, that player's legal tokens for
+``dice`` and a ``random.Random``; the simple strategies in ``simulate.py``
+have the same shape. The search players here copy the state once per move
+and then walk the tree with ``apply_move`` / ``undo_move``, stopping when
+their time budget runs out. Once a game turns into a pure race they read
+the result from the endgame tablebase instead of searching.
+"""
+import math
+import random
+import time
+
+from endgame import default_tablebase
+from engine import (NUM_PLAYERS, TOKENS_PER_PLAYER, YARD, PASS, PATH_CELLS, HOME_INDEX,
+                    SAFE_SQUARES, ZOBRIST_DICE)
+from transposition import TranspositionTable
+
+WIN = 1.0
+LOSS = -1.0
+
+DICE_FACES = (1, 2, 3, 4, 5, 6)
+
+# Searches stop at this share of their time limit, leaving the rest for
+# unwinding and timer noise
+TIME_MARGIN = 0.8
+
+# Nodes searched between looks at the clock
+CLOCK_INTERVAL = 4
+
+# Transposition keys also depend on the searching seat, since values are
+# scored for it; one player may search for several seats
+_root_rng = random.Random(0x5EA7)
+ZOBRIST_ROOT = [_root_rng.getrandbits(64) for _ in range(NUM_PLAYERS)]
+
+
+def progress(state, player):
+    # 0 for a token in the yard up to 1 for a token home, summed over the player's tokens
+    base = player * TOKENS_PER_PLAYER
+    home = HOME_INDEX[player]
+    return sum((index + 1) / (home + 1) for index in state.indices[base:base + TOKENS_PER_PLAYER]
+               if index != YARD)
+
+
+def evaluate(state, player):
+    """Score in [LOSS, WIN] for ``player``: own progress against the best opponent's."""
+    winner = state.winner()
+    if winner is not None:
+        return WIN if winner == player else LOSS
+    scores = [progress(state, p) for p in range(NUM_PLAYERS)]
+    best_opponent = max(score for p, score in enumerate(scores) if p != player)
+    return (scores[player] - best_opponent) / TOKENS_PER_PLAYER
+
+
+def move_priority(state, token, dice):
+    # Captures, then reaching home, then leaving the yard, then the most advanced token
+    player = state.current_player
+    index = state.indices[player * TOKENS_PER_PLAYER + token]
+    new_index = 0 if index == YARD else index + dice
+    if new_index == HOME_INDEX[player]:
+        return 3, new_index
+    cell = PATH_CELLS[player][new_index]
+    if cell not in SAFE_SQUARES:
+        for other in range(NUM_PLAYERS * TOKENS_PER_PLAYER):
+            other_player = other // TOKENS_PER_PLAYER
+            other_index = state.indices[other]
+            if (other_player != player and other_index != YARD
+                    and PATH_CELLS[other_player][other_index] == cell):
+                return 4, new_index
+    return (2 if index == YARD else 1), new_index
+
+
+def order_moves(state, moves, dice):
+    return sorted(moves, key=lambda token: move_priority(state, token, dice), reverse=True)
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class GreedyPlayer:
+    """One-ply lookahead on the evaluation; cheap enough for bulk simulation.
+
+    With an ``evaluator.LinearEvaluator`` the positions after every move are
+    scored together in one batch instead.
+    """
+
+    def __init__(self, evaluator=None):
+        self.evaluator = evaluator
+
+    def __call__(self, state, moves, dice, rng=None):
+        player = state.current_player
+        if self.evaluator is not None:
+            after = []
+            for token in moves:
+                undo = state.apply_move(token, dice)
+                after.append(state.copy())
+                state.undo_move(undo)
+            chances = self.evaluator.evaluate(after)[:, player]
+            return moves[int(chances.argmax())]
+
+        best, best_value = moves[0], None
+        for token in moves:
+            undo = state.apply_move(token, dice)
+            value = evaluate(state, player)
+            state.undo_move(undo)
+            if best_value is None or value > best_value:
+                best, best_value = token, value
+        return best
+
+
+class LinearPlayer(GreedyPlayer):
+    """Greedy play on the shared trained ``evaluator.LinearEvaluator`` weights."""
+
+    def __init__(self, evaluator=None):
+        if evaluator is None:
+            # Imported here, so numpy only loads once a linear player is built
+            from evaluator import default_evaluator
+            evaluator = default_evaluator()
+        super().__init__(evaluator)
+
+
+class ExpectiminimaxPlayer:
+    """Iterative-deepening expectiminimax with alpha-beta and Star1 chance pruning.
+
+    Opponents are assumed to play against us (paranoid search), which keeps
+    the tree two-valued so alpha-beta applies. Depth counts turns.
+    """
+
+    def __init__(self, time_limit=0.05, max_depth=12, table_size=1 << 18, use_tablebase=True):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.use_tablebase = use_tablebase
+        self.tablebase = None
+        self.table = TranspositionTable(table_size)
+        self.nodes = 0
+        self.depth_reached = 0
+
+    def __call__(self, state, moves, dice, rng=None):
+        return self.choose(state, dice, moves)
+
+    def choose(self, state, dice, moves=None):
+        # Everything from here on counts against the time limit
+        self.deadline = time.perf_counter() + self.time_limit * TIME_MARGIN
+        if moves is None:
+            moves = state.legal_moves(dice)
+        if len(moves) <= 1:
+            return moves[0] if moves else PASS
+
+        if self.use_tablebase and self.tablebase is None:
+            # A one-off load (or build) of the tablebase is not part of any move's budget
+            self.tablebase = default_tablebase()
+            self.deadline = time.perf_counter() + self.time_limit * TIME_MARGIN
+        self.root = state.current_player
+        self.root_key = ZOBRIST_ROOT[self.root]
+        self.nodes = 0
+        self.table.new_search()
+
+        state = state.copy()
+        best = order_moves(state, moves, dice)[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                best = self.search_root(state, dice, moves, depth, best)
+            except SearchTimeout:
+                break
+            self.depth_reached = depth
+        return best
+
+    def search_root(self, state, dice, moves, depth, previous_best):
+        ordered = order_moves(state, moves, dice)
+        ordered.remove(previous_best)
+        ordered.insert(0, previous_best)
+
+        alpha, best = LOSS - 1, previous_best
+        for token in ordered:
+            undo = state.apply_move(token, dice)
+            value = self.after_move(state, depth, alpha, WIN)
+            state.undo_move(undo)
+            if value > alpha:
+                alpha, best = value, token
+        return best
+
+    def after_move(self, state, depth, alpha, beta):
+        winner = state.winner()
+        if winner is not None:
+            return WIN if winner == self.root else LOSS
+        if self.tablebase is not None:
+            chances = self.tablebase.probe(state)
+            if chances is not None:
+                return LOSS + (WIN - LOSS) * chances[self.root]
+        return self.chance(state, depth - 1, alpha, beta)
+
+    def tick(self):
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+    def chance(self, state, depth, alpha, beta):
+        self.tick()
+        if depth <= 0:
+            return evaluate(state, self.root)
+
+        # Star1: stop once the outcomes so far settle the node outside the window
+        p = 1 / len(DICE_FACES)
+        total, remaining = 0.0, 1.0
+        for dice in DICE_FACES:
+            remaining -= p
+            child_alpha = max(LOSS, (alpha - total - remaining * WIN) / p)
+            child_beta = min(WIN, (beta - total - remaining * LOSS) / p)
+            total += p * self.decision(state, dice, depth, child_alpha, child_beta)
+            if total + remaining * WIN <= alpha:
+                return total + remaining * WIN
+            if total + remaining * LOSS >= beta:
+                return total + remaining * LOSS
+        return total
+
+    def decision(self, state, dice, depth, alpha, beta):
+        self.tick()
+        moves = state.legal_moves(dice)
+        if not moves:
+            undo = state.apply_move(PASS, dice)
+            value = self.after_move(state, depth, alpha, beta)
+            state.undo_move(undo)
+            return value
+
+        key = state.zobrist ^ ZOBRIST_DICE[dice] ^ self.root_key
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            entry_depth, lower, upper, best_move = entry
+            if entry_depth >= depth:
+                if lower >= beta:
+                    return lower
+                if upper <= alpha:
+                    return upper
+                if lower == upper:
+                    return lower
+
+        ordered = order_moves(state, moves, dice)
+        if best_move in ordered:
+            ordered.remove(best_move)
+            ordered.insert(0, best_move)
+
+        maximizing = state.current_player == self.root
+        original_alpha, original_beta = alpha, beta
+        best_value = LOSS - 1 if maximizing else WIN + 1
+        for token in ordered:
+            undo = state.apply_move(token, dice)
+            value = self.after_move(state, depth, alpha, beta)
+            state.undo_move(undo)
+            if maximizing:
+                if value > best_value:
+                    best_value, best_move = value, token
+                alpha = max(alpha, value)
+            else:
+                if value < best_value:
+                    best_value, best_move = value, token
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        # Store as bounds: a cut-off only tells us one side of the true value
+        lower = best_value if best_value > original_alpha else LOSS
+        upper = best_value if best_value < original_beta else WIN
+        self.table.put(key, depth, lower, upper, best_move)
+        return best_value
+
+
+class MCTSNode:
+    __slots__ = ("player", "moves", "visits", "totals", "children")
+
+    def __init__(self, player, moves):
+        self.player = player
+        self.moves = moves
+        self.visits = {move: 0 for move in moves}
+        self.totals = {move: 0.0 for move in moves}
+        # move -> {dice: MCTSNode}
+        self.children = {move: {} for move in moves}
+
+    def select(self, exploration):
+        untried = [move for move in self.moves if not self.visits[move]]
+        if untried:
+            return untried[0]
+        log_total = math.log(sum(self.visits.values()))
+        return max(self.moves, key=lambda move: self.totals[move] / self.visits[move]
+                   + exploration * math.sqrt(log_total / self.visits[move]))
+
+
+class MCTSPlayer:
+    """Monte Carlo tree search with sampled chance nodes and truncated rollouts.
+
+    Each decision node keeps statistics for its own player (max-n), and
+    rollouts stop after ``rollout_turns`` turns and score the position with
+    everyone's share of total progress.
+    """
+
+    def __init__(self, time_limit=0.05, exploration=0.7, rollout_turns=24, seed=None,
+                 use_tablebase=True):
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+        self.use_tablebase = use_tablebase
+        self.tablebase = None
+        self.rng = random.Random(seed)
+        self.iterations = 0
+
+    def __call__(self, state, moves, dice, rng=None):
+        return self.choose(state, dice, moves)
+
+    def choose(self, state, dice, moves=None):
+        deadline = time.perf_counter() + self.time_limit * TIME_MARGIN
+        if moves is None:
+            moves = state.legal_moves(dice)
+        if len(moves) <= 1:
+            return moves[0] if moves else PASS
+
+        if self.use_tablebase and self.tablebase is None:
+            self.tablebase = default_tablebase()
+            deadline = time.perf_counter() + self.time_limit * TIME_MARGIN
+        state = state.copy()
+        root = MCTSNode(state.current_player, order_moves(state, moves, dice))
+        self.iterations = 0
+        while time.perf_counter() < deadline:
+            self.iterate(state, root, dice)
+            self.iterations += 1
+        return max(root.moves, key=lambda move: root.visits[move])
+
+    def iterate(self, state, root, dice):
+        path, undos = [], []
+        node = root
+        while True:
+            move = node.select(self.exploration)
+            undos.append(state.apply_move(move, dice))
+            path.append((node, move))
+            if state.winner() is not None:
+                rewards = self.rewards(state)
+                break
+
+            dice = self.rng.randint(1, 6)
+            child = node.children[move].get(dice)
+            if child is None:
+                moves = state.legal_moves(dice)
+                node.children[move][dice] = MCTSNode(state.current_player, moves or [PASS])
+                rewards = self.rollout(state, dice)
+                break
+            node = child
+
+        for node, move in path:
+            node.visits[move] += 1
+            node.totals[move] += rewards[node.player]
+        for undo in reversed(undos):
+            state.undo_move(undo)
+
+    def rollout(self, state, dice):
+        undos = []
+        for _ in range(self.rollout_turns):
+            # Half greedy, half random play
+            moves = state.legal_moves(dice)
+            if not moves:
+                token = PASS
+            elif self.rng.random() < 0.5:
+                token = order_moves(state, moves, dice)[0]
+            else:
+                token = self.rng.choice(moves)
+            undos.append(state.apply_move(token, dice))
+            if token != PASS and state.winner() is not None:
+                break
+            dice = self.rng.randint(1, 6)
+        rewards = self.rewards(state)
+        for undo in reversed(undos):
+            state.undo_move(undo)
+        return rewards
+
+    def rewards(self, state):
+        winner = state.winner()
+        if winner is not None:
+            return [1.0 if player == winner else 0.0 for player in range(NUM_PLAYERS)]
+        if self.tablebase is not None:
+            chances = self.tablebase.probe(state)
+            if chances is not None:
+                return chances
+        scores = [progress(state, player) for player in range(NUM_PLAYERS)]
+        total = sum(scores) or 1.0
+        return [score / total for score in scores]
+
@@ -0,0 +1,220 @@
+"""Streaming statistics over game archives.
+
+Games are read lazily from a ``GameArchive``, decoded into per-turn events by
+replaying them on a ``GameState``, and fed to incremental aggregators. Big
+archives are cut into byte ranges of a few thousand games that worker
+processes scan independently; their partial aggregates are merged at the
+end, so memory stays flat however large the archive is.
+
+    python analytics.py games.ludo --workers 4
+"""
+import argparse
+import multiprocessing
+from collections import Counter, namedtuple
+
+from engine import NUM_PLAYERS, PATH_CELLS, PLAYER_NAMES
+from gamelog import GameArchive, GameRecord
+from state import GameState, PASS
+
+TurnEvent = namedtuple("TurnEvent", "turn player dice token forfeit cell captured")
+
+
+def iter_records(archive, start=0, end=None):
+    # Game records whose headers lie in the byte range [start, end)
+    end = archive.size if end is None else end
+    offset = start
+    while offset < end:
+        record = GameRecord(archive.buffer, offset)
+        yield record
+        offset = record.end
+
+
+def iter_events(record):
+    state = GameState()
+    for turn, (dice, token) in enumerate(record.turns()):
+        player = state.current_player
+        forfeit = dice == 6 and state.consecutive_sixes == 2
+        undo = state.apply_move(token, dice)
+        cell = None
+        if token != PASS and not forfeit:
+            cell = PATH_CELLS[player][state.indices[undo[3]]]
+        yield TurnEvent(turn, player, dice, token, forfeit, cell, undo[5] != PASS)
+
+
+class Aggregator:
+    """Base class: add() sees every turn, end_game() every game, merge() combines partials."""
+
+    def add(self, event):
+        pass
+
+    def end_game(self, record):
+        pass
+
+    def merge(self, other):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+
+class CaptureRates(Aggregator):
+    def __init__(self):
+        self.landings = Counter()
+        self.captures = Counter()
+
+    def add(self, event):
+        if event.cell is not None:
+            self.landings[event.cell] += 1
+            if event.captured:
+                self.captures[event.cell] += 1
+
+    def merge(self, other):
+        self.landings.update(other.landings)
+        self.captures.update(other.captures)
+        return self
+
+    def result(self):
+        # Share of moves landing on each cell that captured something
+        return {cell: self.captures[cell] / landings
+                for cell, landings in sorted(self.landings.items())}
+
+
+class TurnsToFinish(Aggregator):
+    def __init__(self):
+        self.games = 0
+        self.turns = 0
+        self.longest = 0
+
+    def end_game(self, record):
+        if record.winner is not None:
+            self.games += 1
+            self.turns += record.turn_count
+            self.longest = max(self.longest, record.turn_count)
+
+    def merge(self, other):
+        self.games += other.games
+        self.turns += other.turns
+        self.longest = max(self.longest, other.longest)
+        return self
+
+    def result(self):
+        return {"finished": self.games,
+                "average_turns": self.turns / self.games if self.games else 0.0,
+                "longest": self.longest}
+
+
+class SixForfeits(Aggregator):
+    def __init__(self):
+        self.forfeits = 0
+        self.turns = 0
+
+    def add(self, event):
+        self.turns += 1
+        self.forfeits += event.forfeit
+
+    def merge(self, other):
+        self.forfeits += other.forfeits
+        self.turns += other.turns
+        return self
+
+    def result(self):
+        return {"forfeits": self.forfeits,
+                "per_turn": self.forfeits / self.turns if self.turns else 0.0}
+
+
+class SeatWins(Aggregator):
+    # First-mover advantage: seat 0 always rolls first
+    def __init__(self):
+        self.wins = [0] * NUM_PLAYERS
+
+    def end_game(self, record):
+        if record.winner is not None:
+            self.wins[record.winner] += 1
+
+    def merge(self, other):
+        self.wins = [a + b for a, b in zip(self.wins, other.wins)]
+        return self
+
+    def result(self):
+        total = sum(self.wins)
+        return {PLAYER_NAMES[seat]: wins / total if total else 0.0
+                for seat, wins in enumerate(self.wins)}
+
+
+AGGREGATORS = {
+    "captures": CaptureRates,
+    "turns": TurnsToFinish,
+    "forfeits": SixForfeits,
+    "seats": SeatWins,
+}
+
+
+def feed(records, aggregators):
+    # Turn-level aggregators need decoding; game-level ones only read headers
+    per_turn = [a for a in aggregators if type(a).add is not Aggregator.add]
+    for record in records:
+        if per_turn:
+            for event in iter_events(record):
+                for aggregator in per_turn:
+                    aggregator.add(event)
+        for aggregator in aggregators:
+            aggregator.end_game(record)
+    return aggregators
+
+
+def iter_ranges(archive, games_per_chunk):
+    # Byte ranges covering games_per_chunk games each, found by hopping headers
+    start = offset = count = 0
+    for record in iter_records(archive):
+        count += 1
+        offset = record.end
+        if count == games_per_chunk:
+            yield start, offset
+            start, count = offset, 0
+    if count:
+        yield start, offset
+
+
+def run_range(args):
+    path, start, end, names = args
+    with GameArchive(path) as archive:
+        return feed(iter_records(archive, start, end), [AGGREGATORS[name]() for name in names])
+
+
+def analyze(path, names=tuple(AGGREGATORS), workers=None, games_per_chunk=2000):
+    """Aggregate the archive at ``path`` and return {name: result}."""
+    totals = [AGGREGATORS[name]() for name in names]
+    with GameArchive(path) as archive:
+        ranges = ((path, start, end, names) for start, end in iter_ranges(archive, games_per_chunk))
+        pool = None if workers == 1 else multiprocessing.Pool(workers)
+        try:
+            partials = map(run_range, ranges) if pool is None else pool.imap_unordered(run_range, ranges)
+            for partial in partials:
+                for total, part in zip(totals, partial):
+                    total.merge(part)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    return {name: total.result() for name, total in zip(names, totals)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute statistics over a game archive")
+    parser.add_argument("path")
+    parser.add_argument("--stats", nargs="+", default=list(AGGREGATORS), choices=sorted(AGGREGATORS))
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--chunk-games", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    results = analyze(args.path, tuple(args.stats), args.workers, args.chunk_games)
+    for name, result in results.items():
+        if name == "captures":
+            top = sorted(result.items(), key=lambda item: -item[1])[:5]
+            print(f"{name}: most dangerous cells {[(cell, round(rate, 3)) for cell, rate in top]}")
+        else:
+            print(f"{name}: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""NumPy lockstep engine that advances many games at once.
+
+Every game in the batch takes one turn per ``step``: dice are rolled, legal
+moves are masked, a token is chosen, captures resolved and winners recorded
+with whole-array operations. Positions are path indices with the same meaning
+as in ``GameState`` (``YARD`` = -1, ``HOME_INDEX`` = finished).
+
+Only games still being played take part in a step. Once enough of them
+have finished, the per-game working arrays (``positions``,
+``current_player``, ``consecutive_sixes``, ``dice``) are compacted to the
+rest; ``ids`` maps their rows back to game numbers. ``winner``, ``turns``
+and ``captures`` always have one entry per game.
+
+    python batch.py --games 100000 --seed 1
+"""
+import argparse
+import time
+
+import numpy as np
+
+from dice import DiceSource
+from engine import (NUM_PLAYERS, TOKENS_PER_PLAYER, YARD, PATH_CELLS, HOME_INDEX,
+                    SAFE_SQUARES, PLAYER_NAMES, PATH_SPAN, DICE_SPAN, PATH_CELL_IDS, STANDARD,
+                    MOVE_INDEX, MOVE_CELL, MOVE_LEGAL, MOVE_SAFE)
+
+# Path tables as lookup arrays: player x path index -> cell id
+PATH_LENGTH = max(len(cells) for cells in PATH_CELLS.values())
+CELL_IDS = np.full((NUM_PLAYERS, PATH_LENGTH), -1, dtype=np.int16)
+for _player, _ids in PATH_CELL_IDS.items():
+    CELL_IDS[_player, :len(_ids)] = _ids
+
+# The engine's move tables as player x dice x (path index + 1) arrays
+_shape = (NUM_PLAYERS, DICE_SPAN, PATH_SPAN)
+MOVES_INDEX = np.frombuffer(MOVE_INDEX, dtype=np.int8).reshape(_shape)
+MOVES_CELL = np.frombuffer(MOVE_CELL, dtype=np.int16).reshape(_shape)
+MOVES_LEGAL = np.frombuffer(MOVE_LEGAL, dtype=np.uint8).reshape(_shape).astype(bool)
+MOVES_SAFE = np.frombuffer(MOVE_SAFE, dtype=np.uint8).reshape(_shape).astype(bool)
+
+SAFE_CELLS = np.zeros(len(STANDARD.cell_ids), dtype=bool)
+SAFE_CELLS[[STANDARD.cell_ids[pos] for pos in SAFE_SQUARES]] = True
+
+HOME_INDICES = np.array([HOME_INDEX[player] for player in range(NUM_PLAYERS)], dtype=np.int8)
+
+# Working rows are compacted once finished games make up this share of them
+COMPACT_SHARE = 0.1
+
+STRATEGIES = ("random", "first", "furthest", "nearest")
+
+
+class BatchGames:
+    def __init__(self, num_games, seed=None, strategy="random"):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.num_games = num_games
+        self.strategy = strategy
+        self.rng = np.random.default_rng(seed)
+        self.dice_source = DiceSource(seed)
+        self.positions = np.full((num_games, NUM_PLAYERS, TOKENS_PER_PLAYER), YARD, dtype=np.int8)
+        self.current_player = np.zeros(num_games, dtype=np.int8)
+        self.consecutive_sixes = np.zeros(num_games, dtype=np.int8)
+        self.dice = np.ones(num_games, dtype=np.int8)
+        self.winner = np.full(num_games, -1, dtype=np.int8)
+        self.turns = np.zeros(num_games, dtype=np.int32)
+        self.captures = np.zeros(num_games, dtype=np.int32)
+        # Game number of every working row, and whether it is still being played
+        self.ids = np.arange(num_games)
+        self.live = np.ones(num_games, dtype=bool)
+        self._rows = np.arange(num_games)
+
+    @classmethod
+    def from_state(cls, state, num_games, seed=None, strategy="random"):
+        """``num_games`` copies of a GameState position, to be played out from there."""
+        games = cls(num_games, seed, strategy)
+        games.positions[:] = np.frombuffer(state.indices, dtype=np.int8).reshape(NUM_PLAYERS,
+                                                                                 TOKENS_PER_PLAYER)
+        games.current_player[:] = state.current_player
+        games.consecutive_sixes[:] = state.consecutive_sixes
+        if state.winner() is not None:
+            games.winner[:] = state.winner()
+            games.live[:] = False
+            games.compact()
+        return games
+
+    @property
+    def active(self):
+        """Per game: still being played."""
+        return self.winner < 0
+
+    def playing(self):
+        return bool(len(self.ids))
+
+    def compact(self):
+        # Drop finished games from the working rows
+        keep = np.flatnonzero(self.live)
+        self.ids = self.ids[keep]
+        self.positions = self.positions[keep]
+        self.current_player = self.current_player[keep]
+        self.consecutive_sixes = self.consecutive_sixes[keep]
+        self.dice = self.dice[keep]
+        self.live = self.live[keep]
+        self._rows = np.arange(len(keep))
+
+    def roll(self):
+        self.dice = self.dice_source.rolls(len(self.ids))
+        return self.dice
+
+    def own_positions(self):
+        return self.positions[self._rows, self.current_player]
+
+    def legal_mask(self, dice=None):
+        """(N, 4) mask of tokens the player to move may move."""
+        dice = self.dice if dice is None else dice
+        own = self.own_positions().astype(np.int16)
+        dice = dice.astype(np.int16)[:, None]
+        legal = MOVES_LEGAL[self.current_player[:, None], dice, own + 1]
+
+        # A third six forfeits the turn
+        forfeit = (dice[:, 0] == 6) & (self.consecutive_sixes == 2)
+        legal &= (~forfeit & self.live)[:, None]
+        return legal
+
+    def choose(self, legal):
+        if self.strategy == "random":
+            keys = self.rng.random(legal.shape)
+        elif self.strategy == "first":
+            keys = -np.arange(TOKENS_PER_PLAYER, dtype=float)[None, :].repeat(len(legal), 0)
+        else:
+            keys = self.own_positions().astype(float)
+            if self.strategy == "nearest":
+                keys = -keys
+        return np.where(legal, keys, -np.inf).argmax(axis=1)
+
+    def apply(self, tokens, legal, dice=None):
+        """Move ``tokens`` in every game that has a legal move, then pass turns."""
+        dice = self.dice if dice is None else dice
+        rows = self._rows
+        player = self.current_player
+        active = self.live
+        moved = legal[rows, tokens]
+
+        # Advance the chosen token (out of the yard onto index 0)
+        old = self.positions[rows, player, tokens].astype(np.int16)
+        new = MOVES_INDEX[player, dice, old + 1]
+        moved_rows = rows[moved]
+        self.positions[moved_rows, player[moved], tokens[moved]] = new[moved]
+
+        # Capture the first opponent token (by seat, then index) on an unsafe landing cell
+        landing = MOVES_CELL[player, dice, old + 1]
+        flat = self.positions.reshape(len(rows), -1).astype(np.int16)
+        seats = np.repeat(np.arange(NUM_PLAYERS), TOKENS_PER_PLAYER)
+        cells = CELL_IDS[seats[None, :], np.maximum(flat, 0)]
+        hits = ((cells == landing[:, None]) & (flat != YARD) & (seats[None, :] != player[:, None])
+                & (moved & ~MOVES_SAFE[player, dice, old + 1])[:, None])
+        captured = hits.any(axis=1)
+        victims = hits.argmax(axis=1)
+        flat[captured, victims[captured]] = YARD
+        self.positions = flat.astype(np.int8).reshape(self.positions.shape)
+        self.captures[self.ids[captured]] += 1
+
+        # A player with every token home wins
+        own = self.own_positions()
+        won = moved & (own == HOME_INDICES[player][:, None]).all(axis=1)
+        self.winner[self.ids[won]] = player[won]
+        self.live = active & ~won
+
+        # Another roll after a six that was used, otherwise the next player
+        six = dice == 6
+        forfeit = six & (self.consecutive_sixes == 2)
+        keep = six & moved & ~forfeit & ~won
+        advance = active & ~keep & ~won
+        self.consecutive_sixes = np.where(keep, self.consecutive_sixes + 1, 0).astype(np.int8)
+        self.current_player = np.where(advance, (player + 1) % NUM_PLAYERS, player).astype(np.int8)
+        self.turns[self.ids[active]] += 1
+        return moved
+
+    def step(self):
+        self.roll()
+        legal = self.legal_mask()
+        self.apply(self.choose(legal), legal)
+        finished = len(self.live) - np.count_nonzero(self.live)
+        if finished and finished >= COMPACT_SHARE * len(self.live):
+            self.compact()
+
+    def run(self, max_turns=10000):
+        for _ in range(max_turns):
+            if not self.playing():
+                break
+            self.step()
+        return self.wins()
+
+    def wins(self):
+        return np.bincount(self.winner[self.winner >= 0], minlength=NUM_PLAYERS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a batch of Ludo games in lockstep")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strategy", default="random", choices=STRATEGIES)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    games = BatchGames(args.games, args.seed, args.strategy)
+    wins = games.run()
+    elapsed = time.perf_counter() - start
+
+    for player, count in enumerate(wins):
+        print(f"{PLAYER_NAMES[player]:<7} {count / args.games:.4f}")
+    print(f"average turns {games.turns.mean():.1f}, captures {games.captures.sum()}, "
+          f"unfinished {int(games.active.sum())}")
+    print(f"{args.games / elapsed:.0f} games/s")
+
+
+if __name__ == "__main__":
+    main()
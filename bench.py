@@ -0,0 +1,260 @@
+"""Performance benchmarks for the rules, simulation and rendering.
+
+Each benchmark is run a few times and the best run kept. Results are written
+as JSON together with a description of the machine, and can be compared
+against a saved baseline: any result that got worse by more than the
+threshold is reported and the exit status is 1, so a change can be gated
+on it.
+
+    python bench.py --output bench_baseline.json
+    python bench.py --baseline bench_baseline.json --threshold 0.15
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from dice import DiceSource
+from engine import LudoEngine, GAME_OVER, WAITING_FOR_PIECE, YARD
+from simulate import SimulationStats, STRATEGIES, play_game
+from state import GameState, PASS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def random_positions(count, seed):
+    # Positions from random games, sampled at random points
+    rng = random.Random(seed)
+    dice = DiceSource(seed)
+    positions = []
+    while len(positions) < count:
+        state = GameState()
+        for _ in range(rng.randrange(20, 400)):
+            roll = dice.roll()
+            moves = state.legal_moves(roll)
+            state.apply_move(rng.choice(moves) if moves else PASS, roll)
+            if state.winner() is not None:
+                break
+        if state.winner() is None:
+            positions.append(state)
+    return positions
+
+
+def bench_rules(positions):
+    # Operations per second for each rules call, timed apart from setting up positions
+    engine = LudoEngine(DiceSource(0))
+    counts = {"can_move_token": 0, "move_token": 0, "check_capture": 0}
+    times = dict.fromkeys(counts, 0.0)
+    clock = time.perf_counter
+    for state in positions:
+        state.apply_to(engine)
+        tokens = engine.tokens[engine.current_player]
+
+        start = clock()
+        for steps in range(1, 7):
+            for token in tokens:
+                engine.can_move_token(token, steps)
+        times["can_move_token"] += clock() - start
+        counts["can_move_token"] += 6 * len(tokens)
+
+        on_board = [token for token in tokens if token.path_index != YARD and not token.is_home]
+        start = clock()
+        for token in on_board:
+            engine.check_capture(token)
+        times["check_capture"] += clock() - start
+        counts["check_capture"] += len(on_board)
+
+        movable = engine.movable_tokens(6)
+        if movable:
+            start = clock()
+            engine.move_token(movable[0], 6)
+            times["move_token"] += clock() - start
+            counts["move_token"] += 1
+    return {f"{name}_per_s": counts[name] / times[name] for name in counts}
+
+
+def bench_engine_games(games, seed):
+    # Complete games through LudoEngine, always playing the first movable token
+    start = time.perf_counter()
+    for game in range(games):
+        engine = LudoEngine(DiceSource(seed, game))
+        while engine.state != GAME_OVER:
+            engine.roll_dice()
+            engine.resolve_roll()
+            if engine.state == WAITING_FOR_PIECE:
+                engine.play_token(engine.movable_tokens()[0])
+    return games / (time.perf_counter() - start)
+
+
+def bench_state_games(games, seed):
+    # Complete games through GameState with random moves, as simulate.py plays them
+    rng = random.Random(seed)
+    dice = DiceSource(seed)
+    strategies = [STRATEGIES["random"]] * 4
+    stats = SimulationStats()
+    start = time.perf_counter()
+    for _ in range(games):
+        play_game(rng, strategies, stats, dice_source=dice)
+    return games / (time.perf_counter() - start)
+
+
+def bench_frames(frames, seed):
+    """Milliseconds for draw_board + draw_tokens + draw_dice on the dummy video driver."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import main
+
+    pygame.init()
+    try:
+        screen = pygame.Surface((main.WINDOW_SIZE, main.WINDOW_SIZE))
+        game = main.LudoGame(screen, DiceSource(seed))
+        positions = random_positions(frames, seed)
+
+        start = time.perf_counter()
+        game.draw_board()
+        game.draw_tokens()
+        game.draw_dice()
+        first = time.perf_counter() - start
+
+        samples = []
+        for state in positions:
+            state.apply_to(game)
+            start = time.perf_counter()
+            game.draw_board()
+            game.draw_tokens()
+            game.draw_dice()
+            samples.append(time.perf_counter() - start)
+    finally:
+        pygame.quit()
+    samples.sort()
+    return {"first_frame_ms": first * 1000,
+            "frame_ms": sum(samples) / len(samples) * 1000,
+            "frame_p95_ms": samples[int(len(samples) * 0.95)] * 1000}
+
+
+def bench_import(module, runs):
+    # Wall time of a fresh interpreter importing the module, less a bare interpreter
+    def run(code):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=HERE,
+                       env=dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1"))
+        return time.perf_counter() - start
+
+    bare = min(run("pass") for _ in range(runs))
+    return max(min(run(f"import {module}") for _ in range(runs)) - bare, 0.0) * 1000
+
+
+# name -> (unit, higher is better)
+METRICS = {
+    "can_move_token_per_s": ("ops/s", True),
+    "move_token_per_s": ("ops/s", True),
+    "check_capture_per_s": ("ops/s", True),
+    "engine_games_per_s": ("games/s", True),
+    "state_games_per_s": ("games/s", True),
+    "first_frame_ms": ("ms", False),
+    "frame_ms": ("ms", False),
+    "frame_p95_ms": ("ms", False),
+    "import_engine_ms": ("ms", False),
+    "import_main_ms": ("ms", False),
+}
+
+
+def best(runs, measure):
+    # Best value of each metric over several runs
+    results = [measure() for _ in range(runs)]
+    return {key: (max if METRICS[key][1] else min)(r[key] for r in results) for key in results[0]}
+
+
+def run_benchmarks(repeat=3, quick=False, seed=0):
+    scale = 0.2 if quick else 1.0
+    positions = random_positions(int(2000 * scale), seed)
+    results = {}
+    results.update(best(repeat, lambda: bench_rules(positions)))
+    results["engine_games_per_s"] = max(bench_engine_games(int(50 * scale), seed) for _ in range(repeat))
+    results["state_games_per_s"] = max(bench_state_games(int(200 * scale), seed) for _ in range(repeat))
+    results.update(best(repeat, lambda: bench_frames(int(300 * scale), seed)))
+    results["import_engine_ms"] = bench_import("engine", repeat)
+    results["import_main_ms"] = bench_import("main", repeat)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def machine_metadata():
+    metadata = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+    for module in ("numpy", "pygame"):
+        try:
+            metadata[module] = __import__(module).__version__
+        except ImportError:
+            metadata[module] = None
+    return metadata
+
+
+def compare(results, baseline, threshold):
+    """(name, baseline, current, relative change) for every metric worse by more than threshold."""
+    regressions = []
+    for name, value in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        higher_is_better = METRICS[name][1]
+        change = (old - value) / old if higher_is_better else (value - old) / old
+        if change > threshold:
+            regressions.append((name, old, value, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark rules, simulation and rendering")
+    parser.add_argument("--output", help="write results and machine metadata to this JSON file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed slowdown as a fraction of the baseline (default 0.15)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="smaller workloads for a fast check")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat, args.quick)
+    report = {"metadata": machine_metadata(), "results": results}
+    for name, value in results.items():
+        print(f"{name:<22} {value:>12.2f} {METRICS[name][0]}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["metadata"].get("platform") != report["metadata"]["platform"]:
+            print(f"warning: baseline was recorded on {baseline['metadata'].get('platform')}")
+        regressions = compare(results, baseline["results"], args.threshold)
+        for name, old, value, change in regressions:
+            print(f"REGRESSION {name}: {old:.2f} -> {value:.2f} ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
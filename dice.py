@@ -0,0 +1,76 @@
+"""Seedable, counter-based dice.
+
+Die number ``n`` of a ``DiceSource`` depends only on its seed, its stream
+and ``n``: the dice are read from a Philox counter stream, one 64-bit word
+per die, so any stretch of rolls can be generated directly without
+replaying the ones before it. Sources for different workers, tables or
+games are separate streams of one seed (``spawn``). Dice are produced in
+NumPy blocks, so a single roll in a hot loop is just a list pop.
+
+NumPy is imported on first use, so importing this module (and the engine)
+stays cheap. ``RandomDice`` is the plain-Python source used by live games
+that never need to be replayed.
+"""
+import random
+
+FACES = 6
+
+
+class RandomDice:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def roll(self):
+        return self.rng.randint(1, FACES)
+
+
+class DiceSource:
+    def __init__(self, seed=None, stream=(), block_size=4096):
+        import numpy as np
+
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        self.seed = seed
+        self.stream = stream if isinstance(stream, tuple) else (stream,)
+        self.block_size = block_size
+        self.key = np.random.SeedSequence([seed, *self.stream]).generate_state(2, np.uint64)
+        self.buffer = []
+        self.next_block = 0
+
+    def spawn(self, stream):
+        """An independent source for a sub-stream of this one."""
+        return DiceSource(self.seed, self.stream + (stream,), self.block_size)
+
+    @property
+    def position(self):
+        # Number of dice rolled so far
+        return self.next_block - len(self.buffer)
+
+    def seek(self, position):
+        self.buffer = []
+        self.next_block = position
+
+    def block(self, start, count):
+        """Dice ``start`` to ``start + count`` of this stream as an int8 array."""
+        import numpy as np
+
+        generator = np.random.Philox(key=self.key)
+        # Each counter step yields four words
+        generator.advance(start // 4)
+        words = generator.random_raw(count + start % 4)[start % 4:]
+        # Scale the top 32 bits onto 1..6; the bias is below one in 10**8
+        return ((words >> np.uint64(32)) * np.uint64(FACES) >> np.uint64(32)).astype(np.int8) + 1
+
+    def rolls(self, count):
+        """The next ``count`` dice as an array."""
+        start = self.position
+        self.seek(start + count)
+        return self.block(start, count)
+
+    def roll(self):
+        if not self.buffer:
+            values = self.block(self.next_block, self.block_size).tolist()
+            values.reverse()
+            self.buffer = values
+            self.next_block += self.block_size
+        return self.buffer.pop()
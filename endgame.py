@@ -0,0 +1,277 @@
+"""Race tablebase for endgames where no more captures can happen.
+
+Once every token is in its own home column (or home) the players can no
+longer touch each other, so each one just races its own dice. The table
+stores, for every layout of one player's tokens and six streak, the
+chance of getting all of them home within the current turn plus k more
+turns, playing to minimise the expected number of turns. It is solved
+backwards from the finished layout over the dice distribution, and win
+probabilities for a whole position come from combining the players' rows
+in turn order.
+
+The solved table is a flat float32 file that is read through ``mmap``:
+
+    header  "<2sBBHH"  magic b"LR", version, max streak, layouts, turns
+    rows    float32    [streak][layout][turn], cumulative
+
+    python endgame.py build race.tb
+    python endgame.py probe race.tb 51 53 57 57  56 57 57 57  52 52 55 57  54 57 57 57
+"""
+import argparse
+import itertools
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from engine import NUM_PLAYERS, TOKENS_PER_PLAYER, PATH_CELLS, HOME_INDEX, YARD
+from state import GameState
+
+MAGIC = b"LR"
+VERSION = 1
+HEADER = struct.Struct("<2sBBHH")
+
+# Turns tracked per layout; the chance of a race lasting longer is negligible
+MAX_TURNS = 160
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "race.tb")
+# Used instead when the source directory is read-only
+CACHE_PATH = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                          "ludo", "race.tb")
+
+
+def private_start(player):
+    # First index from which the player's path touches no other player's cells
+    others = {cell for other in PATH_CELLS if other != player for cell in PATH_CELLS[other]}
+    home = HOME_INDEX[player]
+    start = home
+    while start > 0 and PATH_CELLS[player][start - 1] not in others:
+        start -= 1
+    return start
+
+
+# Steps to home over which every player is out of reach of everyone else
+RACE_LENGTH = min(HOME_INDEX[player] - private_start(player) for player in PATH_CELLS)
+
+# Every layout of one player's tokens as sorted distances to home, nearest first
+LAYOUTS = list(itertools.combinations_with_replacement(range(RACE_LENGTH + 1), TOKENS_PER_PLAYER))
+LAYOUT_INDEX = {layout: i for i, layout in enumerate(LAYOUTS)}
+FINISHED = LAYOUT_INDEX[(0,) * TOKENS_PER_PLAYER]
+
+
+def layout_of(state, player):
+    """Layout index for ``player``'s tokens, or None if any can still be captured."""
+    home = HOME_INDEX[player]
+    base = player * TOKENS_PER_PLAYER
+    distances = []
+    for index in state.indices[base:base + TOKENS_PER_PLAYER]:
+        if index == YARD or home - index > RACE_LENGTH:
+            return None
+        distances.append(home - index)
+    return LAYOUT_INDEX[tuple(sorted(distances))]
+
+
+def successors(layout, dice):
+    # Distinct layouts reachable by moving one token ``dice`` steps
+    result = set()
+    for i, distance in enumerate(layout):
+        if 0 < dice <= distance:
+            moved = layout[:i] + (distance - dice,) + layout[i + 1:]
+            result.add(LAYOUT_INDEX[tuple(sorted(moved))])
+    return result
+
+
+def solve(max_turns=MAX_TURNS):
+    """Solve every layout; returns rows[streak][layout] as lists of cumulative chances."""
+    moves = [[successors(layout, dice) for dice in range(7)] for layout in LAYOUTS]
+    # Layouts in order of total distance, so every move leads to one already solved
+    order = sorted(range(len(LAYOUTS)), key=lambda i: sum(LAYOUTS[i]))
+
+    # Expected further turns after the current one, choosing moves to minimise it
+    expected = [[0.0] * len(LAYOUTS) for _ in range(3)]
+    policy = [[[None] * 7 for _ in LAYOUTS] for _ in range(3)]
+    for c in order:
+        if c == FINISHED:
+            continue
+        # Each streak's value is a + b * expected[0][c], b covering turns that leave c unchanged
+        linear = []
+        for streak in range(3):
+            a = b = 0.0
+            for dice in range(1, 7):
+                if (dice == 6 and streak == 2) or not moves[c][dice]:
+                    a, b = a + 1, b + 1
+                    continue
+                best, best_value = None, None
+                for nxt in moves[c][dice]:
+                    if nxt == FINISHED:
+                        value = 0.0
+                    elif dice == 6:
+                        value = expected[streak + 1][nxt]
+                    else:
+                        value = 1 + expected[0][nxt]
+                    if best_value is None or value < best_value:
+                        best, best_value = nxt, value
+                policy[streak][c][dice] = best
+                a += best_value
+            linear.append((a / 6, b / 6))
+        # The six branch reads the next streak, which is solved for smaller layouts only,
+        # so stay-in-place turns are the only link back to c itself
+        a0, b0 = linear[0]
+        stay = a0 / (1 - b0)
+        for streak, (a, b) in enumerate(linear):
+            expected[streak][c] = a + b * stay
+
+    # Cumulative chance of finishing within the current turn plus k more
+    rows = [[[1.0] * max_turns if c == FINISHED else [0.0] * max_turns for c in range(len(LAYOUTS))]
+            for _ in range(3)]
+    for k in range(max_turns):
+        for c in order:
+            if c == FINISHED:
+                continue
+            for streak in (2, 1, 0):
+                total = 0.0
+                for dice in range(1, 7):
+                    nxt = policy[streak][c][dice]
+                    if nxt is None:
+                        total += rows[0][c][k - 1] if k else 0.0
+                    elif nxt == FINISHED:
+                        total += 1.0
+                    elif dice == 6:
+                        total += rows[streak + 1][nxt][k]
+                    else:
+                        total += rows[0][nxt][k - 1] if k else 0.0
+                rows[streak][c][k] = total / 6
+    return rows
+
+
+def encode(max_turns=MAX_TURNS):
+    rows = solve(max_turns)
+    values = array('f', (value for streak in rows for row in streak for value in row))
+    if sys.byteorder != "little":
+        values.byteswap()
+    return HEADER.pack(MAGIC, VERSION, 2, len(LAYOUTS), max_turns) + values.tobytes()
+
+
+def build(path, max_turns=MAX_TURNS):
+    # Written next to the target and renamed over it, so readers never see a partial table
+    data = encode(max_turns)
+    fd, temp_path = tempfile.mkstemp(prefix=".race-", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class RaceTablebase:
+    """Memory-mapped race table with a probe for whole positions.
+
+    ``data`` takes an encoded table held in memory instead of a file.
+    """
+
+    def __init__(self, path=None, data=None):
+        if data is None:
+            with open(path, "rb") as f:
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.buffer = data
+        magic, version, max_streak, layouts, self.max_turns = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION or layouts != len(LAYOUTS) or max_streak != 2:
+            raise ValueError(f"{path or 'data'} is not a race tablebase for this board")
+        self.values = memoryview(self.buffer)[HEADER.size:].cast('f')
+
+    def close(self):
+        self.values.release()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def row(self, layout, streak=0):
+        start = (streak * len(LAYOUTS) + layout) * self.max_turns
+        return self.values[start:start + self.max_turns]
+
+    def probe(self, state):
+        """Win probability per seat for a race position with ``state`` about to roll, else None."""
+        layouts = []
+        for player in range(NUM_PLAYERS):
+            layout = layout_of(state, player)
+            if layout is None:
+                return None
+            if layout == FINISHED:
+                return tuple(float(p == player) for p in range(NUM_PLAYERS))
+            layouts.append(layout)
+
+        # Players in the order they finish a round, starting with the one to move
+        order = [(state.current_player + i) % NUM_PLAYERS for i in range(NUM_PLAYERS)]
+        rows = [self.row(layouts[player], state.consecutive_sixes if i == 0 else 0)
+                for i, player in enumerate(order)]
+
+        # A seat wins in round k if everyone before it has not finished by round k
+        # and everyone after it has not finished by round k - 1
+        wins = [0.0] * NUM_PLAYERS
+        for k in range(self.max_turns):
+            for i, player in enumerate(order):
+                finished = rows[i][k] - (rows[i][k - 1] if k else 0.0)
+                if finished <= 0.0:
+                    continue
+                for j, row in enumerate(rows):
+                    if j < i:
+                        finished *= 1.0 - row[k]
+                    elif j > i and k:
+                        finished *= 1.0 - row[k - 1]
+                wins[player] += finished
+        total = sum(wins)
+        return tuple(win / total for win in wins)
+
+
+_default = None
+
+
+def default_tablebase():
+    # Shared table at DEFAULT_PATH, or CACHE_PATH if the source directory is
+    # read-only, built on first use; solved in memory if neither can be written
+    global _default
+    if _default is None:
+        paths = (DEFAULT_PATH, CACHE_PATH)
+        for path in paths:
+            if os.path.exists(path):
+                _default = RaceTablebase(path)
+                return _default
+        for path in paths:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                build(path)
+            except OSError:
+                continue
+            _default = RaceTablebase(path)
+            return _default
+        _default = RaceTablebase(data=encode())
+    return _default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the endgame race tablebase")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="solve all race positions and write the table")
+    build_parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    build_parser.add_argument("--turns", type=int, default=MAX_TURNS)
+    probe = commands.add_parser("probe", help="win chances for a position, player 0 to move")
+    probe.add_argument("path")
+    probe.add_argument("indices", type=int, nargs=NUM_PLAYERS * TOKENS_PER_PLAYER)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build(args.path, args.turns)
+        print(f"wrote {len(LAYOUTS)} layouts x {args.turns} turns to {args.path}")
+        return
+
+    tablebase = RaceTablebase(args.path)
+    result = tablebase.probe(GameState(args.indices))
+    print("not a race position" if result is None else [round(p, 4) for p in result])
+
+
+if __name__ == "__main__":
+    main()
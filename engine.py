@@ -0,0 +1,307 @@
+"""Headless Ludo rules engine.
+
+Everything in here is plain Python so the rules can be imported and run in
+batch jobs or worker processes without pygame or a display.
+"""
+from dice import RandomDice
+from geometry import TOKENS_PER_PLAYER, YARD, DICE_SPAN, board_geometry
+
+# Game states
+WAITING_FOR_ROLL = "WAITING_FOR_ROLL"
+WAITING_FOR_PIECE = "WAITING_FOR_PIECE"
+PIECE_MOVING = "PIECE_MOVING"
+SHOWING_ROLL = "SHOWING_ROLL"
+GAME_OVER = "GAME_OVER"
+
+# The standard four-player board, which the module-level tables describe;
+# LudoEngine takes any other BoardGeometry
+STANDARD = board_geometry()
+NUM_PLAYERS = STANDARD.num_players
+
+PLAYER_NAMES = list(STANDARD.player_names)
+
+# Safe squares (the starting positions)
+SAFE_SQUARES = STANDARD.safe_squares
+
+# Complete path for each player, ending in its home column
+MAIN_PATHS = STANDARD.main_paths
+
+# Final paths to reach home
+HOME_PATHS = STANDARD.home_paths
+
+# Token value for a turn where nothing moves (no legal move or a forfeit)
+PASS = -1
+
+# Index -> cell for each player: the main path followed by the home path
+PATH_CELLS = STANDARD.path_cells
+
+# Cell -> index along each player's main path
+PATH_INDEX = STANDARD.path_index
+
+# Index at which a token has reached home
+HOME_INDEX = STANDARD.home_index
+
+# Move transition tables, laid out as described in geometry.build_transitions
+PATH_SPAN = STANDARD.path_span
+transition_slot = STANDARD.transition_slot
+MOVE_INDEX, MOVE_CELL = STANDARD.move_index, STANDARD.move_cell
+MOVE_LEGAL, MOVE_HOME, MOVE_SAFE = STANDARD.move_legal, STANDARD.move_home, STANDARD.move_safe
+LEGAL_ROWS = STANDARD.legal_rows
+
+# Index -> cell id for each player
+PATH_CELL_IDS = STANDARD.path_cell_ids
+
+# Zobrist keys
+ZOBRIST_TOKEN = STANDARD.zobrist_token
+ZOBRIST_PLAYER = STANDARD.zobrist_player
+ZOBRIST_SIXES = STANDARD.zobrist_sixes
+ZOBRIST_DICE = STANDARD.zobrist_dice
+zobrist_hash = STANDARD.zobrist_hash
+
+
+class Token:
+    __slots__ = ("start_pos", "pos", "occupancy", "player", "index", "is_home", "is_in_play",
+                 "steps_taken", "path_index", "selected", "path", "home_index")
+
+    def __init__(self, x, y, player, index, occupancy=None, geometry=STANDARD):
+        self.start_pos = (x, y)
+        # This player's cells by path index, and the index of home
+        self.path = geometry.path_cells[player]
+        self.home_index = geometry.home_index[player]
+        self.pos = None
+        self.occupancy = occupancy
+        self.player = player
+        self.index = index
+        self.is_home = False
+        self.is_in_play = False
+        self.steps_taken = 0
+        self.path_index = YARD
+        self.selected = False
+        self.move_to(x, y)
+
+    def reset(self):
+        self.move_to(*self.start_pos)
+        self.is_home = False
+        self.is_in_play = False
+        self.steps_taken = 0
+        self.path_index = YARD
+        self.selected = False
+
+    def move_to(self, x, y):
+        # Keep the shared cell -> tokens map in step with our position
+        if self.occupancy is not None:
+            if self.pos is not None:
+                occupants = self.occupancy[self.pos]
+                occupants.remove(self)
+                if not occupants:
+                    del self.occupancy[self.pos]
+            self.occupancy.setdefault((x, y), []).append(self)
+        self.pos = (x, y)
+
+    def place(self, path_index):
+        # Put the token at an index along its own player's path
+        self.path_index = path_index
+        self.steps_taken = path_index
+        self.move_to(*self.path[path_index])
+        self.is_in_play = True
+        self.is_home = path_index == self.home_index
+
+
+class LudoEngine:
+    """Turn-by-turn Ludo rules with no rendering or timing."""
+
+    def __init__(self, dice=None, geometry=None):
+        self.current_player = 0
+        self.state = WAITING_FOR_ROLL
+        self.consecutive_sixes = 0
+        self.game_message = ""
+        self.dice_value = 1
+        self.dice_rolled = False
+        self.winner = None
+        # Optional object with record(dice, token) called once per finished turn
+        self.recorder = None
+        # Where rolls come from; pass a seeded dice.DiceSource to replay a game
+        self.dice = RandomDice() if dice is None else dice
+
+        # Board shape; the standard four-player board unless another is given
+        self.geometry = STANDARD if geometry is None else geometry
+        self.num_players = self.geometry.num_players
+
+        # Cell -> tokens standing on it, kept up to date by the tokens themselves
+        self.occupancy = {}
+
+        # Initialize tokens for each player in their home positions
+        self.tokens = {
+            player: [Token(x, y, player, i, self.occupancy, self.geometry)
+                     for i, (x, y) in enumerate(self.geometry.yards[player])]
+            for player in range(self.num_players)
+        }
+
+        self.safe_squares = self.geometry.safe_squares
+        self.main_path = self.geometry.main_paths
+        self.home_paths = self.geometry.home_paths
+        self.path_cells = self.geometry.path_cells
+        self.path_index = self.geometry.path_index
+
+        # Tables read on every move, looked up once here
+        self.legal_rows = self.geometry.legal_rows
+        self.move_index = self.geometry.move_index
+        self.move_safe = self.geometry.move_safe
+        self.transition_slot = self.geometry.transition_slot
+        self.zobrist_token = self.geometry.zobrist_token
+        self.zobrist_player = self.geometry.zobrist_player
+        self.zobrist_sixes = self.geometry.zobrist_sixes
+
+        # Zobrist hash of tokens, player to move and six streak
+        self.zobrist = 0
+        self.rehash()
+
+    def rehash(self):
+        # Recompute the hash after tokens were placed directly
+        indices = [token.path_index for player in range(self.num_players)
+                   for token in self.tokens[player]]
+        self.zobrist = self.geometry.zobrist_hash(indices, self.current_player, self.consecutive_sixes)
+
+    def token_key(self, token):
+        return self.zobrist_token[token.player * TOKENS_PER_PLAYER + token.index][token.path_index + 1]
+
+    def is_safe_square(self, pos):
+        return pos in self.safe_squares
+
+    def can_move_token(self, token, steps):
+        # Yard tokens need a 6, home tokens never move, and home may not be overshot
+        return self.legal_rows[token.player][steps][token.path_index + 1] == 1
+
+    def movable_tokens(self, steps=None):
+        if steps is None:
+            steps = self.dice_value
+        return [token for token in self.tokens[self.current_player]
+                if self.can_move_token(token, steps)]
+
+    def get_token_at_position(self, pos):
+        occupants = self.occupancy.get(pos)
+        return occupants[0] if occupants else None
+
+    def move_token(self, token, steps):
+        if not self.can_move_token(token, steps):
+            return False
+
+        # A token leaving the yard goes to its starting position
+        slot = self.transition_slot(token.player, token.path_index, steps)
+        self.zobrist ^= self.token_key(token)
+        token.place(self.move_index[slot])
+        self.zobrist ^= self.token_key(token)
+
+        self.dice_rolled = False
+        if not self.move_safe[slot]:
+            self.check_capture(token)
+        return True
+
+    def check_capture(self, token):
+        # Check if there are any opponent tokens at the new position
+        if token.pos in self.safe_squares:  # No capture on safe squares
+            return False
+
+        # Only opponent tokens on the board can be captured, first by seat and index
+        victims = [other_token for other_token in self.occupancy.get(token.pos, ())
+                   if other_token.player != token.player and other_token.is_in_play]
+        if not victims:
+            return False
+
+        # Send opponent token back home; yard tokens add nothing to the hash
+        victim = min(victims, key=lambda t: (t.player, t.index))
+        self.zobrist ^= self.token_key(victim)
+        victim.reset()
+        return True
+
+    def get_player_name(self, player_index):
+        return self.geometry.player_names[player_index]
+
+    def check_winner(self):
+        for player_idx, tokens in self.tokens.items():
+            if all(token.is_home for token in tokens):
+                return player_idx
+        return None
+
+    def roll_dice(self, value=None):
+        if self.state == GAME_OVER:
+            return None
+
+        self.dice_value = self.dice.roll() if value is None else value
+        self.dice_rolled = True
+
+        if self.dice_value == 6:
+            self.set_sixes(self.consecutive_sixes + 1)
+            if self.consecutive_sixes == 3:
+                self.game_message = "Three sixes in a row! Turn forfeited!"
+                self.record_turn(PASS)
+                self.next_turn()
+                return self.dice_value
+            self.game_message = "Rolled a 6! You get another turn after moving."
+            # With nothing to move the roll is resolved like any other
+            self.state = WAITING_FOR_PIECE if self.movable_tokens() else SHOWING_ROLL
+        else:
+            self.set_sixes(0)
+            self.state = SHOWING_ROLL
+        return self.dice_value
+
+    def resolve_roll(self):
+        # Decide what happens once a rolled value has been shown
+        if self.state != SHOWING_ROLL:
+            return
+        if not self.movable_tokens():
+            self.game_message = "No valid moves available!"
+            self.record_turn(PASS)
+            self.next_turn()
+        else:
+            self.state = WAITING_FOR_PIECE
+
+    def play_token(self, token):
+        if self.state != WAITING_FOR_PIECE or token.player != self.current_player:
+            return False
+        if not self.can_move_token(token, self.dice_value):
+            return False
+
+        # Deselect all other tokens and select this one
+        for other_token in self.tokens[self.current_player]:
+            other_token.selected = False
+        token.selected = True
+
+        if not self.move_token(token, self.dice_value):
+            return False
+        self.record_turn(token.index)
+
+        # If moved successfully, check for game end
+        if all(t.is_home for t in self.tokens[self.current_player]):
+            self.winner = self.current_player
+            self.game_message = f"{self.get_player_name(self.current_player)} wins!"
+            self.state = GAME_OVER
+            return True
+
+        # If rolled 6, player gets another turn
+        if self.dice_value == 6:
+            self.state = WAITING_FOR_ROLL
+        else:
+            self.next_turn()
+        return True
+
+    def record_turn(self, token_index):
+        if self.recorder is not None:
+            self.recorder.record(self.dice_value, token_index)
+
+    def set_sixes(self, count):
+        self.zobrist ^= self.zobrist_sixes[self.consecutive_sixes] ^ self.zobrist_sixes[count]
+        self.consecutive_sixes = count
+
+    def next_turn(self):
+        self.zobrist ^= self.zobrist_player[self.current_player]
+        self.current_player = (self.current_player + 1) % self.num_players
+        self.zobrist ^= self.zobrist_player[self.current_player]
+        self.dice_rolled = False
+        self.set_sixes(0)
+        self.state = WAITING_FOR_ROLL
+
+        # Deselect all tokens
+        for tokens in self.tokens.values():
+            for token in tokens:
+                token.selected = False
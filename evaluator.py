@@ -0,0 +1,240 @@
+"""Batched position features and a linear win-chance evaluator.
+
+``extract_features`` turns a batch of positions into one float32 array with
+a feature row for every (position, seat). ``LinearEvaluator`` scores all
+rows with a single matrix multiply and takes a softmax across the four
+seats of each position, so the output is every seat's chance of winning.
+Weights are stored in a small .npz file; ``train`` fits them to the winners
+of games played out with ``BatchGames``. ``default_evaluator`` loads the
+shared weights the "linear" strategy plays with, training them on first use.
+
+    python evaluator.py train weights.npz --games 5000 --seed 1
+    python evaluator.py check weights.npz --games 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from batch import BatchGames, CELL_IDS, SAFE_CELLS, HOME_INDICES, MOVES_CELL, STRATEGIES
+from engine import NUM_PLAYERS, TOKENS_PER_PLAYER, YARD
+from endgame import private_start
+
+FEATURE_NAMES = (
+    "progress_1", "progress_2", "progress_3", "progress_4",
+    "in_yard", "at_home", "on_safe", "in_home_column", "in_danger", "threats",
+    "to_move", "next", "second", "third", "sixes",
+)
+NUM_FEATURES = len(FEATURE_NAMES)
+
+# Distances a token can cover in one roll
+REACH = np.arange(1, 7)
+
+SEATS = np.repeat(np.arange(NUM_PLAYERS), TOKENS_PER_PLAYER)
+PRIVATE_START = np.array([private_start(player) for player in range(NUM_PLAYERS)], dtype=np.int16)
+
+# Shared weights, next to the source or in the user's cache when that is read-only
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linear.npz")
+CACHE_PATH = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                          "ludo", "linear.npz")
+
+# Games the shared weights are trained on (a few seconds)
+DEFAULT_GAMES = 2000
+
+
+def state_arrays(states):
+    # Stack GameStates into (N, 16) positions, (N,) players and (N,) six streaks
+    positions = np.array([state.indices for state in states], dtype=np.int16).reshape(len(states), -1)
+    current_player = np.array([state.current_player for state in states], dtype=np.int16)
+    sixes = np.array([state.consecutive_sixes for state in states], dtype=np.int16)
+    return positions, current_player, sixes
+
+
+def extract_features(positions, current_player, sixes):
+    """(N, 4, NUM_FEATURES) features for every seat of N positions.
+
+    ``positions`` holds path indices, (N, 16) or (N, 4, 4); a token's path
+    index is the ``steps_taken`` the engine keeps for it.
+    """
+    positions = np.asarray(positions, dtype=np.int16).reshape(len(positions), -1)
+    current_player = np.asarray(current_player, dtype=np.int16)
+    n = len(positions)
+    home = HOME_INDICES.astype(np.int16)[SEATS][None, :]
+
+    in_yard = positions == YARD
+    at_home = positions == home
+    on_board = ~in_yard & ~at_home
+    cells = CELL_IDS[SEATS[None, :], np.maximum(positions, 0)]
+    exposed = on_board & ~SAFE_CELLS[cells]
+
+    # Cells each token can land on next roll; -1 where it cannot move
+    reach = MOVES_CELL[SEATS[None, :, None], REACH[None, None, :], positions[:, :, None] + 1]
+
+    # hits[n, i, j]: token j of another seat can land on exposed token i
+    hits = (reach[:, None, :, :] == cells[:, :, None, None]).any(axis=3)
+    hits &= exposed[:, :, None] & (SEATS[:, None] != SEATS[None, :])[None, :, :]
+    in_danger = hits.any(axis=2)
+    threats = hits.any(axis=1)
+
+    features = np.zeros((n, NUM_PLAYERS, NUM_FEATURES), dtype=np.float32)
+    progress = np.where(in_yard, 0, positions + 1) / (home + 1)
+
+    def by_seat(values):
+        return values.reshape(n, NUM_PLAYERS, TOKENS_PER_PLAYER)
+
+    features[:, :, 0:4] = -np.sort(-by_seat(progress), axis=2)
+    features[:, :, 4] = by_seat(in_yard).mean(axis=2)
+    features[:, :, 5] = by_seat(at_home).mean(axis=2)
+    features[:, :, 6] = by_seat(on_board & SAFE_CELLS[cells]).mean(axis=2)
+    features[:, :, 7] = by_seat(on_board & (positions >= PRIVATE_START[SEATS][None, :])).mean(axis=2)
+    features[:, :, 8] = by_seat(in_danger).mean(axis=2)
+    features[:, :, 9] = by_seat(threats).mean(axis=2)
+
+    # Seats until each one's next turn, and the six streak of the seat to move
+    order = (np.arange(NUM_PLAYERS)[None, :] - current_player[:, None]) % NUM_PLAYERS
+    features[:, :, 10:14] = np.eye(NUM_PLAYERS, dtype=np.float32)[order]
+    features[:, :, 14] = (order == 0) * np.asarray(sixes)[:, None] / 2
+    return features
+
+
+def softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class LinearEvaluator:
+    """Scores positions as a softmax over per-seat linear scores."""
+
+    def __init__(self, weights=None):
+        self.weights = (np.zeros(NUM_FEATURES, dtype=np.float32) if weights is None
+                        else np.asarray(weights, dtype=np.float32))
+        if self.weights.shape != (NUM_FEATURES,):
+            raise ValueError(f"Expected {NUM_FEATURES} weights, got {self.weights.shape}")
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if tuple(data["names"]) != FEATURE_NAMES:
+                raise ValueError(f"{path} was trained on different features")
+            return cls(data["weights"])
+
+    def save(self, path):
+        # Written next to the target and renamed over it, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(prefix=".linear-", suffix=".npz",
+                                         dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, weights=self.weights, names=np.array(FEATURE_NAMES))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def win_chances(self, features):
+        """(N, 4) win chance of every seat from (N, 4, NUM_FEATURES) features."""
+        n = len(features)
+        scores = features.reshape(n * NUM_PLAYERS, NUM_FEATURES) @ self.weights
+        return softmax(scores.reshape(n, NUM_PLAYERS))
+
+    def evaluate(self, states):
+        return self.win_chances(extract_features(*state_arrays(states)))
+
+
+def collect_positions(num_games, seed=0, strategy="random", sample_rate=0.05):
+    """Play games in a batch and return (features, winners) for sampled positions."""
+    games = BatchGames(num_games, seed, strategy)
+    rng = np.random.default_rng(seed)
+    features, game_ids = [], []
+    while games.playing():
+        rows = np.flatnonzero(games.live & (rng.random(len(games.ids)) < sample_rate))
+        if len(rows):
+            features.append(extract_features(games.positions[rows], games.current_player[rows],
+                                             games.consecutive_sixes[rows]))
+            game_ids.append(games.ids[rows])
+        games.step()
+    return np.concatenate(features), games.winner[np.concatenate(game_ids)]
+
+
+def log_loss(evaluator, features, winners):
+    chances = evaluator.win_chances(features)
+    return float(-np.log(chances[np.arange(len(winners)), winners] + 1e-12).mean())
+
+
+def train(features, winners, iterations=500, learning_rate=0.1, l2=1e-4):
+    """Fit weights by full-batch gradient descent (Adam) on the log loss of the winner."""
+    n = len(features)
+    flat = features.reshape(n * NUM_PLAYERS, NUM_FEATURES).astype(np.float64)
+    target = np.zeros((n, NUM_PLAYERS))
+    target[np.arange(n), winners] = 1
+
+    weights = np.zeros(NUM_FEATURES)
+    m = np.zeros(NUM_FEATURES)
+    v = np.zeros(NUM_FEATURES)
+    for step in range(1, iterations + 1):
+        chances = softmax((flat @ weights).reshape(n, NUM_PLAYERS))
+        gradient = flat.T @ (chances - target).reshape(-1) / n + l2 * weights
+        m = 0.9 * m + 0.1 * gradient
+        v = 0.999 * v + 0.001 * gradient ** 2
+        weights -= learning_rate * (m / (1 - 0.9 ** step)) / (np.sqrt(v / (1 - 0.999 ** step)) + 1e-8)
+    return LinearEvaluator(weights)
+
+
+_default = None
+
+
+def default_evaluator():
+    # Shared weights at DEFAULT_PATH, or CACHE_PATH if the source directory is
+    # read-only, trained on first use; kept in memory if neither can be written
+    global _default
+    if _default is None:
+        paths = (DEFAULT_PATH, CACHE_PATH)
+        for path in paths:
+            if os.path.exists(path):
+                _default = LinearEvaluator.load(path)
+                return _default
+        _default = train(*collect_positions(DEFAULT_GAMES))
+        for path in paths:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _default.save(path)
+            except OSError:
+                continue
+            break
+    return _default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and check the linear position evaluator")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("train", "fit weights to simulated games"),
+                            ("check", "report log loss and speed on fresh games")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("path")
+        command.add_argument("--games", type=int, default=5000)
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--strategy", default="random", choices=STRATEGIES)
+    commands.choices["train"].add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    features, winners = collect_positions(args.games, args.seed, args.strategy)
+    print(f"{len(winners)} positions from {args.games} games")
+    if args.command == "train":
+        evaluator = train(features, winners, args.iterations)
+        evaluator.save(args.path)
+        for name, weight in zip(FEATURE_NAMES, evaluator.weights):
+            print(f"{name:<15} {weight:+.3f}")
+    else:
+        evaluator = LinearEvaluator.load(args.path)
+        start = time.perf_counter()
+        evaluator.win_chances(features)
+        elapsed = time.perf_counter() - start
+        print(f"{len(winners) / elapsed:.0f} positions/s scored")
+    print(f"log loss {log_loss(evaluator, features, winners):.4f} "
+          f"(uniform {np.log(NUM_PLAYERS):.4f})")
+
+
+if __name__ == "__main__":
+    main()
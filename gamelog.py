@@ -0,0 +1,220 @@
+"""Compact binary game logs and archives.
+
+A game record is a fixed header, a table of state snapshots and then one
+byte per turn (dice << 3 | token + 1, so 0 in the low bits is a pass):
+
+    header    "<2sBQIHb"  magic b"LG", version, seed, turn count,
+                          snapshot count, winner (-1 if unfinished)
+    snapshots "<I19s"     turns played, GameState.key()   every SNAPSHOT_INTERVAL turns
+    turns     one byte each
+
+Records are appended back to back, so an archive can be walked header to
+header without decoding any turns. ``GameArchive`` reads through ``mmap``
+and ``GameRecord.state_at`` jumps to the nearest snapshot and replays from
+there.
+
+    python gamelog.py record games.ludo --games 10000 --seed 1
+    python gamelog.py show games.ludo --game 42 --turn 150
+"""
+import argparse
+import bisect
+import mmap
+import random
+import struct
+
+from dice import DiceSource
+from engine import TOKENS_PER_PLAYER, PLAYER_NAMES
+from simulate import SimulationStats, make_player, play_game
+from state import GameState, NUM_SLOTS
+
+MAGIC = b"LG"
+VERSION = 1
+HEADER = struct.Struct("<2sBQIHb")
+SNAPSHOT = struct.Struct("<I19s")
+SNAPSHOT_INTERVAL = 64
+
+
+def encode_turn(dice, token):
+    return dice << 3 | (token + 1)
+
+
+def decode_turn(byte):
+    return byte >> 3, (byte & 7) - 1
+
+
+def state_from_key(key):
+    return GameState(key[:NUM_SLOTS], *key[NUM_SLOTS:])
+
+
+class GameRecorder:
+    """Collects one game's turns; pass it as a LudoEngine recorder or call record()."""
+
+    def __init__(self, seed=0, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.seed = seed
+        self.snapshot_interval = snapshot_interval
+        self.state = GameState()
+        self.turns = bytearray()
+        self.snapshots = []
+
+    def record(self, dice, token):
+        self.turns.append(encode_turn(dice, token))
+        self.state.apply_move(token, dice)
+        if len(self.turns) % self.snapshot_interval == 0:
+            self.snapshots.append((len(self.turns), self.state.key()))
+
+    def to_bytes(self):
+        winner = self.state.winner()
+        parts = [HEADER.pack(MAGIC, VERSION, self.seed, len(self.turns), len(self.snapshots),
+                             -1 if winner is None else winner)]
+        parts.extend(SNAPSHOT.pack(turn, key) for turn, key in self.snapshots)
+        parts.append(bytes(self.turns))
+        return b"".join(parts)
+
+
+class ArchiveWriter:
+    """Appends finished game records to an archive file."""
+
+    def __init__(self, path):
+        self.file = open(path, "ab")
+
+    def append(self, recorder):
+        self.file.write(recorder.to_bytes())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecord:
+    """A lazily decoded view of one game inside an archive buffer."""
+
+    def __init__(self, buffer, offset):
+        magic, version, self.seed, self.turn_count, snapshot_count, winner = \
+            HEADER.unpack_from(buffer, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a game record at offset {offset}")
+        self.buffer = buffer
+        self.offset = offset
+        self.winner = None if winner < 0 else winner
+        self.snapshots_offset = offset + HEADER.size
+        self.snapshot_count = snapshot_count
+        self.turns_offset = self.snapshots_offset + snapshot_count * SNAPSHOT.size
+        self.end = self.turns_offset + self.turn_count
+
+    def turns(self, start=0):
+        for byte in self.buffer[self.turns_offset + start:self.end]:
+            yield decode_turn(byte)
+
+    def snapshot_turns(self):
+        return [SNAPSHOT.unpack_from(self.buffer, self.snapshots_offset + i * SNAPSHOT.size)[0]
+                for i in range(self.snapshot_count)]
+
+    def state_at(self, turn):
+        """GameState after ``turn`` turns have been played."""
+        if not 0 <= turn <= self.turn_count:
+            raise IndexError(f"Turn {turn} outside 0..{self.turn_count}")
+
+        # Start from the last snapshot at or before the turn, then replay
+        i = bisect.bisect_right(self.snapshot_turns(), turn) - 1
+        if i >= 0:
+            start, key = SNAPSHOT.unpack_from(self.buffer, self.snapshots_offset + i * SNAPSHOT.size)
+            state = state_from_key(key)
+        else:
+            start, state = 0, GameState()
+
+        for byte in self.buffer[self.turns_offset + start:self.turns_offset + turn]:
+            dice, token = decode_turn(byte)
+            state.apply_move(token, dice)
+        return state
+
+
+class GameArchive:
+    """Memory-mapped archive of game records."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.size = self.file.seek(0, 2)
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self._offsets = None
+
+    def __iter__(self):
+        offset = 0
+        while offset < self.size:
+            record = GameRecord(self.buffer, offset)
+            yield record
+            offset = record.end
+
+    def offsets(self):
+        # Start of every record, found by hopping from header to header
+        if self._offsets is None:
+            self._offsets = [record.offset for record in self]
+        return self._offsets
+
+    def __len__(self):
+        return len(self.offsets())
+
+    def __getitem__(self, index):
+        return GameRecord(self.buffer, self.offsets()[index])
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record_games(path, num_games, seed=0, strategy="random"):
+    # Simulate games with one RNG per game and append them to an archive
+    strategies = [make_player(strategy) for _ in PLAYER_NAMES]
+    stats = SimulationStats()
+    with ArchiveWriter(path) as writer:
+        for game in range(num_games):
+            game_seed = seed * 1_000_000_007 + game
+            recorder = GameRecorder(game_seed)
+            play_game(random.Random(game_seed), strategies, stats, recorder, DiceSource(game_seed))
+            writer.append(recorder)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and inspect binary Ludo game logs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="append simulated games to an archive")
+    record.add_argument("path")
+    record.add_argument("--games", type=int, default=1000)
+    record.add_argument("--seed", type=int, default=0)
+    show = commands.add_parser("show", help="print a game position")
+    show.add_argument("path")
+    show.add_argument("--game", type=int, default=0)
+    show.add_argument("--turn", type=int, default=None, help="default: the final position")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        stats = record_games(args.path, args.games, args.seed)
+        print(f"recorded {stats.games} games, {stats.turns} turns")
+        return
+
+    with GameArchive(args.path) as archive:
+        game = archive[args.game]
+        turn = game.turn_count if args.turn is None else args.turn
+        state = game.state_at(turn)
+        print(f"game {args.game} (seed {game.seed}) turn {turn}/{game.turn_count}, "
+              f"winner {PLAYER_NAMES[game.winner] if game.winner is not None else '-'}")
+        for player, name in enumerate(PLAYER_NAMES):
+            base = player * TOKENS_PER_PLAYER
+            print(f"{name:<7} {list(state.indices[base:base + TOKENS_PER_PLAYER])}")
+        print(f"to move: {PLAYER_NAMES[state.current_player]}, sixes {state.consecutive_sixes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""Board geometry generated from the number of players and the arm length.
+
+Each player owns one arm of the board, three cells wide and ``arm_length``
+cells long. The shared track runs out along one side of every arm, round
+its tip and back in along the other side. The middle lane of a player's own
+arm is that player's home column, ending in a cell next to the centre. Arms
+are spaced evenly around the centre. Four arms of six give the usual 15x15
+cross; other player counts get rotated cells with fractional coordinates.
+
+``board_geometry`` derives everything the rules and the renderer need once
+per (players, arm length) and caches it: paths, safe cells, yards, cell ids,
+cell outlines, the move transition tables and the Zobrist keys.
+
+    python geometry.py --players 6 --arm-length 6 --paths
+"""
+import argparse
+import math
+import random
+from array import array
+from functools import lru_cache
+
+MIN_PLAYERS = 2
+MAX_PLAYERS = 6
+MIN_ARM_LENGTH = 3
+TOKENS_PER_PLAYER = 4
+
+PLAYER_NAMES = ("Red", "Green", "Blue", "Yellow", "Purple", "Orange")
+
+# Path index of a token still waiting in its yard
+YARD = -1
+
+DICE_SPAN = 7  # dice value 0 is never legal
+
+# Lanes across an arm: tokens come in along INWARD, leave along OUTWARD, and
+# the owner's home column is MIDDLE
+INWARD, MIDDLE, OUTWARD = -1, 0, 1
+
+
+def _snap(value):
+    # Whole coordinates stay ints so the standard board has plain grid cells
+    value = round(value, 6)
+    return int(value) if value == int(value) else value
+
+
+class BoardGeometry:
+    """Paths, cells and precomputed move tables for one board shape.
+
+    Cell positions are (x, y) in cell units with the board's top-left corner
+    at the origin; a cell covers ``pos`` to ``pos + 1`` on the standard board
+    and ``corners[pos]`` in general.
+    """
+
+    def __init__(self, num_players=4, arm_length=6):
+        if not MIN_PLAYERS <= num_players <= MAX_PLAYERS:
+            raise ValueError(f"Boards have {MIN_PLAYERS} to {MAX_PLAYERS} players, not {num_players}")
+        if arm_length < MIN_ARM_LENGTH:
+            raise ValueError(f"Arms must be at least {MIN_ARM_LENGTH} cells long, not {arm_length}")
+        self.num_players = num_players
+        self.arm_length = arm_length
+        self.player_names = PLAYER_NAMES[:num_players]
+        self.build_layout()
+        self.build_paths()
+        self.build_transitions()
+        self.build_zobrist()
+
+    def __reduce__(self):
+        # Unpickle through the cache so every process shares one instance per shape
+        return board_geometry, (self.num_players, self.arm_length)
+
+    @property
+    def key(self):
+        return self.num_players, self.arm_length
+
+    def build_layout(self):
+        n, length = self.num_players, self.arm_length
+        self.step = 2 * math.pi / n
+        # Arms start far enough out that neighbouring arms do not overlap
+        self.inner_radius = max(2.0, 0.5 + 1.5 / math.tan(self.step / 2))
+
+        # Axes of each arm, pointing outwards and across its lanes; player 0's arm points left
+        self.axes = []
+        for player in range(n):
+            angle = math.pi + player * self.step
+            out = (math.cos(angle), math.sin(angle))
+            self.axes.append((out, (out[1], -out[0])))
+
+        # Yards sit between an arm and the next one, as a square of side arm_length
+        # with a diagonal along the bisector, clear of both arms
+        half = length / 2
+        yards = []
+        for player in range(n):
+            angle = math.pi + (player + 0.5) * self.step
+            bearing = (math.cos(angle), math.sin(angle))
+            turn = angle - 5 * math.pi / 4
+            square = [self.rotate((sx * half, sy * half), turn) for sx, sy in ((-1, -1), (1, -1), (1, 1), (-1, 1))]
+            # Largest reach of the square towards the arm's axis
+            normal = self.axes[player][1]
+            reach = max(x * normal[0] + y * normal[1] for x, y in square)
+            radius = (1.5 + reach) / math.sin(self.step / 2)
+            center = (bearing[0] * radius, bearing[1] * radius)
+            spots = [self.rotate((sx * half / 2, sy * half / 2), turn)
+                     for sy in (-1, 1) for sx in (-1, 1)]
+            yards.append((center, square, spots))
+
+        # Shift everything so the top-left corner of the board is the origin
+        extent = [corner for arm in range(n) for lane in (INWARD, OUTWARD)
+                  for corner in self.raw_corners(arm, lane, length - 1)]
+        extent += [(cx + x, cy + y) for (cx, cy), square, _ in yards for x, y in square]
+        self.origin = (-min(x for x, _ in extent), -min(y for _, y in extent))
+        self.width = _snap(max(x for x, _ in extent) + self.origin[0])
+        self.height = _snap(max(y for _, y in extent) + self.origin[1])
+        self.center = self.point((0.0, 0.0))
+
+        self.yard_centers = {}
+        self.yard_corners = {}
+        self.yards = {}
+        for player, ((cx, cy), square, spots) in enumerate(yards):
+            self.yard_centers[player] = self.point((cx, cy))
+            self.yard_corners[player] = tuple(self.point((cx + x, cy + y)) for x, y in square)
+            # Token spots read left to right, top to bottom
+            cells = [self.cell_at((cx + x, cy + y)) for x, y in spots]
+            self.yards[player] = sorted(cells, key=lambda pos: (pos[1], pos[0]))
+
+        # Triangles from the centre to the inner edge of each arm
+        self.center_triangles = {}
+        for player, (out, across) in enumerate(self.axes):
+            r = self.inner_radius - 0.5
+            edge = [(out[0] * r + across[0] * side, out[1] * r + across[1] * side) for side in (-1.5, 1.5)]
+            self.center_triangles[player] = (self.center,) + tuple(self.point(p) for p in edge)
+
+    def rotate(self, point, angle):
+        x, y = point
+        c, s = math.cos(angle), math.sin(angle)
+        return (x * c - y * s, x * s + y * c)
+
+    def raw_center(self, arm, lane, distance):
+        # Centre of a cell relative to the board centre; distance 0 is the arm's inner end
+        (ox, oy), (ax, ay) = self.axes[arm]
+        r = self.inner_radius + distance
+        return (ox * r + ax * lane, oy * r + ay * lane)
+
+    def raw_corners(self, arm, lane, distance):
+        (ox, oy), (ax, ay) = self.axes[arm]
+        x, y = self.raw_center(arm, lane, distance)
+        return [(x + (ox * u + ax * v) / 2, y + (oy * u + ay * v) / 2)
+                for u, v in ((-1, -1), (1, -1), (1, 1), (-1, 1))]
+
+    def point(self, raw):
+        return (_snap(raw[0] + self.origin[0]), _snap(raw[1] + self.origin[1]))
+
+    def cell_at(self, raw):
+        # Cell position of a cell centred on ``raw``
+        return (_snap(raw[0] + self.origin[0] - 0.5), _snap(raw[1] + self.origin[1] - 0.5))
+
+    def build_paths(self):
+        n, length = self.num_players, self.arm_length
+        self.corners = {}
+
+        def cell(arm, lane, distance):
+            pos = self.cell_at(self.raw_center(arm, lane, distance))
+            if pos not in self.corners:
+                self.corners[pos] = tuple(self.point(p) for p in self.raw_corners(arm, lane, distance))
+            return pos
+
+        def lap(arm):
+            # Out along one side of the arm, round the tip and back in
+            return ([cell(arm, OUTWARD, d) for d in range(length)] + [cell(arm, MIDDLE, length - 1)]
+                    + [cell(arm, INWARD, d) for d in reversed(range(length))])
+
+        self.main_paths = {}
+        self.home_paths = {}
+        self.home_columns = {}
+        for player in range(n):
+            # Start one cell in from the tip, go round every other arm, then up our own
+            path = [cell(player, INWARD, d) for d in reversed(range(length - 1))]
+            for arm in range(player + 1, player + n):
+                path += lap(arm % n)
+            path += lap(player)[:length + 1]
+            column = [cell(player, MIDDLE, d) for d in reversed(range(length - 1))]
+            column.append(cell(player, MIDDLE, -1))
+            self.main_paths[player] = path + column
+            self.home_columns[player] = column
+            # A token that has finished rests on its starting square
+            self.home_paths[player] = [path[0]]
+
+        self.start_cells = {player: path[0] for player, path in self.main_paths.items()}
+        self.safe_squares = frozenset(self.start_cells.values())
+
+        # Index -> cell for each player: the main path followed by the home path
+        self.path_cells = {player: tuple(self.main_paths[player] + self.home_paths[player])
+                           for player in range(n)}
+        # Cell -> index along each player's main path
+        self.path_index = {player: {pos: i for i, pos in enumerate(self.main_paths[player])}
+                           for player in range(n)}
+        # Index at which a token has reached home
+        self.home_index = {player: len(cells) - 1 for player, cells in self.path_cells.items()}
+
+        # Every board cell numbered in the order the paths first reach it
+        self.cell_ids = {}
+        for player in range(n):
+            for pos in self.path_cells[player]:
+                self.cell_ids.setdefault(pos, len(self.cell_ids))
+        self.path_cell_ids = {player: tuple(self.cell_ids[pos] for pos in cells)
+                              for player, cells in self.path_cells.items()}
+
+    def transition_slot(self, player, path_index, dice):
+        return (player * DICE_SPAN + dice) * self.path_span + path_index + 1
+
+    def build_transitions(self):
+        # Outcome of every (player, dice, path index) move, precomputed as flat arrays
+        # that Python indexes directly and NumPy can wrap with np.frombuffer as
+        # (player, dice, path index + 1). Entry transition_slot(player, path_index, dice)
+        # holds the destination index and cell id, and flags for legal, reaching home
+        # and landing on a safe square. Path indices vary fastest, so one offset per
+        # player and dice serves all of that player's tokens.
+        self.path_span = max(self.home_index.values()) + 2  # YARD up to HOME
+        size = self.num_players * DICE_SPAN * self.path_span
+        index = array('b' if self.path_span <= 128 else 'h', [YARD] * size)
+        cell = array('h', [-1] * size)
+        legal, home, safe = bytearray(size), bytearray(size), bytearray(size)
+        for player in range(self.num_players):
+            home_index = self.home_index[player]
+            for path_index in range(YARD, home_index + 1):
+                for dice in range(1, DICE_SPAN):
+                    # Leaving the yard takes a six; otherwise home may not be overshot
+                    if path_index == YARD:
+                        new_index = 0 if dice == 6 else None
+                    elif path_index + dice <= home_index:
+                        new_index = path_index + dice
+                    else:
+                        new_index = None
+                    if new_index is None:
+                        continue
+                    slot = self.transition_slot(player, path_index, dice)
+                    pos = self.path_cells[player][new_index]
+                    index[slot] = new_index
+                    cell[slot] = self.cell_ids[pos]
+                    legal[slot] = 1
+                    home[slot] = new_index == home_index
+                    safe[slot] = pos in self.safe_squares
+        self.move_index, self.move_cell = index, cell
+        self.move_legal, self.move_home, self.move_safe = bytes(legal), bytes(home), bytes(safe)
+
+        # move_legal split into one row per (player, dice), indexed by path index + 1
+        self.legal_rows = [[self.move_legal[self.transition_slot(player, YARD, dice):
+                                            self.transition_slot(player, YARD, dice + 1)]
+                            for dice in range(DICE_SPAN)] for player in range(self.num_players)]
+
+    def build_zobrist(self):
+        # Zobrist keys, fixed so hashes agree across processes and runs. A token in
+        # its yard contributes nothing, so the opening position hashes to the key of
+        # the first player to move.
+        rng = random.Random(0x1AD0)
+        self.zobrist_token = tuple(
+            (0,) + tuple(rng.getrandbits(64) for _ in range(self.home_index[player] + 1))
+            for player in range(self.num_players) for _ in range(TOKENS_PER_PLAYER)
+        )  # [player * TOKENS_PER_PLAYER + token][path_index + 1]
+        self.zobrist_player = tuple(rng.getrandbits(64) for _ in range(self.num_players))
+        self.zobrist_sixes = tuple(rng.getrandbits(64) for _ in range(4))
+        self.zobrist_dice = (0,) + tuple(rng.getrandbits(64) for _ in range(6))
+
+    def zobrist_hash(self, indices, current_player, consecutive_sixes):
+        # Full hash of a position; callers keep it up to date incrementally
+        h = self.zobrist_player[current_player] ^ self.zobrist_sixes[consecutive_sixes]
+        for slot, path_index in enumerate(indices):
+            h ^= self.zobrist_token[slot][path_index + 1]
+        return h
+
+
+@lru_cache(maxsize=None)
+def _cached_geometry(num_players, arm_length):
+    return BoardGeometry(num_players, arm_length)
+
+
+def board_geometry(num_players=4, arm_length=6):
+    """The shared, cached geometry for a board shape."""
+    return _cached_geometry(num_players, arm_length)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Describe a generated board")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--arm-length", type=int, default=6)
+    parser.add_argument("--paths", action="store_true", help="print every player's path")
+    args = parser.parse_args(argv)
+
+    geometry = board_geometry(args.players, args.arm_length)
+    print(f"{geometry.num_players} players, arms of {geometry.arm_length}: "
+          f"{geometry.width} x {geometry.height} cells, {len(geometry.cell_ids)} path cells")
+    for player in range(geometry.num_players):
+        print(f"{geometry.player_names[player]:<7} start {geometry.start_cells[player]}, "
+              f"home at index {geometry.home_index[player]}, yard {geometry.yards[player]}")
+        if args.paths:
+            print("        " + " ".join(f"({x}, {y})" for x, y in geometry.path_cells[player]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
+import argparse
 import pygame
 import random
 import sys
 import time
 import math
+import heapq
+import itertools
+from collections import OrderedDict
 
-# Initialize Pygame
-pygame.init()
+from engine import LudoEngine, STANDARD, WAITING_FOR_ROLL, WAITING_FOR_PIECE, SHOWING_ROLL, GAME_OVER
+from geometry import board_geometry, MIN_PLAYERS, MAX_PLAYERS
+from state import GameState
 
 # Constants
 WINDOW_SIZE = 800
@@ -14,6 +19,8 @@ CELL_SIZE = BOARD_SIZE // 15
 DICE_SIZE = 60
 PLAYER_SIZE = 20
 FPS = 60
+ROLL_REVEAL_DELAY = 2  # Seconds a roll is shown before it is resolved
+BOT_ROLL_DELAY = 0.5  # Seconds a bot waits before rolling
 BOARD_OFFSET_X = (WINDOW_SIZE - BOARD_SIZE ) // 2
 BOARD_OFFSET_Y = (WINDOW_SIZE - BOARD_SIZE) // 2
 
@@ -29,86 +36,50 @@ LIGHT_GRAY = (200, 200, 200)
 WOOD_COLOR = (222, 184, 135)  # Wooden background color
 WOOD_DARK = (160, 120, 80)    # Darker wood color for lines
 
-# Path colors (lighter versions for better visibility on white)
-PATH_COLORS = {
-    0: (255, 200, 200),  # Light red
-    1: (200, 255, 200),  # Light green
-    2: (200, 200, 255),  # Light blue
-    3: (255, 255, 200)   # Light yellow
-}
+PURPLE = (140, 60, 180)
+ORANGE = (240, 130, 20)
 
 # Board colors
 HOME_COLORS = {
     0: {"border": RED, "fill": (255, 200, 200)},      # Red
     1: {"border": GREEN, "fill": (200, 255, 200)},    # Green
     2: {"border": BLUE, "fill": (200, 200, 255)},     # Blue
-    3: {"border": YELLOW, "fill": (255, 255, 200)}    # Yellow
+    3: {"border": YELLOW, "fill": (255, 255, 200)},   # Yellow
+    4: {"border": PURPLE, "fill": (230, 200, 245)},   # Purple
+    5: {"border": ORANGE, "fill": (255, 225, 190)}    # Orange
 }
 
-# Dice positions for each player
-DICE_POSITIONS = {
-    0: (0 + 20, 0 + 100),  # Red (right)
-    1: (WINDOW_SIZE - DICE_SIZE - 20, 0 + 100),   # Green (top)
-    2: (WINDOW_SIZE - DICE_SIZE - 20, WINDOW_SIZE - DICE_SIZE - 150),   # Blue (bottom left)
-    3: (0 +20, WINDOW_SIZE - DICE_SIZE - 150),
-}
+# Screen area holding the turn indicator and game message
+HUD_RECT = (0, 0, WINDOW_SIZE, BOARD_OFFSET_Y - 10)
 
-# Game Statestar
-WAITING_FOR_ROLL = "WAITING_FOR_ROLL"
-WAITING_FOR_PIECE = "WAITING_FOR_PIECE"
-PIECE_MOVING = "PIECE_MOVING"
-
-# Set up display
-screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
-pygame.display.set_caption("Ludo Game")
-
-# Board sections (in cells)
-BOARD_CELLS = 15  # 15x15 grid
-HOME_SIZE = 6     # 6x6 cells for each home
-PATH_WIDTH = 3    # 3 cells wide for the main path
-
-# Define the board layout
-BOARD_LAYOUT = {
-    'homes': {
-        'red': (0, 0),                          # Top-left
-        'green': (BOARD_CELLS - HOME_SIZE, 0),  # Top-right
-        'blue': (BOARD_CELLS - HOME_SIZE, BOARD_CELLS - HOME_SIZE),  # Bottom-right
-        'yellow': (0, BOARD_CELLS - HOME_SIZE)  # Bottom-left
-    },
-    'start_positions': {
-        'red': (1, 6),      # Red starting position
-        'green': (8, 1),    # Green starting position
-        'blue': (13, 8),    # Blue starting position
-        'yellow': (6, 13)   # Yellow starting position
-    },
-    'colors': {
-        'red': {'main': RED, 'light': (255, 200, 200), 'path': (255, 220, 220)},
-        'green': {'main': GREEN, 'light': (200, 255, 200), 'path': (220, 255, 220)},
-        'blue': {'main': BLUE, 'light': (200, 200, 255), 'path': (220, 220, 255)},
-        'yellow': {'main': YELLOW, 'light': (255, 255, 200), 'path': (255, 255, 220)}
-    }
-}
+# Win chance bars at the right of the HUD: one row per player
+CHANCE_BAR_X = WINDOW_SIZE - 200
+CHANCE_BAR_WIDTH = 130
+CHANCE_ROW_HEIGHT = 20
+
+# Posted by background threads so the main loop wakes to pick up their results
+WAKE_EVENT = pygame.USEREVENT + 1
+
+
+def dice_positions(geometry):
+    # Each player's dice sits in the side margin nearest its yard, spread top to bottom
+    sides = {False: [], True: []}
+    center_x, center_y = geometry.center
+    for player, (x, y) in geometry.yard_centers.items():
+        dx, dy = x - center_x, y - center_y
+        right = dx > 1e-6 or (abs(dx) <= 1e-6 and dy < 0)
+        sides[right].append((dy, player))
+
+    top, bottom = BOARD_OFFSET_Y, WINDOW_SIZE - DICE_SIZE - 150
+    positions = {}
+    for right, players in sides.items():
+        x = WINDOW_SIZE - DICE_SIZE - 20 if right else 20
+        players.sort()
+        for i, (_, player) in enumerate(players):
+            y = top if len(players) == 1 else top + (bottom - top) * i // (len(players) - 1)
+            positions[player] = (x, y)
+    return positions
 
-class Token:
-    def __init__(self, x, y, color, index):
-        self.start_pos = (x, y)
-        self.pos = (x, y)
-        self.color = color
-        self.index = index
-        self.is_home = False
-        self.is_in_play = False
-        self.steps_taken = 0
-        self.selected = False
-
-    def reset(self):
-        self.pos = self.start_pos
-        self.is_home = False
-        self.is_in_play = False
-        self.steps_taken = 0
-        self.selected = False
-
-    def move_to(self, x, y):
-        self.pos = (x, y)
 
 class DiceAnimation:
     def __init__(self):
@@ -118,6 +89,8 @@ class DiceAnimation:
         self.frames = []
         self.current_frame = 0
         self.final_value = 1
+        # Faces flashed while rolling come from their own stream, never the game's dice
+        self.rng = random.Random()
         
         # Create dice face patterns
         self.dice_patterns = {
@@ -140,18 +113,24 @@ class DiceAnimation:
         self.final_value = final_value
         self.current_frame = 0
 
-    def draw(self, screen, x, y):
+    def draw(self, screen, x, y, sprites=None):
         if self.is_rolling:
             current_time = time.time() - self.start_time
             if current_time > self.duration:
                 self.is_rolling = False
                 value = self.final_value
             else:
-                value = random.randint(1, 6)
+                value = self.rng.randint(1, 6)
                 self.current_frame = (self.current_frame + 1) % 6
         else:
             value = self.final_value
 
+        if sprites is not None:
+            sprites.blit_dice(screen, x, y, value)
+        else:
+            self.draw_face(screen, x, y, value)
+
+    def draw_face(self, screen, x, y, value):
         # Draw dice background
         pygame.draw.rect(screen, WHITE, (x, y, DICE_SIZE, DICE_SIZE))
         pygame.draw.rect(screen, BLACK, (x, y, DICE_SIZE, DICE_SIZE), 2)
@@ -162,340 +141,251 @@ class DiceAnimation:
                              (x + dot_pos[0], y + dot_pos[1]),
                              DICE_SIZE//10)
 
-class LudoGame:
+class TextCache:
+    """Fonts by size and rendered text by (text, size, colour), least recently used evicted."""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.rendered = OrderedDict()
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render(self, text, size, color):
+        key = (text, size, color)
+        surface = self.rendered.get(key)
+        if surface is not None:
+            self.rendered.move_to_end(key)
+            return surface
+
+        surface = self.font(size).render(text, True, color)
+        self.rendered[key] = surface
+        if len(self.rendered) > self.max_entries:
+            self.rendered.popitem(last=False)
+        return surface
+
+
+class Scheduler:
+    """Callbacks due at a given time, so the main loop knows how long it may sleep."""
+
     def __init__(self):
-        self.current_player = 0
-        self.state = WAITING_FOR_ROLL
-        self.consecutive_sixes = 0
-        self.game_message = ""
+        self.timers = []
+        self.counter = itertools.count()
+
+    def call_at(self, when, callback):
+        timer = [when, next(self.counter), callback]
+        heapq.heappush(self.timers, timer)
+        return timer
+
+    def call_later(self, delay, callback):
+        return self.call_at(time.time() + delay, callback)
+
+    def cancel(self, timer):
+        timer[2] = None
+
+    def next_deadline(self):
+        while self.timers and self.timers[0][2] is None:
+            heapq.heappop(self.timers)
+        return self.timers[0][0] if self.timers else None
+
+    def run_due(self, now):
+        while self.timers and self.timers[0][0] <= now:
+            _, _, callback = heapq.heappop(self.timers)
+            if callback is not None:
+                callback()
+
+
+def draw_token(screen, screen_x, screen_y, player, is_home, is_in_play, selected, cell_size=CELL_SIZE):
+    if is_home:
+        # Draw home token with different appearance (grayed out)
+        pygame.draw.circle(screen, LIGHT_GRAY, (screen_x, screen_y), cell_size // 3)
+        pygame.draw.circle(screen, GRAY, (screen_x, screen_y), cell_size // 3, 2)
+        pygame.draw.circle(screen, GRAY, (screen_x, screen_y), cell_size // 6)
+    else:
+        border_color = HOME_COLORS[player]["border"]
+        if not is_in_play:
+            # Draw token not in play with a cross pattern
+            pygame.draw.circle(screen, WHITE, (screen_x, screen_y), cell_size // 3)
+            pygame.draw.circle(screen, border_color, (screen_x, screen_y), cell_size // 3, 2)
+            # Draw an X pattern inside
+            size = cell_size // 4
+            pygame.draw.line(screen, border_color, 
+                           (screen_x - size, screen_y - size),
+                           (screen_x + size, screen_y + size), 2)
+            pygame.draw.line(screen, border_color,
+                           (screen_x + size, screen_y - size),
+                           (screen_x - size, screen_y + size), 2)
+        else:
+            # Draw normal token in play
+            pygame.draw.circle(screen, WHITE, (screen_x, screen_y), cell_size // 3)
+            pygame.draw.circle(screen, border_color, (screen_x, screen_y), cell_size // 3, 2)
+            pygame.draw.circle(screen, border_color, (screen_x, screen_y), cell_size // 6)
+        
+        # If token is selected, draw highlight
+        if selected:
+            pygame.draw.circle(screen, LIGHT_GRAY, (screen_x, screen_y), cell_size // 2.5, 3)
+
+
+class SpriteAtlas:
+    """Every token variant and all six dice faces, drawn once onto one surface."""
+
+    def __init__(self, dice_animation, cell_size=CELL_SIZE):
+        # Home tokens look the same for everyone; other tokens vary by player,
+        # yard or path, and selection
+        token_keys = [("home",)] + [(player, is_in_play, selected)
+                                    for player in range(len(HOME_COLORS))
+                                    for is_in_play in (False, True)
+                                    for selected in (False, True)]
+        width = max(len(token_keys) * cell_size, 6 * DICE_SIZE)
+        self.surface = pygame.Surface((width, cell_size + DICE_SIZE), pygame.SRCALPHA)
+        self.areas = {}
+
+        for i, key in enumerate(token_keys):
+            area = pygame.Rect(i * cell_size, 0, cell_size, cell_size)
+            if key == ("home",):
+                draw_token(self.surface, area.centerx, area.centery, None, True, False, False, cell_size)
+            else:
+                draw_token(self.surface, area.centerx, area.centery, key[0], False, key[1], key[2],
+                           cell_size)
+            self.areas[key] = area
+
+        for value in range(1, 7):
+            area = pygame.Rect((value - 1) * DICE_SIZE, cell_size, DICE_SIZE, DICE_SIZE)
+            dice_animation.draw_face(self.surface, area.x, area.y, value)
+            self.areas[("dice", value)] = area
+
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert_alpha()
+
+    def token_area(self, token):
+        if token.is_home:
+            return self.areas[("home",)]
+        return self.areas[(token.player, token.is_in_play, token.selected)]
+
+    def blit_dice(self, screen, x, y, value):
+        screen.blit(self.surface, (x, y), self.areas[("dice", value)])
+
+
+def init_display():
+    # Display setup is deferred until a window is actually needed
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
+    pygame.display.set_caption("Ludo Game")
+    # Pointer motion never changes the game, so don't wake the loop for it
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
+    return screen
+
+class LudoGame(LudoEngine):
+    def __init__(self, screen=None, dice=None, geometry=None, bots=None, bot_time=1.0,
+                 chances=True):
+        super().__init__(dice, geometry)
+        self.screen = screen
+
+        # Scale the board to fill the board area and centre it there
+        board_cells = max(self.geometry.width, self.geometry.height)
+        self.cell_size = int(BOARD_SIZE // board_cells)
+        self.board_x = BOARD_OFFSET_X + round((BOARD_SIZE - self.geometry.width * self.cell_size) / 2)
+        self.board_y = BOARD_OFFSET_Y + round((BOARD_SIZE - self.geometry.height * self.cell_size) / 2)
+        self.dice_positions = dice_positions(self.geometry)
+        self.board_surface = None
+        self.last_view = None
         self.dice_roll_time = 0
         self.testing_mode = False
         self.path_checking_test = False 
         self.test_move_delay = 0.5  # Delay between automatic moves (seconds)
         self.last_test_move_time = 0
-        
-        # Initialize tokens for each player in their home positions
-        self.tokens = {
-            0: [Token(1, 1, RED, i) for i in range(4)],      # Red player (left)
-            1: [Token(10, 1, GREEN, i) for i in range(4)],   # Green player (top)
-            2: [Token(10, 10, BLUE, i) for i in range(4)],   # Blue player (right)
-            3: [Token(1, 10, YELLOW, i) for i in range(4)]   # Yellow player (bottom)
-        }
-        
-        # Position each token in a 2x2 grid within their home area
-        for player, tokens in self.tokens.items():
-            base_x = 1 if player in [0, 3] else 10  # Left side for Red/Yellow, Right side for Green/Blue
-            base_y = 1 if player in [0, 1] else 10  # Top for Red/Green, Bottom for Blue/Yellow
-            
-            for i, token in enumerate(tokens):
-                x = base_x + (i % 2) * 3  # Alternate between base_x and base_x + 3
-                y = base_y + (i // 2) * 3  # First two tokens on first row, next two on second row
-                token.pos = (x, y)
-                token.start_pos = (x, y)
-        
-        self.dice_value = 1
-        self.dice_rolled = False
         self.dice_animation = DiceAnimation()
-        
-        # Define safe squares (stars and starting positions)
-        self.safe_squares = [
-            (1, 6),   # Red starting position (left)
-            (8, 1),   # Green starting position (top)
-            (13, 8),  # Blue starting position (right)
-            (6, 13)   # Yellow starting position (bottom)
-        ]
-        
-        # Define paths for each player
-        self.main_path = self._create_main_path()
-        self.home_paths = self._create_home_paths()
+        self.text_cache = TextCache()
+        self.sprite_atlas = None
+        self.scheduler = Scheduler()
+
+        # Win chances are refined off the main thread; the rollouts and the
+        # tablebase cover the standard board only. NumPy and the analysis
+        # modules are only loaded when the overlay is shown
+        self.win_chances = None
+        self.analysed = None
+        if chances and self.geometry.key == STANDARD.key:
+            from probability import BackgroundEstimator
+            self.win_chances = BackgroundEstimator(on_update=self.wake)
+
+        # Seats played by a bot (seat -> strategy). Bots choose their moves in
+        # the worker, from a snapshot of the position, so frames keep coming
+        # while they think
+        self.bots = dict(bots or {})
+        self.bot_time = bot_time
+        self.bot_request = None
+        self.bot_roll_pending = False
+        self.worker = None
+        if self.bots:
+            if self.geometry.key != STANDARD.key:
+                raise ValueError("Bots play on the standard board only")
+            from worker import Worker, SEARCH_STRATEGIES, warm_up
+            self.worker = Worker(on_result=self.wake)
+            for seat, strategy in self.bots.items():
+                # Start the bot processes now rather than on the first bot turn
+                if strategy in SEARCH_STRATEGIES:
+                    self.worker.submit(None, warm_up, strategy, bot_time, seat)
 
         # For testing: Put tokens at specific positions for each player
         if self.testing_mode:
             # Test positions for each player
-            test_positions = {
-                0: [],  # Red player positions
-                1: [],  # Green player positions
-                2: [],  # Blue player positions
-                3: []   # Yellow player positions
-            }
+            test_positions = {player: [] for player in range(self.num_players)}
             
             # Place tokens at test positions
             for player, positions in test_positions.items():
                 for i, pos in enumerate(positions):
                     token = self.tokens[player][i]
-                    token.move_to(pos[0], pos[1])
-                    token.is_in_play = True
-                    token.steps_taken = i  # Set steps taken based on position
-
-    def _create_main_path(self):
-        # Define the complete path for each player
-        paths = {
-            0: [  # Red path (from left)
-                (1, 6), (2, 6), (3, 6), (4, 6), (5, 6),   # Start to center
-                (6, 5), (6, 4), (6, 3), (6, 2), (6, 1), (6, 0), (7, 0), (8, 0),  # Up to green start
-                (8, 1), (8, 2), (8, 3), (8, 4), (8, 5),  # Down to center
-                (9, 6), (10, 6), (11, 6), (12, 6), (13, 6), (14, 6), (14, 7), (14, 8),  # Right to blue start
-                (13, 8), (12, 8), (11, 8), (10, 8), (9, 8),  # Left to center
-                (8, 9), (8, 10), (8, 11), (8, 12), (8, 13), (8, 14),  # Down to yellow start
-                (7, 14), (6, 14),  # Left to center
-                (6, 13), (6, 12), (6, 11), (6, 10), (6, 9),  # Up to center
-                (5, 8), (4, 8), (3, 8), (2, 8), (1, 8), (0, 8),  # Left to home
-                (0, 7), (1, 7), (2, 7), (3, 7), (4, 7), (5, 7), (6, 7)  # Right into home
-            ],
-            1: [  # Green path (from top)
-                (8, 1), (8, 2), (8, 3), (8, 4), (8, 5),  # Start to center
-                (9, 6), (10, 6), (11, 6), (12, 6), (13, 6), (14, 6), (14, 7), (14, 8),  # Right to blue start
-                (13, 8), (12, 8), (11, 8), (10, 8), (9, 8),  # Left to center
-                (8, 9), (8, 10), (8, 11), (8, 12), (8, 13), (8, 14),  # Down to yellow start
-                (7, 14), (6, 14),  # Left to center
-                (6, 13), (6, 12), (6, 11), (6, 10), (6, 9),  # Up to center
-                (5, 8), (4, 8), (3, 8), (2, 8), (1, 8), (0, 8), (0, 7),(0,6),(1, 6),  # Left to red start
-                (2, 6), (3, 6), (4, 6), (5, 6),  # Right to center
-                (6, 5), (6, 4), (6, 3), (6, 2), (6, 1), (6, 0),  # Up to home
-                (7, 0), (7, 1), (7, 2), (7, 3), (7, 4), (7, 5), (7, 6)  # Down into home
-            ],
-            2: [  # Blue path (from right)
-                (13, 8), (12, 8), (11, 8), (10, 8), (9, 8),  # Start to center
-                (8, 9), (8, 10), (8, 11), (8, 12), (8, 13), (8, 14),  # Down to yellow start
-                (7, 14), (6, 14),  # Left to center
-                (6, 13), (6, 12), (6, 11), (6, 10), (6, 9),  # Up to center
-                (5, 8), (4, 8), (3, 8), (2, 8), (1, 8), (0, 8), (0, 7),(0,6),(1, 6),  # Left to red start
-                (2, 6), (3, 6), (4, 6), (5, 6),  # Right to center
-                (6, 5), (6, 4), (6, 3), (6, 2), (6, 1), (6, 0), (7, 0), (8, 0),  # Up to green start
-                (8, 1), (8, 2), (8, 3), (8, 4), (8, 5),  # Down to center
-                (9, 6), (10, 6), (11, 6), (12, 6), (13, 6), (14, 6),  # Right to home
-                (14, 7), (13, 7), (12, 7), (11, 7), (10, 7), (9, 7), (8, 7)  # Left into home
-            ],
-            3: [  # Yellow path (from bottom)
-                (6, 13), (6, 12), (6, 11), (6, 10), (6, 9),  # Start to center
-                (5, 8), (4, 8), (3, 8), (2, 8), (1, 8), (0, 8), (0, 7),(0, 6),(1, 6),  # Left to red start
-                (2, 6), (3, 6), (4, 6), (5, 6),  # Right to center
-                (6, 5), (6, 4), (6, 3), (6, 2), (6, 1), (6, 0), (7, 0), (8, 0),  # Up to green start
-                (8, 1), (8, 2), (8, 3), (8, 4), (8, 5),  # Down to center
-                (9, 6), (10, 6), (11, 6), (12, 6), (13, 6), (14, 6), (14, 7), (14, 8),  # Right to blue start
-                (13, 8), (12, 8), (11, 8), (10, 8), (9, 8),  # Left to center
-                (8, 9), (8, 10), (8, 11), (8, 12), (8, 13), (8, 14),  # Down to home
-                (7, 14), (7, 13), (7, 12), (7, 11), (7, 10), (7, 9), (7, 8)  # Up into home
-            ]
-        }
-        return paths
-
-    def _create_home_paths(self):
-        # Final paths to reach home
-        return {
-            0: [(1, 6)],  # Red final home (bottom-right of center)
-            1: [(8, 1)],  # Green final home (top-right of center)
-            2: [(13, 8)],  # Blue final home (bottom-left of center)
-            3: [(6, 13)]   # Yellow final home (top-left of center)
-        }
-
-    def is_safe_square(self, pos):
-        return pos in self.safe_squares
-
-    def can_move_token(self, token, steps):
-        # If token is already home, it can't move
-        if token.is_home:
-            return False
-            
-        # If token is not in play and roll is 6, it can move
-        if not token.is_in_play and steps == 6:
-            return True
-            
-        # If token is in play, check if move would be valid
-        if token.is_in_play:
-            current_path = self.main_path[self.current_player]
-            current_index = 0
-            
-            # Find current position in path
-            for i, pos in enumerate(current_path):
-                if pos == token.pos:
-                    current_index = i
-                    break
-            
-            new_index = current_index + steps
-            
-            # Check if move would go beyond home path
-            if new_index >= len(current_path):
-                home_path = self.home_paths[self.current_player]
-                steps_into_home = new_index - len(current_path)
-                return steps_into_home < len(home_path)
-            
-            return True
-            
-        return False
-
-    def get_token_at_position(self, pos):
-        for player in self.tokens.values():
-            for token in player:
-                if token.pos == pos:
-                    return token
-        return None
+                    token.place(self.path_index[player][pos])
+            self.rehash()
 
     def move_token(self, token, steps):
-        # If token is not in play and roll is 6, move to starting position
-        if not token.is_in_play and steps == 6:
-            start_pos = self.main_path[self.current_player][0]
-            token.move_to(start_pos[0], start_pos[1])
-            token.is_in_play = True
-            token.steps_taken = 0
-            # Update game state
-            self.dice_rolled = False
+        moved = super().move_token(token, steps)
+        if moved:
             self.dice_animation.is_rolling = False
-            self.check_capture(token)
-            return True
-
-        # If token is already in play, move it along the path
-        if token.is_in_play:
-            current_path = self.main_path[self.current_player]
-            current_index = 0
-            
-            # Find current position in path
-            for i, pos in enumerate(current_path):
-                if pos == token.pos:
-                    current_index = i
-                    break
-            
-            # Calculate new position
-            new_index = current_index + steps
-            
-            # Check if token can enter home path
-            if new_index >= len(current_path):
-                home_path = self.home_paths[self.current_player]
-                steps_into_home = new_index - len(current_path)
-                
-                if steps_into_home < len(home_path):
-                    new_pos = home_path[steps_into_home]
-                    token.move_to(new_pos[0], new_pos[1])
-                    token.steps_taken = len(current_path) + steps_into_home
-                    # Update game state
-                    self.dice_rolled = False
-                    self.dice_animation.is_rolling = False
-                    if steps_into_home == len(home_path) - 1:
-                        token.is_home = True
-                    self.check_capture(token)
-                    return True
-            else:
-                new_pos = current_path[new_index]
-                token.move_to(new_pos[0], new_pos[1])
-                token.steps_taken = new_index
-                # Update game state
-                self.dice_rolled = False
-                self.dice_animation.is_rolling = False
-                self.check_capture(token)
-                return True
-                
-        return False
-
-    def check_capture(self, token):
-        # Check if there are any opponent tokens at the new position
-        if token.pos in self.safe_squares:  # No capture on safe squares
-            return
-            
-        for player, tokens in self.tokens.items():
-            if player != self.current_player:  # Only check opponent tokens
-                for other_token in tokens:
-                    if other_token.pos == token.pos and other_token.is_in_play:
-                        # Send opponent token back home
-                        other_token.reset()
-                        return True
-        return False
+        return moved
 
-    def get_player_name(self, player_index):
-        colors = ["Red", "Green", "Blue", "Yellow"]
-        return colors[player_index]
+    def to_screen(self, point):
+        # Pixel position of a point given in board cells
+        return (self.board_x + point[0] * self.cell_size, self.board_y + point[1] * self.cell_size)
 
-    def check_winner(self):
-        for player_idx, tokens in self.tokens.items():
-            if all(token.is_home for token in tokens):
-                return player_idx
-        return None
+    def cell_rect(self, pos):
+        x, y = self.to_screen(pos)
+        return pygame.Rect(x, y, self.cell_size, self.cell_size)
 
-    def draw_corner_split_cell(self, screen, x, y, position):
-        # Convert grid coordinates to pixel coordinates
-        pixel_x = BOARD_OFFSET_X + x * CELL_SIZE
-        pixel_y = BOARD_OFFSET_Y + y * CELL_SIZE
-        
-        if position == "top_left":  # (0,0) - split between red and green
-            points1 = [(pixel_x, pixel_y),
-                      (pixel_x + CELL_SIZE, pixel_y),
-                      (pixel_x, pixel_y + CELL_SIZE)]
-            points2 = [(pixel_x + CELL_SIZE, pixel_y),
-                      (pixel_x + CELL_SIZE, pixel_y + CELL_SIZE),
-                      (pixel_x, pixel_y + CELL_SIZE)]
-            color1 = HOME_COLORS[1]["fill"]  # Green (top)
-            color2 = HOME_COLORS[2]["fill"]  # blue (left)
-        elif position == "top_right":  # (2,0) - split between green and blue
-            points1 = [(pixel_x, pixel_y),
-                      (pixel_x + CELL_SIZE, pixel_y),
-                      (pixel_x + CELL_SIZE, pixel_y + CELL_SIZE)]
-            points2 = [(pixel_x, pixel_y),
-                      (pixel_x, pixel_y + CELL_SIZE),
-                      (pixel_x + CELL_SIZE, pixel_y + CELL_SIZE)]
-            color1 = HOME_COLORS[1]["fill"]  # Green (top)
-            color2 = HOME_COLORS[0]["fill"]  # red (right)
-        elif position == "bottom_left":  # (0,2) - split between red and yellow
-            points1 = [(pixel_x, pixel_y),
-                      (pixel_x + CELL_SIZE, pixel_y),
-                      (pixel_x + CELL_SIZE, pixel_y + CELL_SIZE)]
-            points2 = [(pixel_x, pixel_y),
-                      (pixel_x, pixel_y + CELL_SIZE),
-                      (pixel_x + CELL_SIZE, pixel_y + CELL_SIZE)]
-            color1 = HOME_COLORS[2]["fill"]  # Red (left)
-            color2 = HOME_COLORS[3]["fill"]  # Yellow (bottom)
-        else:  # "bottom_right" (2,2) - split between blue and yellow
-            points1 = [(pixel_x + CELL_SIZE, pixel_y),
-                      (pixel_x + CELL_SIZE, pixel_y + CELL_SIZE),
-                      (pixel_x, pixel_y + CELL_SIZE)]
-            points2 = [(pixel_x + CELL_SIZE, pixel_y),
-                      (pixel_x, pixel_y),
-                      (pixel_x, pixel_y + CELL_SIZE)]
-            color1 = HOME_COLORS[3]["fill"]  # Blue (right)
-            color2 = HOME_COLORS[0]["fill"]  # Yellow (bottom)
-        
-        # Draw the two triangles
-        pygame.draw.polygon(screen, color1, points1)
-        pygame.draw.polygon(screen, color2, points2)
-        
-        # Draw the cell border
-        pygame.draw.rect(screen, BLACK, (pixel_x, pixel_y, CELL_SIZE, CELL_SIZE), 1)
-
-    def draw_four_way_split_cell(self, screen, x, y):
-        # Convert grid coordinates to pixel coordinates
-        pixel_x = BOARD_OFFSET_X + x * CELL_SIZE
-        pixel_y = BOARD_OFFSET_Y + y * CELL_SIZE
-        center_x = pixel_x + CELL_SIZE // 2
-        center_y = pixel_y + CELL_SIZE // 2
-        
-        # Define the four triangles (top, right, bottom, left)
-        top_triangle = [(center_x, center_y),
-                       (pixel_x, pixel_y),
-                       (pixel_x + CELL_SIZE, pixel_y)]
-        
-        right_triangle = [(center_x, center_y),
-                         (pixel_x + CELL_SIZE, pixel_y),
-                         (pixel_x + CELL_SIZE, pixel_y + CELL_SIZE)]
-        
-        bottom_triangle = [(center_x, center_y),
-                          (pixel_x + CELL_SIZE, pixel_y + CELL_SIZE),
-                          (pixel_x, pixel_y + CELL_SIZE)]
-        
-        left_triangle = [(center_x, center_y),
-                        (pixel_x, pixel_y + CELL_SIZE),
-                        (pixel_x, pixel_y)]
-        
-        # Draw the four triangles with corresponding home colors
-        pygame.draw.polygon(screen, HOME_COLORS[1]["fill"], top_triangle)     # Top (Green)
-        pygame.draw.polygon(screen, HOME_COLORS[2]["fill"], right_triangle)   # Right (Blue)
-        pygame.draw.polygon(screen, HOME_COLORS[3]["fill"], bottom_triangle)  # Bottom (Yellow)
-        pygame.draw.polygon(screen, HOME_COLORS[0]["fill"], left_triangle)    # Left (Red)
-        
-        # Draw the cell border
-        pygame.draw.rect(screen, BLACK, (pixel_x, pixel_y, CELL_SIZE, CELL_SIZE), 1)
+    def dice_area(self, player):
+        # Dice with its coloured frame and the "Click to Roll!" text below it
+        dice_x, dice_y = self.dice_positions[player]
+        return pygame.Rect(dice_x - 20, dice_y - 10, DICE_SIZE + 40, DICE_SIZE + 80)
 
     def draw_board(self):
+        # The board never changes during a game, so draw it once and blit it
+        size = self.screen.get_size()
+        if self.board_surface is None or self.board_surface.get_size() != size:
+            self.board_surface = pygame.Surface(size)
+            if pygame.display.get_surface() is not None:
+                # Match the display pixel format so the blit is a plain copy
+                self.board_surface = self.board_surface.convert()
+            self.render_board(self.board_surface)
+        self.screen.blit(self.board_surface, (0, 0))
+
+    def invalidate_board(self):
+        # Call after a resize or colour change to rebuild the cached board
+        self.board_surface = None
+
+    def render_board(self, screen):
+        geometry = self.geometry
+        cell = self.cell_size
+
+        def polygon(points):
+            return [self.to_screen(point) for point in points]
+
         # Fill background
         screen.fill(WOOD_COLOR)
-        
+
         # Draw the main board area with border
         pygame.draw.rect(screen, WHITE,
                         (BOARD_OFFSET_X - 5, BOARD_OFFSET_Y - 5,
@@ -504,224 +394,236 @@ class LudoGame:
                         (BOARD_OFFSET_X - 5, BOARD_OFFSET_Y - 5,
                          BOARD_SIZE + 10, BOARD_SIZE + 10), 2)
 
-        # Draw colored home areas (squares)
-        home_positions = {
-            0: (0, 0, RED),                    # Red (top-left)
-            1: (9, 0, GREEN),                  # Green (top-right)
-            2: (9, 9, BLUE),                   # Blue (bottom-right)
-            3: (0, 9, YELLOW)                  # Yellow (bottom-left)
-        }
-
-        # Draw home areas
-        for player, (x, y, color) in home_positions.items():
-            # Draw 6x6 colored square for home
-            rect = (BOARD_OFFSET_X + x * CELL_SIZE,
-                   BOARD_OFFSET_Y + y * CELL_SIZE,
-                   CELL_SIZE * 6, CELL_SIZE * 6)
-            pygame.draw.rect(screen, HOME_COLORS[player]["fill"], rect)
-            pygame.draw.rect(screen, HOME_COLORS[player]["border"], rect, 2)
-
-            # Draw 2x2 grid for token positions
-            for i in range(2):
-                for j in range(2):
-                    # Calculate exact center of each cell in the 2x2 grid
-                    circle_x = BOARD_OFFSET_X + (x + 1 + i * 3) * CELL_SIZE + (CELL_SIZE // 2)
-                    circle_y = BOARD_OFFSET_Y + (y + 1 + j * 3) * CELL_SIZE + (CELL_SIZE // 2)
-                    
-                    # Draw white background circle
-                    pygame.draw.circle(screen, WHITE, (circle_x, circle_y), CELL_SIZE // 3)
-                    # Draw colored border
-                    pygame.draw.circle(screen, color, (circle_x, circle_y), CELL_SIZE // 3, 2)
-                    # Draw inner colored circle
-                    pygame.draw.circle(screen, color, (circle_x, circle_y), CELL_SIZE // 6)
-
-        # Draw center paths (white cross)
-        center_paths = [
-            (6, 0, 3, 15),  # Vertical path
-            (0, 6, 15, 3)   # Horizontal path
-        ]
-        
-        for x, y, w, h in center_paths:
-            rect = (BOARD_OFFSET_X + x * CELL_SIZE,
-                   BOARD_OFFSET_Y + y * CELL_SIZE,
-                   w * CELL_SIZE, h * CELL_SIZE)
-            pygame.draw.rect(screen, WHITE, rect)
-            pygame.draw.rect(screen, WOOD_DARK, rect, 1)
-
-        # Draw colored paths leading to center
-        colored_center_paths = {
-            0: [(1, 7), (2, 7), (3, 7), (4, 7), (5, 7), (1, 6)],  # Red path (left)
-            1: [(7, 1), (7, 2), (7, 3), (7, 4), (7, 5), (8, 1)],  # Green path (top)
-            2: [(13, 7), (12, 7), (11, 7), (10, 7), (9, 7), (13, 8)],  # Blue path (right)
-            3: [(7, 13), (7, 12), (7, 11), (7, 10), (7, 9), (6, 13)]   # Yellow path (bottom)
-        }
-
-        # Draw the colored paths to center
-        for player, path in colored_center_paths.items():
-            for x, y in path:
-                rect = (BOARD_OFFSET_X + x * CELL_SIZE,
-                       BOARD_OFFSET_Y + y * CELL_SIZE,
-                       CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(screen, HOME_COLORS[player]["fill"], rect)
-                pygame.draw.rect(screen, HOME_COLORS[player]["border"], rect, 1)
-
-        # Draw center home squares with diagonal split pattern
-        # First draw white background for center area
-        center_rect = (BOARD_OFFSET_X + 6 * CELL_SIZE,
-                      BOARD_OFFSET_Y + 6 * CELL_SIZE,
-                      CELL_SIZE * 3, CELL_SIZE * 3)
-        pygame.draw.rect(screen, WHITE, center_rect)
-
-        # Draw the center 3x3 grid
-        for i in range(3):
-            for j in range(3):
-                x = 6 + i  # Center starts at x=6
-                y = 6 + j  # Center starts at y=6
-                pixel_x = BOARD_OFFSET_X + x * CELL_SIZE
-                pixel_y = BOARD_OFFSET_Y + y * CELL_SIZE
-                
-                # Single cells with different patterns
-                if (i, j) == (0, 1):  # Left middle cell
-                    pygame.draw.rect(screen, HOME_COLORS[0]["fill"], 
-                                   (pixel_x, pixel_y, CELL_SIZE, CELL_SIZE))
-                elif (i, j) == (1, 0):  # Top middle cell
-                    pygame.draw.rect(screen, HOME_COLORS[1]["fill"], 
-                                   (pixel_x, pixel_y, CELL_SIZE, CELL_SIZE))
-                elif (i, j) == (2, 1):  # Right middle cell
-                    pygame.draw.rect(screen, HOME_COLORS[2]["fill"], 
-                                   (pixel_x, pixel_y, CELL_SIZE, CELL_SIZE))
-                elif (i, j) == (1, 2):  # Bottom middle cell
-                    pygame.draw.rect(screen, HOME_COLORS[3]["fill"], 
-                                   (pixel_x, pixel_y, CELL_SIZE, CELL_SIZE))
-                elif (i, j) == (1, 1):  # Center cell - four-way split
-                    self.draw_four_way_split_cell(screen, x, y)
-                elif (i, j) == (0, 0):  # Top-left corner
-                    self.draw_corner_split_cell(screen, x, y, "top_right")
-                elif (i, j) == (2, 0):  # Top-right corner
-                    self.draw_corner_split_cell(screen, x, y, "top_left")
-                elif (i, j) == (0, 2):  # Bottom-left corner
-                    self.draw_corner_split_cell(screen, x, y, "bottom_right")
-                elif (i, j) == (2, 2):  # Bottom-right corner
-                    self.draw_corner_split_cell(screen, x, y, "bottom_left")
-                
-                # Draw cell border
-                pygame.draw.rect(screen, BLACK, 
-                               (pixel_x, pixel_y, CELL_SIZE, CELL_SIZE), 1)
-
-        # Draw grid lines
-        for i in range(16):
-            # Vertical lines
-            pygame.draw.line(screen, WOOD_DARK,
-                           (BOARD_OFFSET_X + i * CELL_SIZE, BOARD_OFFSET_Y),
-                           (BOARD_OFFSET_X + i * CELL_SIZE, BOARD_OFFSET_Y + BOARD_SIZE))
-            # Horizontal lines
-            pygame.draw.line(screen, WOOD_DARK,
-                           (BOARD_OFFSET_X, BOARD_OFFSET_Y + i * CELL_SIZE),
-                           (BOARD_OFFSET_X + BOARD_SIZE, BOARD_OFFSET_Y + i * CELL_SIZE))
-
-        # Draw player icons in corners
-        icon_size = CELL_SIZE * 2
-        icon_positions = [
-            (BOARD_OFFSET_X + CELL_SIZE * 2, BOARD_OFFSET_Y + CELL_SIZE * 2),  # Red
-            (BOARD_OFFSET_X + BOARD_SIZE - CELL_SIZE * 4, BOARD_OFFSET_Y + CELL_SIZE * 2),  # Green
-            (BOARD_OFFSET_X + BOARD_SIZE - CELL_SIZE * 4, BOARD_OFFSET_Y + BOARD_SIZE - CELL_SIZE * 4),  # Blue
-            (BOARD_OFFSET_X + CELL_SIZE * 2, BOARD_OFFSET_Y + BOARD_SIZE - CELL_SIZE * 4)  # Yellow
-        ]
+        # A four-player board is the original square grid, drawn with rectangles
+        # in the original order so it looks exactly as it always has
+        square = self.num_players == 4
+
+        # Draw home areas (yards) with a circle for each waiting token
+        for player in range(self.num_players):
+            colors = HOME_COLORS[player]
+            corners = polygon(geometry.yard_corners[player])
+            if square:
+                rect = pygame.Rect(corners[0], (0, 0)).union(pygame.Rect(corners[2], (0, 0)))
+                pygame.draw.rect(screen, colors["fill"], rect)
+                pygame.draw.rect(screen, colors["border"], rect, 2)
+            else:
+                pygame.draw.polygon(screen, colors["fill"], corners)
+                pygame.draw.polygon(screen, colors["border"], corners, 2)
+            for spot in geometry.yards[player]:
+                x, y = self.to_screen(spot)
+                center = (x + cell // 2, y + cell // 2)
+                # White background, coloured border and inner colored circle
+                pygame.draw.circle(screen, WHITE, center, cell // 3)
+                pygame.draw.circle(screen, colors["border"], center, cell // 3, 2)
+                pygame.draw.circle(screen, colors["border"], center, cell // 6)
+
+        # Draw the track
+        if square:
+            # As two white bars crossing in the centre
+            cx, cy = geometry.center
+            for across in (lambda pos: abs(pos[0] + 0.5 - cx), lambda pos: abs(pos[1] + 0.5 - cy)):
+                bar = self.cell_rect(geometry.center).unionall(
+                    [self.cell_rect(pos) for pos in geometry.corners if across(pos) < 1.5])
+                pygame.draw.rect(screen, WHITE, bar)
+                pygame.draw.rect(screen, WOOD_DARK, bar, 1)
+        else:
+            for corners in geometry.corners.values():
+                corners = polygon(corners)
+                pygame.draw.polygon(screen, WHITE, corners)
+                pygame.draw.polygon(screen, WOOD_DARK, corners, 1)
+            self.draw_center(screen)
+
+        # Draw the colored paths leading to the centre and the starting squares
+        for player in range(self.num_players):
+            colors = HOME_COLORS[player]
+            for pos in geometry.home_columns[player] + [geometry.start_cells[player]]:
+                if square:
+                    pygame.draw.rect(screen, colors["fill"], self.cell_rect(pos))
+                    pygame.draw.rect(screen, colors["border"], self.cell_rect(pos), 1)
+                else:
+                    corners = polygon(geometry.corners[pos])
+                    pygame.draw.polygon(screen, colors["fill"], corners)
+                    pygame.draw.polygon(screen, colors["border"], corners, 1)
+
+        if square:
+            # The centre over the ends of the home columns, its cells outlined,
+            # and the grid over everything
+            self.draw_center(screen)
+            cx, cy = int(geometry.center[0]), int(geometry.center[1])
+            for x in range(cx - 1, cx + 2):
+                for y in range(cy - 1, cy + 2):
+                    pygame.draw.rect(screen, BLACK, self.cell_rect((x, y)), 1)
+            left, top = self.to_screen((0, 0))
+            right, bottom = self.to_screen((geometry.width, geometry.height))
+            for i in range(geometry.width + 1):
+                x = left + i * cell
+                pygame.draw.line(screen, WOOD_DARK, (x, top), (x, bottom))
+            for i in range(geometry.height + 1):
+                y = top + i * cell
+                pygame.draw.line(screen, WOOD_DARK, (left, y), (right, y))
+
+    def draw_center(self, screen):
+        # One triangle per player, pointing at its arm; each is drawn after the
+        # one before it in turn order, player 0 last, so it wins the shared edge
+        players = list(range(1, self.num_players)) + [0]
+        for player in players:
+            triangle = [self.to_screen(point) for point in self.geometry.center_triangles[player]]
+            pygame.draw.polygon(screen, HOME_COLORS[player]["fill"], triangle)
+            if self.num_players != 4:
+                pygame.draw.polygon(screen, BLACK, triangle, 1)
 
     def draw_tokens(self):
-        for player, tokens in self.tokens.items():
-            for token in tokens:
-                # Calculate exact center position of the cell
-                screen_x = BOARD_OFFSET_X + (token.pos[0] * CELL_SIZE) + (CELL_SIZE // 2)
-                screen_y = BOARD_OFFSET_Y + (token.pos[1] * CELL_SIZE) + (CELL_SIZE // 2)
-                
-                if token.is_home:
-                    # Draw home token with different appearance (grayed out)
-                    pygame.draw.circle(screen, LIGHT_GRAY, (screen_x, screen_y), CELL_SIZE // 3)
-                    pygame.draw.circle(screen, GRAY, (screen_x, screen_y), CELL_SIZE // 3, 2)
-                    pygame.draw.circle(screen, GRAY, (screen_x, screen_y), CELL_SIZE // 6)
-                else:
-                    border_color = HOME_COLORS[player]["border"]
-                    if not token.is_in_play:
-                        # Draw token not in play with a cross pattern
-                        pygame.draw.circle(screen, WHITE, (screen_x, screen_y), CELL_SIZE // 3)
-                        pygame.draw.circle(screen, border_color, (screen_x, screen_y), CELL_SIZE // 3, 2)
-                        # Draw an X pattern inside
-                        size = CELL_SIZE // 4
-                        pygame.draw.line(screen, border_color, 
-                                       (screen_x - size, screen_y - size),
-                                       (screen_x + size, screen_y + size), 2)
-                        pygame.draw.line(screen, border_color,
-                                       (screen_x + size, screen_y - size),
-                                       (screen_x - size, screen_y + size), 2)
-                    else:
-                        # Draw normal token in play
-                        pygame.draw.circle(screen, WHITE, (screen_x, screen_y), CELL_SIZE // 3)
-                        pygame.draw.circle(screen, border_color, (screen_x, screen_y), CELL_SIZE // 3, 2)
-                        pygame.draw.circle(screen, border_color, (screen_x, screen_y), CELL_SIZE // 6)
-                    
-                    # If token is selected, draw highlight
-                    if token.selected:
-                        pygame.draw.circle(screen, LIGHT_GRAY, (screen_x, screen_y), CELL_SIZE // 2.5, 3)
+        # One batched blit of pre-rendered sprites for all sixteen tokens
+        sprites = self.sprites()
+        self.screen.blits([(sprites.surface, self.to_screen(token.pos), sprites.token_area(token))
+                           for tokens in self.tokens.values() for token in tokens], doreturn=False)
+
+    def sprites(self):
+        if self.sprite_atlas is None:
+            self.sprite_atlas = SpriteAtlas(self.dice_animation, self.cell_size)
+        return self.sprite_atlas
 
     def draw_dice(self):
         try:
             # Get dice position based on current player
-            dice_x, dice_y = DICE_POSITIONS[self.current_player]
+            dice_x, dice_y = self.dice_positions[self.current_player]
             
             # Draw player indicator around dice
             padding = 10
-            pygame.draw.rect(screen, self.tokens[self.current_player][0].color,
+            pygame.draw.rect(self.screen, HOME_COLORS[self.current_player]["border"],
                            (dice_x - padding, dice_y - padding,
                             DICE_SIZE + 2*padding, DICE_SIZE + 2*padding))
-            pygame.draw.rect(screen, BLACK,
+            pygame.draw.rect(self.screen, BLACK,
                            (dice_x - padding, dice_y - padding,
                             DICE_SIZE + 2*padding, DICE_SIZE + 2*padding), 2)
             
-            self.dice_animation.draw(screen, dice_x, dice_y)
+            self.dice_animation.draw(self.screen, dice_x, dice_y, self.sprites())
 
             # Draw "Roll" text below dice when waiting for roll
             if self.state == WAITING_FOR_ROLL and not self.dice_animation.is_rolling:
-                font = pygame.font.Font(None, 24)
-                text1 = font.render("Click to", True, BLACK)
-                text2 = font.render("Roll!", True, BLACK)
+                text1 = self.text_cache.render("Click to", 24, BLACK)
+                text2 = self.text_cache.render("Roll!", 24, BLACK)
                 text_rect1 = text1.get_rect(center=(dice_x + DICE_SIZE//2, dice_y + DICE_SIZE + 35))
                 text_rect2 = text2.get_rect(center=(dice_x + DICE_SIZE//2, dice_y + DICE_SIZE + 55))
-                screen.blit(text1, text_rect1)
-                screen.blit(text2, text_rect2)
+                self.screen.blit(text1, text_rect1)
+                self.screen.blit(text2, text_rect2)
 
         except Exception as e:
             print(f"Error drawing dice: {e}")
             pygame.quit()
             sys.exit(1)
 
+    def draw_hud(self):
+        # Display current player and game message
+        player_text = f"{self.get_player_name(self.current_player)}'s turn"
+        text = self.text_cache.render(player_text, 36, HOME_COLORS[self.current_player]["border"])
+        self.screen.blit(text, (10, 10))
+        
+        if self.game_message:
+            msg_text = self.text_cache.render(self.game_message, 36, BLACK)
+            self.screen.blit(msg_text, (10, 50))
+
+        # Chance to win for each player, as the latest estimate has it
+        for player, percent in enumerate(self.chance_percentages()):
+            y = 8 + player * CHANCE_ROW_HEIGHT
+            color = HOME_COLORS[player]["border"]
+            pygame.draw.rect(self.screen, WHITE, (CHANCE_BAR_X, y, CHANCE_BAR_WIDTH, CHANCE_ROW_HEIGHT - 6))
+            pygame.draw.rect(self.screen, color,
+                             (CHANCE_BAR_X, y, CHANCE_BAR_WIDTH * percent // 100, CHANCE_ROW_HEIGHT - 6))
+            pygame.draw.rect(self.screen, BLACK, (CHANCE_BAR_X, y, CHANCE_BAR_WIDTH, CHANCE_ROW_HEIGHT - 6), 1)
+            label = self.text_cache.render(f"{percent}%", 22, BLACK)
+            self.screen.blit(label, (CHANCE_BAR_X + CHANCE_BAR_WIDTH + 8, y))
+
+    def chance_percentages(self):
+        # Whole percentages, so the HUD is only repainted when the bars visibly change
+        estimate = self.win_chances.latest() if self.win_chances is not None else None
+        if estimate is None:
+            return ()
+        return tuple(round(chance * 100) for chance in estimate.chances)
+
+    def wake(self, *args):
+        # Runs on a background thread: just wake the main loop, which picks up the result
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(WAKE_EVENT))
+
+    def analyse(self):
+        # Hand every new settled position (after a move, capture or turn change) to the estimator
+        if self.win_chances is None or self.state not in (WAITING_FOR_ROLL, GAME_OVER):
+            return
+        if self.zobrist != self.analysed:
+            self.analysed = self.zobrist
+            self.win_chances.submit(GameState.from_engine(self))
+
+    def view_state(self):
+        # Everything that affects what is on screen, to compare between frames
+        tokens = tuple((token.pos, token.is_home, token.is_in_play, token.selected)
+                       for tokens in self.tokens.values() for token in tokens)
+        dice = (self.current_player, self.state, self.dice_animation.final_value,
+                self.dice_animation.is_rolling)
+        hud = (self.current_player, self.game_message, self.chance_percentages())
+        return tokens, dice, hud
+
+    def dirty_rects(self, old, new):
+        rects = []
+        for before, after in zip(old[0], new[0]):
+            if before != after:
+                rects.append(self.cell_rect(before[0]))
+                rects.append(self.cell_rect(after[0]))
+        # A rolling dice shows a new face every frame
+        if old[1] != new[1] or self.dice_animation.is_rolling:
+            rects.append(self.dice_area(old[1][0]))
+            rects.append(self.dice_area(new[1][0]))
+        if old[2] != new[2]:
+            rects.append(pygame.Rect(HUD_RECT))
+
+        screen_rect = self.screen.get_rect()
+        merged = []
+        for rect in rects:
+            rect = rect.clip(screen_rect)
+            if not rect.width or not rect.height:
+                continue
+            # Overlapping regions are repainted once
+            index = rect.collidelist(merged)
+            if index == -1:
+                merged.append(rect)
+            else:
+                merged[index] = merged[index].union(rect)
+        return merged
+
+    def render_frame(self):
+        # Repaint only the regions that changed; returns them for display.update
+        view = self.view_state()
+        if self.last_view is None or self.board_surface is None:
+            dirty = [self.screen.get_rect()]
+        else:
+            dirty = self.dirty_rects(self.last_view, view)
+        self.last_view = view
+
+        for rect in dirty:
+            self.screen.set_clip(rect)
+            self.draw_board()
+            self.draw_tokens()
+            self.draw_dice()
+            self.draw_hud()
+        self.screen.set_clip(None)
+        return dirty
+
     def roll_dice(self):
         if not self.dice_animation.is_rolling:
+            value = None
             if self.testing_mode:
                 if self.path_checking_test:
                     # In path checking test, always succeed
-                    self.dice_value = 6 if not any(t.is_in_play for t in self.tokens[self.current_player]) else 1
+                    value = 6 if not any(t.is_in_play for t in self.tokens[self.current_player]) else 1
                 else:
                     # Regular test mode
-                    self.dice_value = 1
-            else:
-                self.dice_value = random.randint(1, 6)
-            
+                    value = 1
+
+            super().roll_dice(value)
             self.dice_animation.start_roll(self.dice_value)
-            self.dice_rolled = True
             self.dice_roll_time = time.time()
-            
-            if self.dice_value == 6:
-                self.consecutive_sixes += 1
-                if self.consecutive_sixes == 3:
-                    self.game_message = "Three sixes in a row! Turn forfeited!"
-                    self.next_turn()
-                else:
-                    self.game_message = "Rolled a 6! You get another turn after moving."
-                self.state = WAITING_FOR_PIECE
-            else:
-                self.consecutive_sixes = 0
-                self.state = "SHOWING_ROLL"
+            if self.state == SHOWING_ROLL:
+                self.scheduler.call_later(ROLL_REVEAL_DELAY, self.resolve_roll)
 
     def update_game_state(self):
         current_time = time.time()
@@ -734,36 +636,75 @@ class LudoGame:
                 return
 
         # Regular game state updates
-        if self.state == "SHOWING_ROLL" and current_time - self.dice_roll_time >= 2:
-            can_move = False
-            for token in self.tokens[self.current_player]:
-                if self.can_move_token(token, self.dice_value):
-                    can_move = True
-                    break
-            
-            if not can_move:
-                self.game_message = "No valid moves available!"
-                self.next_turn()
-            else:
-                self.state = WAITING_FOR_PIECE
+        self.scheduler.run_due(current_time)
+        self.play_bots()
+        self.analyse()
 
     def next_turn(self):
-        self.current_player = (self.current_player + 1) % 4
-        self.dice_rolled = False
-        self.consecutive_sixes = 0
-        self.state = WAITING_FOR_ROLL
-        
-        # Deselect all tokens
-        for tokens in self.tokens.values():
-            for token in tokens:
-                token.selected = False
+        super().next_turn()
+        # Anything a bot was still thinking about belongs to the turn that ended
+        if self.worker is not None:
+            self.worker.cancel()
+            self.bot_request = None
+
+    def play_bots(self):
+        if self.worker is None:
+            return
+        for request, token_index in self.worker.poll():
+            # Only the answer for the position still on the board is played
+            if request is not None and request == self.bot_request and self.state == WAITING_FOR_PIECE:
+                self.bot_request = None
+                if token_index is not None:
+                    self.play_token(self.tokens[self.current_player][token_index])
+
+        strategy = self.bots.get(self.current_player)
+        if strategy is None or self.dice_animation.is_rolling:
+            return
+        if self.state == WAITING_FOR_ROLL and not self.bot_roll_pending:
+            self.bot_roll_pending = True
+            self.scheduler.call_later(BOT_ROLL_DELAY, self.bot_roll)
+        elif self.state == WAITING_FOR_PIECE:
+            request = (self.current_player, self.zobrist, self.dice_value)
+            if request != self.bot_request:
+                self.bot_request = request
+                self.worker.submit_move(request, strategy, GameState.from_engine(self),
+                                        self.dice_value, self.bot_time)
+
+    def bot_roll(self):
+        self.bot_roll_pending = False
+        if self.state == WAITING_FOR_ROLL and self.current_player in self.bots:
+            self.roll_dice()
+
+    def close(self):
+        if self.worker is not None:
+            self.worker.shutdown()
+        if self.win_chances is not None:
+            self.win_chances.stop()
+
+    def next_wakeup(self, now):
+        # Seconds until there is timed work to do, or None when only input can change anything
+        if self.dice_animation.is_rolling:
+            return 1 / FPS
+
+        deadlines = []
+        deadline = self.scheduler.next_deadline()
+        if deadline is not None:
+            deadlines.append(deadline)
+        if self.testing_mode and self.path_checking_test:
+            deadlines.append(self.last_test_move_time + self.test_move_delay)
+        if not deadlines:
+            return None
+        return max(0, min(deadlines) - now)
 
     def handle_click(self, pos):
+        if self.current_player in self.bots:
+            return False
+
         if self.state == WAITING_FOR_ROLL:
             # Check if dice was clicked
             dice_rect = pygame.Rect(
-                DICE_POSITIONS[self.current_player][0],
-                DICE_POSITIONS[self.current_player][1],
+                self.dice_positions[self.current_player][0],
+                self.dice_positions[self.current_player][1],
                 DICE_SIZE,
                 DICE_SIZE
             )
@@ -772,18 +713,14 @@ class LudoGame:
             return False
 
         elif self.state == WAITING_FOR_PIECE:
-            # Convert mouse position to board coordinates
-            board_x = (pos[0] - BOARD_OFFSET_X) // CELL_SIZE
-            board_y = (pos[1] - BOARD_OFFSET_Y) // CELL_SIZE
-            click_pos = (board_x, board_y)
-
             # Check if any token was clicked
             for token in self.tokens[self.current_player]:
                 if token.is_home:
                     continue  # Skip tokens that have reached home
                 
-                token_screen_x = BOARD_OFFSET_X + (token.pos[0] * CELL_SIZE) + (CELL_SIZE // 2)
-                token_screen_y = BOARD_OFFSET_Y + (token.pos[1] * CELL_SIZE) + (CELL_SIZE // 2)
+                token_screen_x, token_screen_y = self.to_screen(token.pos)
+                token_screen_x += self.cell_size // 2
+                token_screen_y += self.cell_size // 2
                 
                 # Check if click is within token radius
                 click_distance = math.sqrt(
@@ -791,25 +728,8 @@ class LudoGame:
                     (pos[1] - token_screen_y) ** 2
                 )
                 
-                if click_distance <= PLAYER_SIZE:
-                    if self.can_move_token(token, self.dice_value):
-                        # Deselect all other tokens
-                        for other_token in self.tokens[self.current_player]:
-                            other_token.selected = False
-                        # Select this token
-                        token.selected = True
-                        # Move the token
-                        if self.move_token(token, self.dice_value):
-                            # If moved successfully, check for game end
-                            if all(t.is_home for t in self.tokens[self.current_player]):
-                                self.game_message = f"Player {self.current_player} wins!"
-                                return True
-                            # If rolled 6, player gets another turn
-                            if self.dice_value == 6:
-                                self.state = WAITING_FOR_ROLL
-                            else:
-                                self.next_turn()
-                            return True
+                if click_distance <= PLAYER_SIZE * self.cell_size / CELL_SIZE and self.play_token(token):
+                    return True
             return False
 
         return False
@@ -821,82 +741,76 @@ class LudoGame:
         
         if not token.is_in_play:
             # If token is not in play, put it at the starting position
-            start_pos = self.main_path[self.current_player][0]
-            token.move_to(start_pos[0], start_pos[1])
-            token.is_in_play = True
-            token.steps_taken = 0
-            self.game_message = f"Player {self.current_player} token placed at start: {start_pos}"
+            token.place(0)
+            self.rehash()
+            self.game_message = f"Player {self.current_player} token placed at start: {token.pos}"
+        elif token.is_home:
+            # Token completed its path, move to next player
+            self.next_turn()
         else:
             # Move token one step along the path
-            current_path = self.main_path[self.current_player]
-            current_index = 0
-            
-            # Find current position in path
-            for i, pos in enumerate(current_path):
-                if pos == token.pos:
-                    current_index = i
-                    break
-            
-            # Move to next position
-            next_index = current_index + 1
-            
-            if next_index >= len(current_path):
-                # Move into home path
-                home_path = self.home_paths[self.current_player]
-                steps_into_home = next_index - len(current_path)
-                
-                if steps_into_home < len(home_path):
-                    new_pos = home_path[steps_into_home]
-                    token.move_to(new_pos[0], new_pos[1])
-                    token.steps_taken = len(current_path) + steps_into_home
-                    self.game_message = f"Player {self.current_player} token at home path: {new_pos}"
-                    if steps_into_home == len(home_path) - 1:
-                        token.is_home = True
-                        self.game_message = f"Player {self.current_player} token reached home!"
-                        self.next_turn()  # Move to next player when token reaches home
-                else:
-                    # Token completed its path, move to next player
-                    self.next_turn()
+            token.place(token.path_index + 1)
+            self.rehash()
+            if token.is_home:
+                self.game_message = f"Player {self.current_player} token reached home!"
+                self.next_turn()  # Move to next player when token reaches home
             else:
-                # Move along main path
-                new_pos = current_path[next_index]
-                token.move_to(new_pos[0], new_pos[1])
-                token.steps_taken = next_index
-                self.game_message = f"Player {self.current_player} token at: {new_pos}"
+                self.game_message = f"Player {self.current_player} token at: {token.pos}"
+
+def main(argv=None):
+    from simulate import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Play Ludo")
+    parser.add_argument("--players", type=int, default=4, choices=range(MIN_PLAYERS, MAX_PLAYERS + 1))
+    parser.add_argument("--arm-length", type=int, default=6, help="cells along each arm of the board")
+    parser.add_argument("--no-chances", action="store_true", help="hide the win chance overlay")
+    parser.add_argument("--bots", type=int, nargs="*", default=[], metavar="SEAT",
+                        help="seats played by the computer")
+    parser.add_argument("--bot", default="expectiminimax",
+                        choices=sorted(STRATEGIES))
+    parser.add_argument("--bot-time", type=float, default=1.0, help="seconds a searching bot thinks")
+    args = parser.parse_args(argv)
+    geometry = board_geometry(args.players, args.arm_length)
+    for seat in args.bots:
+        if not 0 <= seat < args.players:
+            parser.error(f"No seat {seat} with {args.players} players")
+    if args.bots and geometry.key != STANDARD.key:
+        parser.error("Bots play on the standard board only")
 
-def main():
     try:
-        game = LudoGame()
-        clock = pygame.time.Clock()
+        screen = init_display()
+        game = LudoGame(screen, geometry=geometry, bots=dict.fromkeys(args.bots, args.bot),
+                        bot_time=args.bot_time, chances=not args.no_chances)
 
         while True:
-            for event in pygame.event.get():
+            # Sleep until input arrives or the next timer is due; this runs at
+            # the full frame rate only while the dice animation is playing
+            timeout = game.next_wakeup(time.time())
+            if timeout is None:
+                events = [pygame.event.wait()]
+            else:
+                events = [pygame.event.wait(max(1, int(timeout * 1000)))]
+            events.extend(pygame.event.get())
+
+            for event in events:
                 if event.type == pygame.QUIT:
+                    game.close()
                     pygame.quit()
                     sys.exit()
+                elif event.type == pygame.VIDEORESIZE:
+                    game.invalidate_board()
+                elif event.type == pygame.WINDOWEXPOSED:
+                    game.last_view = None  # Repaint the whole window
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     game.handle_click(event.pos)
 
             # Update game state
             game.update_game_state()
 
-            # Draw game state
-            game.draw_board()
-            game.draw_tokens()
-            game.draw_dice()
-
-            # Display current player and game message
-            font = pygame.font.Font(None, 36)
-            player_text = f"{game.get_player_name(game.current_player)}'s turn"
-            text = font.render(player_text, True, game.tokens[game.current_player][0].color)
-            screen.blit(text, (10, 10))
-            
-            if game.game_message:
-                msg_text = font.render(game.game_message, True, BLACK)
-                screen.blit(msg_text, (10, 50))
-
-            pygame.display.flip()
-            clock.tick(FPS)
+            # Draw only what changed; idle frames push nothing to the display
+            dirty = game.render_frame()
+            if dirty:
+                pygame.display.update(dirty)
 
     except Exception as e:
         print(f"Game error: {e}")
@@ -904,4 +818,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,214 @@
+"""Win chances for live positions, refined in the background.
+
+``WinProbability`` answers exactly where that is cheap: a finished game, or
+a race position, which the endgame tablebase solves. Any other position is
+played out many times from where it stands with ``BatchGames``. Rollout
+counts are memoised per position in a bounded LRU, so a position that comes
+back keeps the samples it already has.
+
+``BackgroundEstimator`` refines the latest position it was given on a
+daemon thread. Readers take whatever estimate is newest and never wait for
+one. Rollouts run one batched step at a time, yielding the GIL between
+steps, so a drawing thread is not held up by them.
+
+    python probability.py 51 53 57 57  56 57 57 57  52 52 55 57  54 57 57 57
+    python probability.py 10 -1 -1 -1  5 -1 -1 -1  30 2 -1 -1  -1 -1 -1 -1 --rollouts 4000
+"""
+import argparse
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from batch import BatchGames, STRATEGIES
+from endgame import default_tablebase
+from engine import NUM_PLAYERS, TOKENS_PER_PLAYER
+from state import GameState
+
+# Rollouts abandoned after this many batched turns (a tiny fraction of games)
+MAX_ROLLOUT_TURNS = 2000
+
+
+class Estimate:
+    """Win chance per seat, with the number of rollouts behind it (0 when exact)."""
+
+    __slots__ = ("chances", "samples", "exact")
+
+    def __init__(self, chances, samples=0, exact=False):
+        self.chances = tuple(chances)
+        self.samples = samples
+        self.exact = exact
+
+
+class WinProbability:
+    def __init__(self, tablebase=None, use_tablebase=True, strategy="random", cache_size=4096,
+                 seed=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.tablebase = tablebase
+        self.use_tablebase = use_tablebase
+        self.strategy = strategy
+        self.cache_size = cache_size
+        self.rng = random.Random(seed)
+        # Position key -> Estimate, least recently used first
+        self.memo = OrderedDict()
+        self.lock = threading.Lock()
+
+    def exact(self, state):
+        """Exact chances for finished games and race positions, else None."""
+        winner = state.winner()
+        if winner is not None:
+            return Estimate([float(player == winner) for player in range(NUM_PLAYERS)], exact=True)
+        if self.use_tablebase:
+            if self.tablebase is None:
+                self.tablebase = default_tablebase()
+            chances = self.tablebase.probe(state)
+            if chances is not None:
+                return Estimate(chances, exact=True)
+        return None
+
+    def cached(self, state):
+        with self.lock:
+            estimate = self.memo.get(state.key())
+            if estimate is not None:
+                self.memo.move_to_end(state.key())
+            return estimate
+
+    def store(self, state, estimate):
+        with self.lock:
+            self.memo[state.key()] = estimate
+            self.memo.move_to_end(state.key())
+            if len(self.memo) > self.cache_size:
+                self.memo.popitem(last=False)
+
+    def rollouts(self, state, count, between_steps=None):
+        """Wins per seat over ``count`` games played out from ``state``.
+
+        ``between_steps`` is called after every batched turn; returning True
+        abandons the rollouts and returns None.
+        """
+        games = BatchGames.from_state(state, count, self.rng.getrandbits(63), self.strategy)
+        for _ in range(MAX_ROLLOUT_TURNS):
+            if not games.playing():
+                break
+            games.step()
+            if between_steps is not None and between_steps():
+                return None
+        return games.wins()
+
+    def refine(self, state, count=256, between_steps=None):
+        """Estimate for ``state`` after ``count`` more rollouts, unless it is exact."""
+        estimate = self.cached(state)
+        if estimate is None:
+            estimate = self.exact(state)
+        if estimate is not None and estimate.exact:
+            self.store(state, estimate)
+            return estimate
+
+        wins = self.rollouts(state, count, between_steps)
+        if wins is None:
+            return estimate
+        finished = int(wins.sum())
+        if finished == 0:
+            return estimate
+        # Merge with what is known already, weighting by rollout count
+        if estimate is not None:
+            wins = wins + [chance * estimate.samples for chance in estimate.chances]
+            finished += estimate.samples
+        estimate = Estimate([float(w) / finished for w in wins], finished)
+        self.store(state, estimate)
+        return estimate
+
+    def estimate(self, state, samples=1024):
+        """Blocking estimate with at least ``samples`` rollouts behind it."""
+        estimate = self.cached(state) or self.exact(state)
+        while estimate is None or (not estimate.exact and estimate.samples < samples):
+            estimate = self.refine(state, min(256, samples))
+        return estimate
+
+
+class BackgroundEstimator:
+    """Keeps refining the most recently submitted position on a daemon thread."""
+
+    def __init__(self, probability=None, target_samples=2000, chunk=128, on_update=None):
+        self.probability = WinProbability() if probability is None else probability
+        self.target_samples = target_samples
+        self.chunk = chunk
+        # Called from the worker thread whenever a new estimate is published
+        self.on_update = on_update
+        # Guards pending, which submit() sets from other threads
+        self.lock = threading.Lock()
+        self.pending = None
+        self.current = None
+        self.latest_estimate = None
+        self.wake = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name="win-probability", daemon=True)
+        self.thread.start()
+
+    def submit(self, state):
+        # Replace whatever was being worked on; earlier positions are dropped
+        state = state.copy()
+        with self.lock:
+            self.pending = state
+        self.wake.set()
+
+    def latest(self):
+        """Newest estimate, for the latest position or the one before it; never blocks."""
+        return self.latest_estimate
+
+    def stop(self):
+        self.stopped = True
+        self.wake.set()
+
+    def superseded(self):
+        # Give the GIL away between rollout steps, and stop once there is newer work
+        time.sleep(0)
+        return self.stopped or self.pending is not None
+
+    def publish(self, estimate):
+        self.latest_estimate = estimate
+        if self.on_update is not None:
+            self.on_update(estimate)
+
+    def run(self):
+        while not self.stopped:
+            self.wake.wait()
+            self.wake.clear()
+            with self.lock:
+                state, self.pending = self.pending, None
+            if state is None:
+                continue
+            estimate = self.probability.cached(state)
+            if estimate is not None:
+                self.publish(estimate)
+            while not self.stopped and self.pending is None:
+                if estimate is not None and (estimate.exact or estimate.samples >= self.target_samples):
+                    break
+                refined = self.probability.refine(state, self.chunk, self.superseded)
+                if refined is not None and refined is not estimate:
+                    estimate = refined
+                    self.publish(estimate)
+            if self.pending is not None:
+                self.wake.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Win chances for a position, exact or by rollouts")
+    parser.add_argument("indices", type=int, nargs=NUM_PLAYERS * TOKENS_PER_PLAYER)
+    parser.add_argument("--player", type=int, default=0, help="seat to move")
+    parser.add_argument("--rollouts", type=int, default=2000)
+    parser.add_argument("--strategy", default="random", choices=STRATEGIES)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    probability = WinProbability(strategy=args.strategy, seed=args.seed)
+    start = time.perf_counter()
+    estimate = probability.estimate(GameState(args.indices, args.player), args.rollouts)
+    elapsed = time.perf_counter() - start
+    source = "exact" if estimate.exact else f"{estimate.samples} rollouts"
+    print([round(chance, 4) for chance in estimate.chances], f"({source}, {elapsed * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""Asyncio game server hosting many Ludo tables in one process.
+
+Clients speak newline-delimited JSON over TCP. Every request may carry an
+``id`` that is echoed in its reply:
+
+    {"op": "create"}                              -> {"type": "ok", "table": 1}
+    {"op": "subscribe", "table": 1}               -> full "state", then "update" diffs
+    {"op": "join", "table": 1, "seat": 0}         -> claim a seat
+    {"op": "roll", "table": 1, "seat": 0}
+    {"op": "move", "table": 1, "seat": 0, "token": 2}
+
+Rolls are resolved straight away; the two-second reveal is left to clients.
+Changes made to a table during one event-loop pass go out as a single diff,
+and a subscriber that falls too far behind gets a fresh full state instead of
+the backlog. Replies are never dropped: a client that stops reading them is
+not read from until it catches up. A table is closed once nobody is seated
+at it or subscribed to it.
+
+    python server.py --port 8765
+    python server.py --demo 100
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import deque
+
+from engine import (LudoEngine, NUM_PLAYERS, TOKENS_PER_PLAYER, WAITING_FOR_ROLL,
+                    WAITING_FOR_PIECE, GAME_OVER)
+
+# Messages queued per client before it is treated as a slow reader
+MAX_PENDING = 64
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+class Connection:
+    """One client: replies and broadcasts go out through its queue.
+
+    Broadcasts beyond ``max_pending`` are dropped and their table is marked
+    overflowed; once the backlog has halved, each overflowed table's queued
+    updates are replaced with one full state.
+    """
+
+    def __init__(self, writer, max_pending=MAX_PENDING):
+        self.writer = writer
+        self.max_pending = max_pending
+        # (message, table) pairs; table is None for replies
+        self.messages = deque()
+        self.replies = 0
+        self.broadcasts = 0
+        self.ready = asyncio.Event()
+        self.drained = asyncio.Event()
+        self.overflowed = set()
+        self.tables = set()
+        self.pump_task = asyncio.create_task(self.pump())
+
+    def send(self, message, table=None):
+        if table is None:
+            self.replies += 1
+        elif table in self.overflowed:
+            return
+        elif self.broadcasts >= self.max_pending:
+            self.overflowed.add(table)
+            return
+        else:
+            self.broadcasts += 1
+        self.messages.append((message, table))
+        self.ready.set()
+
+    async def reply(self, message):
+        self.send(message)
+        # Stop taking requests from a client that does not read its replies
+        while self.replies > self.max_pending:
+            if self.pump_task.done():
+                raise ConnectionResetError("Client stopped reading")
+            self.drained.clear()
+            await self.drained.wait()
+
+    async def pump(self):
+        try:
+            while True:
+                while not self.messages:
+                    self.ready.clear()
+                    await self.ready.wait()
+                message, table = self.messages.popleft()
+                if message is None:
+                    break
+                if table is None:
+                    self.replies -= 1
+                else:
+                    self.broadcasts -= 1
+                self.writer.write(encode(message))
+                await self.writer.drain()
+                self.drained.set()
+                if self.overflowed and self.broadcasts <= self.max_pending // 2:
+                    for table in list(self.overflowed):
+                        self.resync(table)
+        finally:
+            self.drained.set()
+
+    def resync(self, table):
+        # Swap the table's queued updates for its current full state
+        kept = deque(item for item in self.messages if item[1] is not table)
+        self.broadcasts -= len(self.messages) - len(kept)
+        self.messages = kept
+        self.overflowed.discard(table)
+        if self in table.subscribers:
+            self.send(table.full_state(), table)
+
+    async def close(self):
+        if len(self.messages) > self.max_pending:
+            # Too far behind to be worth flushing
+            self.pump_task.cancel()
+        else:
+            self.messages.append((None, None))
+            self.ready.set()
+        try:
+            await self.pump_task
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        self.writer.close()
+
+
+class Table:
+    def __init__(self, table_id):
+        self.table_id = table_id
+        self.engine = LudoEngine()
+        self.lock = asyncio.Lock()
+        self.seats = {}
+        self.subscribers = set()
+        self.seq = 0
+        self.published = self.snapshot()
+        self.flush_pending = False
+
+    def snapshot(self):
+        engine = self.engine
+        return {
+            "positions": [token.path_index for player in range(NUM_PLAYERS)
+                          for token in engine.tokens[player]],
+            "current_player": engine.current_player,
+            "dice": engine.dice_value,
+            "state": engine.state,
+            "winner": engine.winner,
+            "message": engine.game_message,
+        }
+
+    def full_state(self):
+        return {"type": "state", "table": self.table_id, "seq": self.seq, **self.published}
+
+    def diff(self, old, new):
+        changes = {key: value for key, value in new.items()
+                   if key != "positions" and value != old[key]}
+        moved = [[slot, index] for slot, (before, index)
+                 in enumerate(zip(old["positions"], new["positions"])) if before != index]
+        if moved:
+            changes["positions"] = moved
+        return changes
+
+    def changed(self):
+        # Coalesce everything done in this loop pass into one broadcast
+        if not self.flush_pending:
+            self.flush_pending = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self):
+        self.flush_pending = False
+        current = self.snapshot()
+        changes = self.diff(self.published, current)
+        self.published = current
+        if changes:
+            self.seq += 1
+            update = {"type": "update", "table": self.table_id, "seq": self.seq, "changes": changes}
+            for connection in self.subscribers:
+                connection.send(update, self)
+
+    def check_seat(self, connection, seat):
+        if self.seats.get(seat) is not connection:
+            raise ValueError("You do not hold that seat")
+        if self.engine.current_player != seat:
+            raise ValueError("Not your turn")
+
+    async def roll(self, connection, seat):
+        async with self.lock:
+            self.check_seat(connection, seat)
+            if self.engine.state != WAITING_FOR_ROLL:
+                raise ValueError("Cannot roll now")
+            self.engine.roll_dice()
+            self.engine.resolve_roll()
+            self.changed()
+            return self.engine.dice_value
+
+    async def move(self, connection, seat, token_index):
+        async with self.lock:
+            self.check_seat(connection, seat)
+            if self.engine.state != WAITING_FOR_PIECE:
+                raise ValueError("Roll first")
+            if not 0 <= token_index < TOKENS_PER_PLAYER:
+                raise ValueError("No such token")
+            if not self.engine.play_token(self.engine.tokens[seat][token_index]):
+                raise ValueError("Illegal move")
+            self.changed()
+
+
+class GameServer:
+    def __init__(self, max_pending=MAX_PENDING):
+        self.max_pending = max_pending
+        self.tables = {}
+        self.table_ids = itertools.count(1)
+
+    def create_table(self):
+        table = Table(next(self.table_ids))
+        self.tables[table.table_id] = table
+        return table
+
+    def release(self, connection, table):
+        # Drop the client from the table, and the table once nobody is left at it
+        table.subscribers.discard(connection)
+        connection.overflowed.discard(table)
+        for seat, holder in list(table.seats.items()):
+            if holder is connection:
+                del table.seats[seat]
+        connection.tables.discard(table)
+        if not table.subscribers and not table.seats:
+            self.tables.pop(table.table_id, None)
+
+    def get_table(self, request):
+        table = self.tables.get(request.get("table"))
+        if table is None:
+            raise ValueError("No such table")
+        return table
+
+    async def dispatch(self, connection, request):
+        op = request.get("op")
+        if op == "create":
+            table = self.create_table()
+            # Kept while its creator is connected, so others have time to join
+            connection.tables.add(table)
+            return {"table": table.table_id}
+
+        table = self.get_table(request)
+        if op == "subscribe":
+            table.subscribers.add(connection)
+            connection.tables.add(table)
+            connection.send(table.full_state(), table)
+            return {}
+        if op == "unsubscribe":
+            table.subscribers.discard(connection)
+            connection.overflowed.discard(table)
+            return {}
+        if op == "join":
+            seat = request.get("seat")
+            if seat not in range(NUM_PLAYERS):
+                raise ValueError("No such seat")
+            if table.seats.setdefault(seat, connection) is not connection:
+                raise ValueError("Seat taken")
+            connection.tables.add(table)
+            return {}
+        if op == "roll":
+            return {"dice": await table.roll(connection, request.get("seat"))}
+        if op == "move":
+            await table.move(connection, request.get("seat"), request.get("token"))
+            return {}
+        raise ValueError(f"Unknown op: {op}")
+
+    async def handle_client(self, reader, writer):
+        connection = Connection(writer, self.max_pending)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    reply = {"type": "ok", **await self.dispatch(connection, request)}
+                except (ValueError, TypeError, AttributeError) as e:
+                    reply = {"type": "error", "message": str(e)}
+                if isinstance(request, dict) and "id" in request:
+                    reply["id"] = request["id"]
+                await connection.reply(reply)
+        except ConnectionError:
+            pass
+        finally:
+            # Free the client's seats and subscriptions
+            for table in list(connection.tables):
+                self.release(connection, table)
+            await connection.close()
+
+    async def start(self, host="127.0.0.1", port=8765):
+        return await asyncio.start_server(self.handle_client, host, port, limit=2 ** 16)
+
+
+class TestClient:
+    """Minimal client that mirrors table state from the update stream."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.request_ids = itertools.count(1)
+        self.waiting = {}
+        self.states = {}
+        self.updated = asyncio.Event()
+        self.read_task = asyncio.create_task(self.read_loop())
+
+    @classmethod
+    async def connect(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port, limit=2 ** 16)
+        return cls(reader, writer)
+
+    async def read_loop(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            if "id" in message:
+                self.waiting.pop(message["id"]).set_result(message)
+            elif message["type"] == "state":
+                self.states[message["table"]] = message
+                self.updated.set()
+            elif message["type"] == "update":
+                state = self.states[message["table"]]
+                changes = dict(message["changes"])
+                for slot, index in changes.pop("positions", []):
+                    state["positions"][slot] = index
+                state.update(changes, seq=message["seq"])
+                self.updated.set()
+
+    async def request(self, **request):
+        request["id"] = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request["id"]] = future
+        self.writer.write(encode(request))
+        reply = await future
+        if reply["type"] == "error":
+            raise ValueError(reply["message"])
+        return reply
+
+    async def play_random_game(self, rng):
+        # Take every seat at a new table and play random legal moves to the end
+        table = (await self.request(op="create"))["table"]
+        await self.request(op="subscribe", table=table)
+        for seat in range(NUM_PLAYERS):
+            await self.request(op="join", table=table, seat=seat)
+
+        while True:
+            state = self.states[table]
+            if state["state"] == GAME_OVER:
+                return state["winner"]
+            seat = state["current_player"]
+            seq = state["seq"]
+            if state["state"] == WAITING_FOR_ROLL:
+                await self.request(op="roll", table=table, seat=seat)
+            else:
+                tokens = list(range(TOKENS_PER_PLAYER))
+                rng.shuffle(tokens)
+                for token in tokens:
+                    try:
+                        await self.request(op="move", table=table, seat=seat, token=token)
+                        break
+                    except ValueError:
+                        continue
+            # Wait for the broadcast describing what we just did
+            while self.states[table]["seq"] == seq:
+                self.updated.clear()
+                await self.updated.wait()
+
+    async def close(self):
+        self.writer.close()
+        self.read_task.cancel()
+
+
+async def run_demo(num_tables, port):
+    server = GameServer()
+    listener = await server.start(port=port)
+    port = listener.sockets[0].getsockname()[1]
+    rng = random.Random(0)
+
+    async def play():
+        client = await TestClient.connect("127.0.0.1", port)
+        try:
+            return await client.play_random_game(rng)
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    winners = await asyncio.gather(*(play() for _ in range(num_tables)))
+    elapsed = time.perf_counter() - start
+    listener.close()
+    print(f"{num_tables} tables finished in {elapsed:.1f}s, wins per seat "
+          f"{[winners.count(seat) for seat in range(NUM_PLAYERS)]}")
+
+
+async def serve(host, port):
+    listener = await GameServer().start(host, port)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host Ludo tables over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--demo", type=int, metavar="TABLES",
+                        help="play this many random games against an in-process server and exit")
+    args = parser.parse_args(argv)
+
+    if args.demo:
+        asyncio.run(run_demo(args.demo, 0))
+    else:
+        asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
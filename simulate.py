@@ -0,0 +1,201 @@
+"""Batch Monte Carlo simulation of headless Ludo games.
+
+Games are split into chunks that run on a multiprocessing pool. Every chunk
+seeds its own RNG and dice stream from the master seed and the chunk number,
+so the totals are the same whatever the worker count or completion order.
+
+    python simulate.py --games 100000 --seed 1 --strategies random furthest random random
+"""
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+
+from ai import GreedyPlayer, LinearPlayer, ExpectiminimaxPlayer, MCTSPlayer
+from dice import DiceSource
+from engine import NUM_PLAYERS, TOKENS_PER_PLAYER, PLAYER_NAMES
+from state import GameState, PASS
+
+# Games are abandoned after this many turns (never reached in practice)
+MAX_TURNS = 10000
+
+
+def random_strategy(state, moves, dice, rng):
+    return rng.choice(moves)
+
+
+def first_strategy(state, moves, dice, rng):
+    return moves[0]
+
+
+def furthest_strategy(state, moves, dice, rng):
+    # Advance the token closest to home, bringing new tokens out last
+    base = state.current_player * TOKENS_PER_PLAYER
+    return max(moves, key=lambda token: state.indices[base + token])
+
+
+def nearest_strategy(state, moves, dice, rng):
+    # Prefer bringing tokens out, then the one furthest behind
+    base = state.current_player * TOKENS_PER_PLAYER
+    return min(moves, key=lambda token: state.indices[base + token])
+
+
+# Plain functions are shared; player classes are built per seat by make_player,
+# since search players keep per-search state and a large transposition table
+STRATEGIES = {
+    "random": random_strategy,
+    "first": first_strategy,
+    "furthest": furthest_strategy,
+    "nearest": nearest_strategy,
+    "greedy": GreedyPlayer,
+    "linear": LinearPlayer,
+    "expectiminimax": ExpectiminimaxPlayer,
+    "mcts": MCTSPlayer,
+}
+
+
+def make_player(name):
+    strategy = STRATEGIES[name]
+    return strategy() if isinstance(strategy, type) else strategy
+
+
+class SimulationStats:
+    """Additive totals over a batch of games."""
+
+    def __init__(self):
+        self.games = 0
+        self.wins = [0] * NUM_PLAYERS
+        self.unfinished = 0
+        self.turns = 0
+        self.captures = 0
+        self.forfeits = 0
+
+    def merge(self, other):
+        self.games += other.games
+        self.wins = [a + b for a, b in zip(self.wins, other.wins)]
+        self.unfinished += other.unfinished
+        self.turns += other.turns
+        self.captures += other.captures
+        self.forfeits += other.forfeits
+        return self
+
+    def win_rates(self):
+        return [wins / self.games if self.games else 0.0 for wins in self.wins]
+
+    def as_dict(self):
+        return {
+            "games": self.games,
+            "wins": list(self.wins),
+            "win_rates": self.win_rates(),
+            "unfinished": self.unfinished,
+            "average_turns": self.turns / self.games if self.games else 0.0,
+            "captures": self.captures,
+            "forfeits": self.forfeits,
+        }
+
+
+def play_game(rng, strategies, stats, recorder=None, dice_source=None):
+    # Play one game to the end and add it to stats (and the recorder, if any)
+    if dice_source is None:
+        dice_source = DiceSource(rng.getrandbits(63))
+    roll = dice_source.roll
+    state = GameState()
+    for turn in range(1, MAX_TURNS + 1):
+        dice = roll()
+        if dice == 6 and state.consecutive_sixes == 2:
+            stats.forfeits += 1
+
+        moves = state.legal_moves(dice)
+        token = strategies[state.current_player](state, moves, dice, rng) if moves else PASS
+        undo = state.apply_move(token, dice)
+        if recorder is not None:
+            recorder.record(dice, token)
+
+        if token != PASS:
+            if undo[5] != PASS:
+                stats.captures += 1
+            winner = state.winner()
+            if winner is not None:
+                stats.games += 1
+                stats.wins[winner] += 1
+                stats.turns += turn
+                return winner
+
+    stats.games += 1
+    stats.unfinished += 1
+    stats.turns += MAX_TURNS
+    return None
+
+
+def chunk_rng(seed, chunk):
+    return random.Random(f"{seed}:{chunk}")
+
+
+def run_chunk(args):
+    seed, chunk, games, strategy_names = args
+    rng = chunk_rng(seed, chunk)
+    dice_source = DiceSource(seed, chunk)
+    strategies = [make_player(name) for name in strategy_names]
+    stats = SimulationStats()
+    for _ in range(games):
+        play_game(rng, strategies, stats, dice_source=dice_source)
+    return stats
+
+
+def iter_chunks(num_games, seed, chunk_size, strategy_names):
+    for chunk, start in enumerate(range(0, num_games, chunk_size)):
+        yield seed, chunk, min(chunk_size, num_games - start), tuple(strategy_names)
+
+
+def simulate(num_games, seed=0, workers=None, chunk_size=1000, strategies=("random",) * NUM_PLAYERS):
+    """Yield running totals as each chunk of games finishes.
+
+    The last value yielded covers all ``num_games`` games.
+    """
+    for name in strategies:
+        if name not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {name}")
+    if len(strategies) != NUM_PLAYERS:
+        raise ValueError(f"Need one strategy per seat ({NUM_PLAYERS})")
+
+    chunks = iter_chunks(num_games, seed, chunk_size, strategies)
+    total = SimulationStats()
+
+    if workers == 1:
+        for args in chunks:
+            yield total.merge(run_chunk(args))
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        for stats in pool.imap_unordered(run_chunk, chunks):
+            yield total.merge(stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate Ludo games without rendering")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--strategies", nargs=NUM_PLAYERS, default=["random"] * NUM_PLAYERS,
+                        choices=sorted(STRATEGIES))
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    stats = SimulationStats()
+    for stats in simulate(args.games, args.seed, args.workers, args.chunk_size, args.strategies):
+        print(f"\r{stats.games}/{args.games} games", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    for player, rate in enumerate(stats.win_rates()):
+        print(f"{PLAYER_NAMES[player]:<7} {args.strategies[player]:<9} {rate:.4f}")
+    summary = stats.as_dict()
+    print(f"average turns {summary['average_turns']:.1f}, captures {stats.captures}, "
+          f"forfeits {stats.forfeits}, unfinished {stats.unfinished}")
+    print(f"{stats.games / elapsed:.0f} games/s")
+
+
+if __name__ == "__main__":
+    main()
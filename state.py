@@ -0,0 +1,151 @@
+"""Compact game state for search and rollouts.
+
+A position is 16 path indices in an ``array('b')`` (slot = player * 4 + token)
+plus the player to move, the six streak and the last dice value. Copying one
+is a few dozen bytes, and ``apply_move`` / ``undo_move`` let search code walk
+the tree in place instead of copying at all. ``zobrist`` is a 64-bit hash of
+everything but the dice, updated incrementally as moves are applied.
+"""
+from array import array
+
+from engine import (NUM_PLAYERS, TOKENS_PER_PLAYER, YARD, PASS, HOME_INDEX, PATH_SPAN, DICE_SPAN,
+                    MOVE_INDEX, MOVE_CELL, MOVE_SAFE, LEGAL_ROWS, PATH_CELL_IDS,
+                    ZOBRIST_TOKEN, ZOBRIST_PLAYER, ZOBRIST_SIXES, zobrist_hash, STANDARD)
+
+NUM_SLOTS = NUM_PLAYERS * TOKENS_PER_PLAYER
+
+
+class GameState:
+    __slots__ = ("indices", "current_player", "consecutive_sixes", "dice_value", "zobrist")
+
+    def __init__(self, indices=None, current_player=0, consecutive_sixes=0, dice_value=1):
+        self.indices = array('b', [YARD] * NUM_SLOTS) if indices is None else array('b', indices)
+        self.current_player = current_player
+        self.consecutive_sixes = consecutive_sixes
+        self.dice_value = dice_value
+        self.zobrist = zobrist_hash(self.indices, current_player, consecutive_sixes)
+
+    @classmethod
+    def from_engine(cls, engine):
+        if engine.geometry.key != STANDARD.key:
+            raise ValueError("GameState only describes the standard four-player board")
+        indices = [token.path_index for player in range(NUM_PLAYERS)
+                   for token in engine.tokens[player]]
+        # The engine counts a six when it is rolled, apply_move when it is played
+        sixes = engine.consecutive_sixes
+        if engine.dice_rolled and engine.dice_value == 6:
+            sixes -= 1
+        return cls(indices, engine.current_player, sixes, engine.dice_value)
+
+    def apply_to(self, engine):
+        # Move the engine's tokens to match this state
+        for player in range(NUM_PLAYERS):
+            for token in engine.tokens[player]:
+                path_index = self.indices[player * TOKENS_PER_PLAYER + token.index]
+                if path_index == YARD:
+                    token.reset()
+                else:
+                    token.place(path_index)
+        engine.current_player = self.current_player
+        engine.consecutive_sixes = self.consecutive_sixes
+        engine.dice_value = self.dice_value
+        engine.rehash()
+
+    def copy(self):
+        return GameState(self.indices, self.current_player, self.consecutive_sixes,
+                         self.dice_value)
+
+    def key(self):
+        return self.indices.tobytes() + bytes((self.current_player, self.consecutive_sixes,
+                                               self.dice_value))
+
+    def __eq__(self, other):
+        return isinstance(other, GameState) and self.key() == other.key()
+
+    def __hash__(self):
+        return self.zobrist
+
+    def legal_moves(self, dice):
+        # A third six forfeits the turn whatever the board looks like
+        if dice == 6 and self.consecutive_sixes == 2:
+            return []
+        player = self.current_player
+        base = player * TOKENS_PER_PLAYER
+        legal, indices = LEGAL_ROWS[player][dice], self.indices
+        # Rows start at YARD, so a token's place in the row is its path index + 1
+        return [token for token in range(TOKENS_PER_PLAYER) if legal[indices[base + token] + 1]]
+
+    def winner(self):
+        for player in range(NUM_PLAYERS):
+            base = player * TOKENS_PER_PLAYER
+            home = HOME_INDEX[player]
+            if all(self.indices[base + i] == home for i in range(TOKENS_PER_PLAYER)):
+                return player
+        return None
+
+    def apply_move(self, token, dice):
+        """Roll ``dice`` and move ``token`` (or PASS) for the player to move.
+
+        Returns an undo record for ``undo_move``.
+        """
+        player = self.current_player
+        undo = (player, self.consecutive_sixes, self.dice_value, PASS, YARD, PASS, YARD,
+                self.zobrist)
+        self.dice_value = dice
+
+        if dice == 6:
+            self.zobrist ^= (ZOBRIST_SIXES[self.consecutive_sixes]
+                             ^ ZOBRIST_SIXES[self.consecutive_sixes + 1])
+            self.consecutive_sixes += 1
+            if self.consecutive_sixes == 3:
+                self._next_turn()
+                return undo
+
+        if token == PASS:
+            self._next_turn()
+            return undo
+
+        slot = player * TOKENS_PER_PLAYER + token
+        old_index = self.indices[slot]
+        move = (player * DICE_SPAN + dice) * PATH_SPAN + old_index + 1
+        new_index = MOVE_INDEX[move]
+        self.indices[slot] = new_index
+        keys = ZOBRIST_TOKEN[slot]
+        self.zobrist ^= keys[old_index + 1] ^ keys[new_index + 1]
+
+        # Capture the first opponent token sharing an unsafe cell
+        captured, captured_index = PASS, YARD
+        if not MOVE_SAFE[move]:
+            cell = MOVE_CELL[move]
+            for other in range(NUM_SLOTS):
+                if other // TOKENS_PER_PLAYER == player:
+                    continue
+                other_index = self.indices[other]
+                if other_index != YARD and PATH_CELL_IDS[other // TOKENS_PER_PLAYER][other_index] == cell:
+                    captured, captured_index = other, other_index
+                    self.indices[other] = YARD
+                    self.zobrist ^= ZOBRIST_TOKEN[other][other_index + 1]
+                    break
+
+        # A six earns another roll
+        if dice != 6:
+            self._next_turn()
+        return undo[:3] + (slot, old_index, captured, captured_index, undo[7])
+
+    def undo_move(self, undo):
+        player, sixes, dice, slot, old_index, captured, captured_index, zobrist = undo
+        if captured != PASS:
+            self.indices[captured] = captured_index
+        if slot != PASS:
+            self.indices[slot] = old_index
+        self.current_player = player
+        self.consecutive_sixes = sixes
+        self.dice_value = dice
+        self.zobrist = zobrist
+
+    def _next_turn(self):
+        player = (self.current_player + 1) % NUM_PLAYERS
+        self.zobrist ^= (ZOBRIST_PLAYER[self.current_player] ^ ZOBRIST_PLAYER[player]
+                         ^ ZOBRIST_SIXES[self.consecutive_sixes] ^ ZOBRIST_SIXES[0])
+        self.current_player = player
+        self.consecutive_sixes = 0
@@ -0,0 +1,49 @@
+"""Search players must answer within their time limit, every move."""
+import gc
+import random
+import time
+
+from ai import ExpectiminimaxPlayer, TIME_MARGIN
+from state import GameState, PASS
+
+TIME_LIMIT = 0.05
+
+
+def choice_positions(seed, count):
+    # Positions from random games where the player to move has a real choice
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = GameState()
+        while state.winner() is None and len(positions) < count:
+            dice = rng.randint(1, 6)
+            moves = state.legal_moves(dice)
+            if len(moves) > 1:
+                positions.append((state.copy(), dice))
+            state.apply_move(rng.choice(moves) if moves else PASS, dice)
+    return positions
+
+
+def full_collection_time():
+    start = time.perf_counter()
+    gc.collect()
+    return time.perf_counter() - start
+
+
+def test_expectiminimax_move_time():
+    positions = choice_positions(0, 150)
+    before = full_collection_time()
+    player = ExpectiminimaxPlayer(time_limit=TIME_LIMIT)
+    # The first move loads the tablebase, which no move's budget covers
+    player.choose(*positions[0])
+    times = []
+    for state, dice in positions:
+        start = time.perf_counter()
+        player.choose(state, dice)
+        times.append(time.perf_counter() - start)
+    assert max(times) < TIME_LIMIT
+
+    # A full garbage collection can land in any move; the transposition
+    # table must not make it longer than the time the margin leaves over
+    extra = full_collection_time() - before
+    assert extra < TIME_LIMIT * (1 - TIME_MARGIN) / 2
@@ -0,0 +1,46 @@
+"""analytics.analyze totals against the simulator's own counts for the same games."""
+import pytest
+
+from analytics import CaptureRates, analyze, feed, iter_records
+from engine import PLAYER_NAMES
+from gamelog import GameArchive, record_games
+
+NUM_GAMES = 30
+
+
+@pytest.fixture(scope="module")
+def recorded(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("archive") / "games.ludo")
+    stats = record_games(path, NUM_GAMES, seed=2)
+    assert stats.unfinished == 0
+    return path, stats
+
+
+def test_totals_match_simulation(recorded):
+    path, stats = recorded
+    results = analyze(path, workers=1, games_per_chunk=7)
+
+    turns = results["turns"]
+    assert turns["finished"] == NUM_GAMES
+    assert turns["average_turns"] == pytest.approx(stats.turns / NUM_GAMES)
+
+    assert results["forfeits"]["forfeits"] == stats.forfeits
+    assert results["forfeits"]["per_turn"] == pytest.approx(stats.forfeits / stats.turns)
+
+    shares = results["seats"]
+    assert [shares[name] * NUM_GAMES for name in PLAYER_NAMES] == pytest.approx(stats.wins)
+
+    assert all(0.0 <= rate <= 1.0 for rate in results["captures"].values())
+    with GameArchive(path) as archive:
+        captures, = feed(iter_records(archive), [CaptureRates()])
+        longest = max(record.turn_count for record in iter_records(archive))
+    assert sum(captures.captures.values()) == stats.captures
+    assert turns["longest"] == longest
+
+
+def test_chunks_and_workers_agree(recorded):
+    path, _ = recorded
+    # Partials are merged from whole counts, so the results are exact
+    whole = analyze(path, workers=1, games_per_chunk=NUM_GAMES)
+    assert analyze(path, workers=1, games_per_chunk=4) == whole
+    assert analyze(path, workers=2, games_per_chunk=4) == whole
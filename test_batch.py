@@ -0,0 +1,82 @@
+"""BatchGames against GameState, one game at a time and as a compacting batch."""
+import numpy as np
+import pytest
+
+from batch import BatchGames
+from dice import DiceSource
+from simulate import STRATEGIES
+from state import GameState, PASS
+
+
+def state_positions(seed, strategy):
+    dice = DiceSource(seed)
+    state = GameState()
+    positions = []
+    while state.winner() is None:
+        roll = dice.roll()
+        moves = state.legal_moves(roll)
+        state.apply_move(strategy(state, moves, roll, None) if moves else PASS, roll)
+        positions.append((list(state.indices), state.current_player, state.consecutive_sixes))
+    return positions
+
+
+def batch_positions(seed, strategy_name):
+    # The parts of step() without compaction, which would drop the final board
+    games = BatchGames(1, seed, strategy_name)
+    positions = []
+    while games.live.any():
+        games.roll()
+        legal = games.legal_mask()
+        games.apply(games.choose(legal), legal)
+        positions.append((games.positions[0].reshape(-1).tolist(), int(games.current_player[0]),
+                          int(games.consecutive_sixes[0])))
+    return positions
+
+
+@pytest.mark.parametrize("strategy_name", ["first", "furthest"])
+@pytest.mark.parametrize("seed", range(20))
+def test_same_games_as_state(seed, strategy_name):
+    expected = state_positions(seed, STRATEGIES[strategy_name])
+    positions = batch_positions(seed, strategy_name)
+    assert positions[:-1] == expected[:-1]
+    # The winner keeps the turn here, GameState passes it on
+    assert positions[-1][0] == expected[-1][0]
+
+
+class RecordingGames(BatchGames):
+    """Logs (dice, token, board) per game number for every turn it plays."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.log = [[] for _ in range(self.num_games)]
+        self.sizes = set()
+
+    def apply(self, tokens, legal, dice=None):
+        ids, rolled, live = self.ids, self.dice.copy(), self.live.copy()
+        self.sizes.add(len(ids))
+        moved = super().apply(tokens, legal, dice)
+        for row in np.flatnonzero(live):
+            token = int(tokens[row]) if moved[row] else PASS
+            self.log[ids[row]].append((int(rolled[row]), token,
+                                       self.positions[row].reshape(-1).tolist()))
+        return moved
+
+
+def test_compacted_games_replay():
+    games = RecordingGames(64, 3, "random")
+    games.run()
+    assert not games.playing() and not games.active.any()
+    # Finished games really were dropped along the way
+    assert len(games.sizes) > 2
+
+    for game, turns in enumerate(games.log):
+        state = GameState()
+        captures = 0
+        for dice, token, board in turns:
+            undo = state.apply_move(token, dice)
+            captures += undo[5] != PASS
+            assert list(state.indices) == board
+        assert games.winner[game] == state.winner()
+        assert games.turns[game] == len(turns)
+        assert games.captures[game] == captures
+    assert games.wins().sum() == games.num_games
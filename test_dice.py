@@ -0,0 +1,54 @@
+"""DiceSource gives the same dice however they are read: one by one, in blocks or after a seek."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from dice import DiceSource, FACES
+
+
+@pytest.fixture(scope="module")
+def sequence():
+    # Small blocks, so the rolls cross many block boundaries
+    source = DiceSource(11, block_size=64)
+    return [source.roll() for _ in range(2000)]
+
+
+def test_rolls_are_fair_faces(sequence):
+    counts = [sequence.count(face) for face in range(1, FACES + 1)]
+    assert sum(counts) == len(sequence)
+    assert min(counts) > len(sequence) / FACES * 0.8
+
+
+@pytest.mark.parametrize("start, count", [(0, 10), (1, 7), (3, 64), (63, 130), (1001, 999)])
+def test_block_matches_sequence(sequence, start, count):
+    assert DiceSource(11).block(start, count).tolist() == sequence[start:start + count]
+
+
+def test_seek_matches_sequence(sequence):
+    source = DiceSource(11, block_size=64)
+    for start in (1500, 5, 66, 0):
+        source.seek(start)
+        assert source.position == start
+        assert [source.roll() for _ in range(100)] == sequence[start:start + 100]
+        assert source.position == start + 100
+
+
+def test_rolls_continue_the_sequence(sequence):
+    source = DiceSource(11, block_size=64)
+    first = [source.roll() for _ in range(37)]
+    assert first + source.rolls(500).tolist() + [source.roll()] == sequence[:538]
+
+
+def test_streams(sequence):
+    source = DiceSource(11)
+    assert source.spawn(1).rolls(100).tolist() == DiceSource(11, 1).rolls(100).tolist()
+    assert source.spawn(1).rolls(100).tolist() != sequence[:100]
+    assert source.spawn(1).rolls(100).tolist() != source.spawn(2).rolls(100).tolist()
+
+
+def test_engine_import_skips_numpy():
+    check = "import sys, engine; assert 'numpy' not in sys.modules"
+    subprocess.run([sys.executable, "-c", check], cwd=os.path.dirname(os.path.abspath(__file__)),
+                   check=True)
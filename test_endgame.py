@@ -0,0 +1,110 @@
+"""The race tablebase against win chances worked out independently for
+races of one token per player, and its file written by ``build``.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from endgame import RACE_LENGTH, RaceTablebase, build, encode
+from engine import NUM_PLAYERS, TOKENS_PER_PLAYER, HOME_INDEX
+from state import GameState
+
+
+def turn_outcomes(distance):
+    """Distances a lone token can end one turn at, with their chances."""
+    outcomes = {}
+
+    def roll(distance, sixes, chance):
+        for dice in range(1, 7):
+            p = chance / 6
+            if dice == 6 and sixes == 2:
+                # Third six: the turn is forfeited
+                outcomes[distance] = outcomes.get(distance, 0.0) + p
+            elif dice > distance:
+                # Nothing to move, and no extra roll
+                outcomes[distance] = outcomes.get(distance, 0.0) + p
+            elif dice == 6 and dice < distance:
+                roll(distance - dice, sixes + 1, p)
+            else:
+                outcomes[distance - dice] = outcomes.get(distance - dice, 0.0) + p
+
+    roll(distance, 0, 1.0)
+    return outcomes
+
+
+def finished_by(distance, turns):
+    # Chance the token is home within the current turn plus k more, for every k
+    chances = {distance: 1.0}
+    result = []
+    for _ in range(turns):
+        after = {}
+        for start, chance in chances.items():
+            if start == 0:
+                after[0] = after.get(0, 0.0) + chance
+                continue
+            for end, p in turn_outcomes(start).items():
+                after[end] = after.get(end, 0.0) + chance * p
+        chances = after
+        result.append(chances.get(0, 0.0))
+    return result
+
+
+def race_chances(distances, turns=200):
+    # Seats in turn order from seat 0; a seat wins the first round it finishes
+    # in, unless an earlier seat finished that round
+    rows = [finished_by(distance, turns) for distance in distances]
+    wins = [0.0] * NUM_PLAYERS
+    for k in range(turns):
+        for i, row in enumerate(rows):
+            chance = row[k] - (row[k - 1] if k else 0.0)
+            for j, other in enumerate(rows):
+                if j < i:
+                    chance *= 1.0 - other[k]
+                elif j > i and k:
+                    chance *= 1.0 - other[k - 1]
+            wins[i] += chance
+    return wins
+
+
+@pytest.fixture(scope="module")
+def tablebase():
+    return RaceTablebase(data=encode())
+
+
+@pytest.mark.parametrize("distances", [(1, 1, 1, 1), (1, 3, 5, 6), (6, 2, 4, 1),
+                                       (RACE_LENGTH,) * NUM_PLAYERS])
+def test_tablebase_single_token_races(tablebase, distances):
+    indices = []
+    for player, distance in enumerate(distances):
+        home = HOME_INDEX[player]
+        indices += [home - distance] + [home] * (TOKENS_PER_PLAYER - 1)
+    chances = tablebase.probe(GameState(indices))
+    assert chances == pytest.approx(race_chances(distances), abs=1e-5)
+
+
+def test_tablebase_closed_form(tablebase):
+    # Every seat one step from home: each turn finishes with a one, 1/6
+    indices = [HOME_INDEX[player] - (i == 0) for player in range(NUM_PLAYERS)
+               for i in range(TOKENS_PER_PLAYER)]
+    miss = np.array([(5 / 6) ** seat for seat in range(NUM_PLAYERS)])
+    expected = miss / miss.sum()
+    assert tablebase.probe(GameState(indices)) == pytest.approx(expected, abs=1e-5)
+    # Not a race while a token is still in the yard
+    indices[1] = -1
+    assert tablebase.probe(GameState(indices)) is None
+
+
+def test_build_writes_the_encoded_table(tmp_path, tablebase):
+    path = tmp_path / "race.tb"
+    build(str(path))
+    # Renamed into place, nothing left behind
+    assert os.listdir(tmp_path) == ["race.tb"]
+    mapped = RaceTablebase(str(path))
+    try:
+        assert path.read_bytes() == bytes(tablebase.buffer)
+        indices = [HOME_INDEX[player] - 3 * (i == 0) for player in range(NUM_PLAYERS)
+                   for i in range(TOKENS_PER_PLAYER)]
+        assert mapped.probe(GameState(indices)) == tablebase.probe(GameState(indices))
+    finally:
+        mapped.close()
@@ -0,0 +1,67 @@
+"""LinearEvaluator weights: saved and loaded intact, trained once and shared by the "linear" strategy."""
+import random
+
+import numpy as np
+import pytest
+
+import evaluator
+from ai import LinearPlayer
+from engine import PASS
+from simulate import make_player
+from state import GameState
+
+
+@pytest.fixture
+def shared(tmp_path, monkeypatch):
+    # A fresh, small shared evaluator written under tmp_path
+    monkeypatch.setattr(evaluator, "DEFAULT_PATH", str(tmp_path / "linear.npz"))
+    monkeypatch.setattr(evaluator, "CACHE_PATH", str(tmp_path / "cache" / "linear.npz"))
+    monkeypatch.setattr(evaluator, "DEFAULT_GAMES", 50)
+    monkeypatch.setattr(evaluator, "_default", None)
+    return tmp_path
+
+
+def test_save_and_load(tmp_path):
+    weights = np.arange(evaluator.NUM_FEATURES, dtype=np.float32) / 10
+    path = str(tmp_path / "weights.npz")
+    evaluator.LinearEvaluator(weights).save(path)
+    assert [p.name for p in tmp_path.iterdir()] == ["weights.npz"]
+    assert np.array_equal(evaluator.LinearEvaluator.load(path).weights, weights)
+
+
+def test_win_chances_sum_to_one():
+    weights = np.random.default_rng(0).normal(size=evaluator.NUM_FEATURES)
+    states = [GameState()]
+    for token, dice in ((0, 6), (0, 4), (1, 6)):
+        states.append(states[-1].copy())
+        states[-1].apply_move(token, dice)
+    chances = evaluator.LinearEvaluator(weights).evaluate(states)
+    assert chances.shape == (len(states), 4)
+    assert np.allclose(chances.sum(axis=1), 1)
+
+
+def test_default_evaluator_is_trained_once(shared):
+    first = evaluator.default_evaluator()
+    assert (shared / "linear.npz").exists()
+    assert evaluator.default_evaluator() is first
+
+    # Later processes load the saved weights instead of training again
+    evaluator._default = None
+    assert np.array_equal(evaluator.default_evaluator().weights, first.weights)
+
+
+def test_linear_strategy_plays_legal_moves(shared):
+    player = make_player("linear")
+    assert isinstance(player, LinearPlayer)
+    assert player.evaluator is evaluator.default_evaluator()
+
+    rng = random.Random(3)
+    state = GameState()
+    for _ in range(200):
+        dice = rng.randint(1, 6)
+        moves = state.legal_moves(dice)
+        token = player(state, moves, dice, rng) if moves else PASS
+        assert token in moves or not moves
+        state.apply_move(token, dice)
+        if state.winner() is not None:
+            break
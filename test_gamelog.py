@@ -0,0 +1,47 @@
+"""Game logs must rebuild every position a direct replay reaches."""
+import random
+
+import pytest
+
+from dice import DiceSource
+from engine import NUM_PLAYERS
+from gamelog import ArchiveWriter, GameArchive, GameRecorder
+from simulate import STRATEGIES, play_game, SimulationStats
+from state import GameState
+
+
+def test_state_at_matches_replay(tmp_path):
+    path = tmp_path / "games.ludo"
+    replays = []
+    with ArchiveWriter(path) as writer:
+        for seed in range(5):
+            recorder = GameRecorder(seed, snapshot_interval=16)
+            states = [GameState()]
+
+            class Replay:
+                def record(self, dice, token):
+                    recorder.record(dice, token)
+                    state = states[-1].copy()
+                    state.apply_move(token, dice)
+                    states.append(state)
+
+            rng = random.Random(seed)
+            play_game(rng, [STRATEGIES["random"]] * NUM_PLAYERS, SimulationStats(), Replay(),
+                      DiceSource(seed))
+            writer.append(recorder)
+            replays.append(states)
+
+    archive = GameArchive(path)
+    try:
+        assert len(archive) == len(replays)
+        for record, states in zip(archive, replays):
+            assert record.turn_count == len(states) - 1
+            assert record.snapshot_count == record.turn_count // 16
+            assert record.winner == states[-1].winner()
+            # Every turn: on a snapshot, just after one and between two
+            for turn, expected in enumerate(states):
+                assert record.state_at(turn) == expected
+            with pytest.raises(IndexError):
+                record.state_at(record.turn_count + 1)
+    finally:
+        archive.close()
@@ -0,0 +1,61 @@
+"""Generated board geometry against the original hand-written board."""
+import pytest
+
+from geometry import MAX_PLAYERS, MIN_PLAYERS, board_geometry
+
+# Red's path on the original 15x15 board, from its start cell to the end of its home column
+RED_PATH = [
+    (1, 6), (2, 6), (3, 6), (4, 6), (5, 6),
+    (6, 5), (6, 4), (6, 3), (6, 2), (6, 1), (6, 0), (7, 0), (8, 0),
+    (8, 1), (8, 2), (8, 3), (8, 4), (8, 5),
+    (9, 6), (10, 6), (11, 6), (12, 6), (13, 6), (14, 6), (14, 7), (14, 8),
+    (13, 8), (12, 8), (11, 8), (10, 8), (9, 8),
+    (8, 9), (8, 10), (8, 11), (8, 12), (8, 13), (8, 14),
+    (7, 14), (6, 14),
+    (6, 13), (6, 12), (6, 11), (6, 10), (6, 9),
+    (5, 8), (4, 8), (3, 8), (2, 8), (1, 8), (0, 8),
+    (0, 7), (1, 7), (2, 7), (3, 7), (4, 7), (5, 7), (6, 7),
+]
+
+SAFE_SQUARES = {(1, 6), (8, 1), (13, 8), (6, 13)}
+
+YARDS = {
+    0: [(1, 1), (4, 1), (1, 4), (4, 4)],
+    1: [(10, 1), (13, 1), (10, 4), (13, 4)],
+    2: [(10, 10), (13, 10), (10, 13), (13, 13)],
+    3: [(1, 10), (4, 10), (1, 13), (4, 13)],
+}
+
+
+def quarter_turn(path):
+    # The next player's path: a quarter turn clockwise about the centre cell
+    return [(14 - y, x) for x, y in path]
+
+
+def test_standard_board_matches_original():
+    geometry = board_geometry()
+    assert (geometry.width, geometry.height) == (15, 15)
+    path = RED_PATH
+    for player in range(4):
+        assert geometry.main_paths[player] == path
+        assert geometry.home_index[player] == len(path) == 57
+        assert geometry.home_paths[player] == [path[0]]
+        path = quarter_turn(path)
+    assert set(geometry.safe_squares) == SAFE_SQUARES
+    assert geometry.yards == YARDS
+
+
+@pytest.mark.parametrize("arm_length", [3, 6, 8])
+@pytest.mark.parametrize("num_players", range(MIN_PLAYERS, MAX_PLAYERS + 1))
+def test_paths_on_any_board(num_players, arm_length):
+    geometry = board_geometry(num_players, arm_length)
+    lengths = {len(path) for path in geometry.main_paths.values()}
+    assert len(lengths) == 1
+    starts = set()
+    for player, path in geometry.main_paths.items():
+        # No cell twice, starting on a safe square
+        assert len(set(path)) == len(path)
+        assert path[0] in geometry.safe_squares
+        starts.add(path[0])
+        assert len(geometry.yards[player]) == 4
+    assert len(starts) == num_players
@@ -0,0 +1,57 @@
+"""A game played through the server over TCP, mirrored by a second client."""
+import asyncio
+import random
+
+import pytest
+
+import server
+from engine import GAME_OVER, NUM_PLAYERS
+
+
+async def wait_for(condition, timeout=10.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.001)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def round_trip():
+    game_server = server.GameServer()
+    listener = await game_server.start(port=0)
+    port = listener.sockets[0].getsockname()[1]
+    player = await server.TestClient.connect("127.0.0.1", port)
+    watcher = await server.TestClient.connect("127.0.0.1", port)
+    try:
+        # The player's new table is the only one, so the watcher can follow it
+        game = asyncio.create_task(player.play_random_game(random.Random(1)))
+        await wait_for(lambda: game_server.tables)
+        table_id = next(iter(game_server.tables))
+        await watcher.request(op="subscribe", table=table_id)
+
+        with pytest.raises(ValueError, match="No such table"):
+            await watcher.request(op="subscribe", table=table_id + 1)
+        await wait_for(lambda: len(game_server.tables[table_id].seats) == NUM_PLAYERS)
+        with pytest.raises(ValueError, match="Seat taken"):
+            await watcher.request(op="join", table=table_id, seat=0)
+        with pytest.raises(ValueError, match="You do not hold that seat"):
+            await watcher.request(op="roll", table=table_id, seat=0)
+
+        winner = await asyncio.wait_for(game, 60)
+        table = game_server.tables[table_id]
+        await wait_for(lambda: watcher.states[table_id]["seq"] == table.seq)
+        # Both mirrors rebuilt the final position from the update stream
+        expected = {"type": "state", "table": table_id, "seq": table.seq, **table.published}
+        assert player.states[table_id] == expected
+        assert watcher.states[table_id] == expected
+        assert expected["state"] == GAME_OVER and expected["winner"] == winner
+    finally:
+        await player.close()
+        await watcher.close()
+    # Nobody is left at the table, so the server closes it
+    await wait_for(lambda: not game_server.tables)
+    listener.close()
+    await listener.wait_closed()
+
+
+def test_round_trip():
+    asyncio.run(round_trip())
@@ -0,0 +1,50 @@
+"""TranspositionTable replacement: a deep slot and an always-replace slot per bucket."""
+from transposition import TranspositionTable
+
+
+def keys_in_one_bucket(table, count):
+    return [7 + i * (table.mask + 1) for i in range(count)]
+
+
+def test_replacement():
+    table = TranspositionTable(8)
+    a, b, c, d, e = keys_in_one_bucket(table, 5)
+
+    table.put(a, 3, -0.5, 0.5, 2)
+    table.put(b, 1, 0.0, 0.0)
+    assert table.get(a) == (3, -0.5, 0.5, 2)
+    assert table.get(b) == (1, 0.0, 0.0, None)
+
+    # Shallower than the deep entry: only the newest slot is taken
+    table.put(c, 1, 0.0, 1.0, 0)
+    assert table.get(b) is None
+    assert table.get(a)[0] == 3 and table.get(c)[0] == 1
+
+    # Deeper: takes the deep slot and demotes what was there
+    table.put(d, 5, 0.25, 0.25, 1)
+    assert table.get(d) == (5, 0.25, 0.25, 1)
+    assert table.get(a) == (3, -0.5, 0.5, 2)
+    assert table.get(c) is None
+
+    # In a new search the old deep entry gives way to anything
+    table.new_search()
+    table.put(e, 0, 0.0, 0.0)
+    assert table.get(e)[0] == 0 and table.get(d)[0] == 5
+    assert table.get(a) is None
+
+    # Storing a key again replaces its entry instead of duplicating it
+    table.put(d, 6, 0.5, 0.5, 3)
+    assert table.get(d) == (6, 0.5, 0.5, 3)
+    assert len(table) == 2
+    assert table.get(keys_in_one_bucket(table, 6)[5]) is None
+
+
+def test_size_and_clear():
+    table = TranspositionTable(1000)
+    # Rounded down to a power of two buckets of two entries
+    assert len(table.keys) == 512
+    for key in range(300):
+        table.put(key, 1, 0.0, 0.0)
+    assert len(table) == 300
+    table.clear()
+    assert len(table) == 0 and table.get(5) is None
@@ -0,0 +1,51 @@
+"""Worker generations: cancelled jobs never run and stale results are dropped."""
+import threading
+import time
+
+from state import GameState
+from worker import Worker
+
+
+def poll_until(worker, count, timeout=5.0):
+    done = []
+    deadline = time.monotonic() + timeout
+    while len(done) < count and time.monotonic() < deadline:
+        done += worker.poll()
+        time.sleep(0.001)
+    return done
+
+
+def test_cancel_drops_stale_results():
+    worker = Worker(threads=1)
+    gate = threading.Event()
+    ran = []
+    try:
+        running = worker.submit("running", gate.wait, heavy=False)
+        queued = worker.submit("queued", ran.append, "queued", heavy=False)
+        worker.cancel()
+        # The queued job never starts; the running one finishes but nobody hears of it
+        assert queued.cancelled()
+        gate.set()
+        running.result(timeout=5)
+        assert worker.poll() == []
+
+        worker.submit("fresh", int, "7", heavy=False)
+        assert poll_until(worker, 1) == [("fresh", 7)]
+        assert ran == []
+        assert worker.poll() == []
+    finally:
+        worker.shutdown()
+
+
+def test_bot_move_is_legal():
+    worker = Worker(threads=1)
+    try:
+        state = GameState()
+        worker.submit_move("move", "greedy", state, 6)
+        worker.submit_move("none", "greedy", state, 3)
+        results = dict(poll_until(worker, 2))
+        assert results["move"] in state.legal_moves(6)
+        # Nothing leaves the yard without a six
+        assert results["none"] is None
+    finally:
+        worker.shutdown()
@@ -0,0 +1,239 @@
+"""Tournaments between bot strategies with a rated ladder.
+
+Strategies are grouped into tables of four seats, either every combination
+once per round (round robin) or neighbours in the current standings (Swiss).
+Each pairing is played once per seating in which the seats are rotated, and
+every seating replays the same dice, so first-mover bias and dice luck
+cancel out within the match. Matches run on a process pool. Their results
+come back in schedule order, so the ladder is the same whatever the worker
+count.
+
+Ratings are Glicko: an Elo rating plus a deviation that shrinks as games
+come in. A four-seat game counts as the winner beating every other strategy
+at the table. The tournament stops early once the rankings are settled,
+meaning the confidence intervals of every two neighbouring strategies no
+longer overlap.
+
+    python tournament.py random first furthest nearest greedy --pairing swiss --rounds 200
+"""
+import argparse
+import itertools
+import math
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+
+from dice import DiceSource
+from engine import NUM_PLAYERS
+from simulate import STRATEGIES, SimulationStats, make_player, play_game
+
+PAIRINGS = ("round-robin", "swiss")
+
+# Glicko scale: ratings start at 1500 with a deviation of 350
+INITIAL_RATING = 1500.0
+INITIAL_DEVIATION = 350.0
+Q = math.log(10) / 400
+
+
+def seatings(group):
+    """Seat orders that put every strategy of the group in every seat equally often."""
+    # A group smaller than the table fills the spare seats in turn
+    shifts = range(len(group)) if len(group) < NUM_PLAYERS else range(1)
+    tables = []
+    for shift in shifts:
+        order = group[shift:] + group[:shift]
+        seats = [order[i % len(order)] for i in range(NUM_PLAYERS)]
+        for rotation in range(NUM_PLAYERS):
+            table = tuple(seats[rotation:] + seats[:rotation])
+            if table not in tables:
+                tables.append(table)
+    return tables
+
+
+def round_robin_groups(names, size):
+    return [list(group) for group in itertools.combinations(names, size)]
+
+
+def swiss_groups(ladder, size, rng):
+    # Neighbours in the standings share a table; ties are broken at random
+    names = list(ladder.ratings)
+    rng.shuffle(names)
+    ranked = sorted(names, key=lambda name: -ladder.ratings[name].rating)
+    groups = [ranked[i:i + size] for i in range(0, len(ranked), size)]
+    if len(groups[-1]) < size:
+        groups[-1] = ranked[-size:]
+    return groups
+
+
+def play_match(args):
+    """Play one group in all its seatings; returns [(seating, winning seat or None)]."""
+    seed, round_number, index, group = args
+    rng = random.Random(f"{seed}:{round_number}:{index}")
+    dice = DiceSource(seed, (round_number, index))
+    results = []
+    for seating in seatings(group):
+        # Every seating sees the same dice
+        dice.seek(0)
+        winner = play_game(rng, [make_player(name) for name in seating], SimulationStats(),
+                           dice_source=dice)
+        results.append((seating, winner))
+    return results
+
+
+class Rating:
+    __slots__ = ("rating", "deviation")
+
+    def __init__(self, rating=INITIAL_RATING, deviation=INITIAL_DEVIATION):
+        self.rating = rating
+        self.deviation = deviation
+
+    def interval(self, z):
+        return self.rating - z * self.deviation, self.rating + z * self.deviation
+
+    def updated(self, outcomes):
+        """Rating after a period of (opponent Rating, score) outcomes."""
+        if not outcomes:
+            return Rating(self.rating, self.deviation)
+        variance = gain = 0.0
+        for opponent, score in outcomes:
+            g = 1 / math.sqrt(1 + 3 * (Q * opponent.deviation / math.pi) ** 2)
+            expected = 1 / (1 + 10 ** (-g * (self.rating - opponent.rating) / 400))
+            variance += g * g * expected * (1 - expected)
+            gain += g * (score - expected)
+        precision = 1 / self.deviation ** 2 + Q * Q * variance
+        return Rating(self.rating + Q / precision * gain, math.sqrt(1 / precision))
+
+
+class Ladder:
+    """Ratings and seat counts for a set of strategies."""
+
+    def __init__(self, names, confidence=0.95):
+        self.ratings = {name: Rating() for name in names}
+        self.z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        self.matches = dict.fromkeys(names, 0)
+        self.seats = dict.fromkeys(names, 0)
+        self.wins = dict.fromkeys(names, 0)
+        self.games = 0
+        self.unfinished = 0
+
+    def record(self, results):
+        # One match is one rating period: every outcome is scored against the
+        # ratings from before the match
+        outcomes = {name: [] for name in self.ratings}
+        played = set()
+        for seating, winner in results:
+            self.games += 1
+            played.update(seating)
+            for name in seating:
+                self.seats[name] += 1
+            if winner is None:
+                self.unfinished += 1
+                continue
+            champion = seating[winner]
+            self.wins[champion] += 1
+            for name in set(seating) - {champion}:
+                outcomes[champion].append((self.ratings[name], 1.0))
+                outcomes[name].append((self.ratings[champion], 0.0))
+        for name in played:
+            self.matches[name] += 1
+        self.ratings = {name: rating.updated(outcomes[name]) for name, rating in self.ratings.items()}
+
+    def standings(self):
+        return sorted(self.ratings, key=lambda name: -self.ratings[name].rating)
+
+    def settled(self, min_matches=1):
+        """True once every strategy has played and neighbouring intervals are apart."""
+        if min(self.matches.values()) < min_matches:
+            return False
+        ranked = self.standings()
+        return all(self.ratings[above].interval(self.z)[0] > self.ratings[below].interval(self.z)[1]
+                   for above, below in zip(ranked, ranked[1:]))
+
+    def as_dict(self):
+        return [{"strategy": name,
+                 "rating": self.ratings[name].rating,
+                 "interval": self.ratings[name].interval(self.z),
+                 "seats": self.seats[name],
+                 "win_rate": self.wins[name] / self.seats[name] if self.seats[name] else 0.0}
+                for name in self.standings()]
+
+
+def tournament(names, pairing="round-robin", rounds=100, seed=0, workers=None, confidence=0.95,
+               min_matches=4, max_games=None):
+    """Yield the ladder after every match until it is settled or the budget is spent."""
+    names = list(dict.fromkeys(names))
+    for name in names:
+        if name not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {name}")
+    if len(names) < 2:
+        raise ValueError("A tournament needs at least two strategies")
+    if pairing not in PAIRINGS:
+        raise ValueError(f"Unknown pairing: {pairing}")
+
+    size = min(len(names), NUM_PLAYERS)
+    ladder = Ladder(names, confidence)
+    rng = random.Random(seed)
+
+    def schedule(round_number):
+        if pairing == "swiss":
+            groups = swiss_groups(ladder, size, rng)
+        else:
+            groups = round_robin_groups(names, size)
+        return [(seed, round_number, index, group) for index, group in enumerate(groups)]
+
+    def finished():
+        return ladder.settled(min_matches) or (max_games is not None and ladder.games >= max_games)
+
+    if workers == 1:
+        for round_number in range(rounds):
+            for match in schedule(round_number):
+                ladder.record(play_match(match))
+                yield ladder
+                if finished():
+                    return
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        for round_number in range(rounds):
+            # Swiss pairings depend on the standings, so a round is scheduled once the last is in
+            for results in pool.imap(play_match, schedule(round_number)):
+                ladder.record(results)
+                yield ladder
+                if finished():
+                    return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rate bot strategies against each other")
+    parser.add_argument("strategies", nargs="+", choices=sorted(STRATEGIES))
+    parser.add_argument("--pairing", default="round-robin", choices=PAIRINGS)
+    parser.add_argument("--rounds", type=int, default=100, help="most rounds to play")
+    parser.add_argument("--max-games", type=int, default=None)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--min-matches", type=int, default=4,
+                        help="matches every strategy plays before stopping early")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    ladder = None
+    for ladder in tournament(args.strategies, args.pairing, args.rounds, args.seed, args.workers,
+                             args.confidence, args.min_matches, args.max_games):
+        print(f"\r{ladder.games} games", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    for rank, row in enumerate(ladder.as_dict(), 1):
+        low, high = row["interval"]
+        print(f"{rank:>2}. {row['strategy']:<15} {row['rating']:7.1f}  [{low:7.1f}, {high:7.1f}]  "
+              f"win rate {row['win_rate']:.3f} over {row['seats']} seats")
+    status = "settled" if ladder.settled(args.min_matches) else "not settled"
+    print(f"{status} after {ladder.games} games ({ladder.unfinished} unfinished) "
+          f"in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
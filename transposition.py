@@ -0,0 +1,91 @@
+"""Fixed-size transposition table keyed by 64-bit Zobrist hashes.
+
+Each bucket has two entries: one kept for the deepest search seen at that
+bucket and one that always takes the newest store. Entries left over from
+an earlier search (``new_search``) lose their claim on the deep slot, so the
+table keeps its size however long a game or batch runs. The full key is
+stored with each entry, so colliding buckets never return another
+position's data.
+
+An entry is a search result: depth, lower and upper bound and best move.
+They are kept in flat arrays rather than as tuples, so the table holds no
+objects for the garbage collector to walk.
+"""
+from array import array
+
+# Depth of an empty slot, and best move of an entry without one
+EMPTY = -1
+NO_MOVE = -1
+
+
+class TranspositionTable:
+    def __init__(self, size=1 << 18):
+        # Round down to a power of two buckets so a mask picks the bucket
+        buckets = 1
+        while buckets * 2 <= max(size // 2, 1):
+            buckets *= 2
+        self.mask = buckets - 1
+        slots = 2 * buckets
+        self.keys = array("Q", bytes(8 * slots))
+        self.depths = array("b", [EMPTY]) * slots
+        self.ages = array("l", [0]) * slots
+        self.lowers = array("d", [0.0]) * slots
+        self.uppers = array("d", [0.0]) * slots
+        self.moves = array("b", [NO_MOVE]) * slots
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return sum(depth != EMPTY for depth in self.depths)
+
+    def new_search(self):
+        self.age += 1
+
+    def clear(self):
+        slots = len(self.keys)
+        self.depths = array("b", [EMPTY]) * slots
+        self.age = 0
+
+    def find(self, key):
+        # Slot holding ``key``, or -1
+        i = (key & self.mask) << 1
+        if self.keys[i] == key and self.depths[i] != EMPTY:
+            return i
+        if self.keys[i + 1] == key and self.depths[i + 1] != EMPTY:
+            return i + 1
+        return -1
+
+    def get(self, key, default=None):
+        """(depth, lower, upper, best move or None) stored for ``key``."""
+        i = self.find(key)
+        if i < 0:
+            self.misses += 1
+            return default
+        self.hits += 1
+        move = self.moves[i]
+        return self.depths[i], self.lowers[i], self.uppers[i], None if move == NO_MOVE else move
+
+    def put(self, key, depth, lower, upper, move=None):
+        i = (key & self.mask) << 1
+        move = NO_MOVE if move is None else move
+        held = self.depths[i] != EMPTY and self.keys[i] == key
+        # Deep slot: same position, a search at least as deep, or a stale entry
+        if held or depth >= self.depths[i] or self.ages[i] != self.age:
+            if self.depths[i] != EMPTY and not held:
+                # Demote what was there rather than losing it outright
+                self._store(i + 1, self.keys[i], self.depths[i], self.lowers[i], self.uppers[i],
+                            self.moves[i], self.ages[i])
+            elif self.keys[i + 1] == key:
+                self.depths[i + 1] = EMPTY
+            self._store(i, key, depth, lower, upper, move, self.age)
+        else:
+            self._store(i + 1, key, depth, lower, upper, move, self.age)
+
+    def _store(self, i, key, depth, lower, upper, move, age):
+        self.keys[i] = key
+        self.depths[i] = depth
+        self.lowers[i] = lower
+        self.uppers[i] = upper
+        self.moves[i] = move
+        self.ages[i] = age
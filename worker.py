@@ -0,0 +1,128 @@
+"""Bot moves and other analysis off the main thread.
+
+``Worker`` runs jobs on a process pool for heavy work such as a bot's
+search, which would otherwise hold the GIL, and on a thread pool for light
+work. Results come back through a queue that the main loop drains with
+``poll``, which never blocks. Jobs are given a snapshot of the position,
+never the live engine.
+
+Every job belongs to a generation. ``cancel`` starts a new one: jobs that
+have not started yet are cancelled, and results from older generations are
+dropped by ``poll`` when they arrive. A job already running in a process
+cannot be interrupted, so it runs to the end and its result is ignored.
+Bot searches stop at their time limit in any case.
+"""
+import concurrent.futures
+import multiprocessing
+import queue
+import random
+
+from ai import ExpectiminimaxPlayer, MCTSPlayer
+from simulate import make_player
+
+# Strategies that search or load numpy weights, and so run in a process
+SEARCH_STRATEGIES = ("expectiminimax", "mcts", "linear")
+
+# Players built once per worker process, by (strategy, time limit, seat)
+_players = {}
+
+
+def bot_player(strategy, time_limit, seat):
+    key = (strategy, time_limit, seat)
+    player = _players.get(key)
+    if player is None:
+        if strategy == "expectiminimax":
+            player = ExpectiminimaxPlayer(time_limit=time_limit)
+        elif strategy == "mcts":
+            player = MCTSPlayer(time_limit=time_limit)
+        else:
+            player = make_player(strategy)
+        _players[key] = player
+    return player
+
+
+def warm_up(strategy, time_limit, seat):
+    # Import and build the player ahead of its first move
+    bot_player(strategy, time_limit, seat)
+
+
+def choose_move(strategy, state, dice, time_limit=1.0, seed=None):
+    """Token index the bot plays from ``state`` with ``dice``, or None with no legal move."""
+    moves = state.legal_moves(dice)
+    if not moves:
+        return None
+    player = bot_player(strategy, time_limit, state.current_player)
+    return player(state, moves, dice, random.Random(seed))
+
+
+class Worker:
+    def __init__(self, processes=1, threads=2, on_result=None):
+        self.processes = processes
+        self.threads = threads
+        # Pools are started on first use
+        self.process_pool = None
+        self.thread_pool = None
+        self.results = queue.SimpleQueue()
+        self.generation = 0
+        self.pending = set()
+        # Called from a pool thread whenever a job finishes, e.g. to wake an idle loop
+        self.on_result = on_result
+
+    def pool(self, heavy):
+        if heavy:
+            if self.process_pool is None:
+                # Spawned, not forked: the parent may hold a display and running threads
+                self.process_pool = concurrent.futures.ProcessPoolExecutor(
+                    self.processes, mp_context=multiprocessing.get_context("spawn"))
+            return self.process_pool
+        if self.thread_pool is None:
+            self.thread_pool = concurrent.futures.ThreadPoolExecutor(self.threads,
+                                                                     thread_name_prefix="worker")
+        return self.thread_pool
+
+    def submit(self, tag, function, *args, heavy=True):
+        """Run ``function(*args)``; ``poll`` returns (tag, result) once it is done."""
+        generation = self.generation
+        future = self.pool(heavy).submit(function, *args)
+        self.pending.add(future)
+        future.add_done_callback(lambda future: self.finished(tag, generation, future))
+        return future
+
+    def submit_move(self, tag, strategy, state, dice, time_limit=1.0):
+        return self.submit(tag, choose_move, strategy, state, dice, time_limit,
+                           heavy=strategy in SEARCH_STRATEGIES)
+
+    def finished(self, tag, generation, future):
+        self.results.put((tag, generation, future))
+        if self.on_result is not None:
+            self.on_result()
+
+    def cancel(self):
+        # Everything submitted so far is stale
+        self.generation += 1
+        for future in self.pending:
+            future.cancel()
+        self.pending.clear()
+
+    def poll(self):
+        """(tag, result) for jobs of the current generation finished since the last poll."""
+        done = []
+        while True:
+            try:
+                tag, generation, future = self.results.get_nowait()
+            except queue.Empty:
+                return done
+            self.pending.discard(future)
+            if generation != self.generation or future.cancelled():
+                continue
+            # A job's exception is raised here, on the polling thread
+            done.append((tag, future.result()))
+
+    def shutdown(self):
+        # Waits for jobs already running, which a bot's time limit keeps short;
+        # leaving them to the interpreter's exit handler races its teardown
+        self.cancel()
+        for pool in (self.process_pool, self.thread_pool):
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+        self.process_pool = self.thread_pool = None